@@ -18,6 +18,7 @@
 #    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 
 from py7zr.exceptions import Bad7zFile, DecompressionBombError, DecompressionError, PasswordRequired, UnsupportedCompressionMethodError
+from py7zr.helpers import FolderCache, HeaderCache
 from py7zr.io import Py7zIO, WriterFactory
 from py7zr.properties import (
     CHECK_CRC32,
@@ -43,7 +44,7 @@ from py7zr.properties import (
     PRESET_DEFAULT,
     PRESET_EXTREME,
 )
-from py7zr.py7zr import ArchiveInfo, FileInfo, SevenZipFile, is_7zfile, pack_7zarchive, unpack_7zarchive
+from py7zr.py7zr import ArchiveInfo, ArchiveSnapshot, FileInfo, SevenZipFile, is_7zfile, pack_7zarchive, unpack_7zarchive
 from py7zr.version import __version__
 
 __copyright__ = "Copyright (C) 2019-2021 Hiroshi Miura"
@@ -52,6 +53,7 @@ __copyright__ = "Copyright (C) 2019-2021 Hiroshi Miura"
 __all__ = [
     "__version__",
     "ArchiveInfo",
+    "ArchiveSnapshot",
     "FileInfo",
     "SevenZipFile",
     "is_7zfile",
@@ -64,6 +66,8 @@ __all__ = [
     "DecompressionError",
     "Py7zIO",
     "WriterFactory",
+    "FolderCache",
+    "HeaderCache",
     "FILTER_LZMA",
     "FILTER_LZMA2",
     "FILTER_DELTA",
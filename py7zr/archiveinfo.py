@@ -21,22 +21,35 @@
 # License along with this library; if not, write to the Free Software
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 #
+import collections.abc
 import functools
 import io
+import lzma
 import operator
 import os
 import struct
+import threading
+from array import array
 from functools import reduce
 from io import BytesIO
-from itertools import accumulate
+from itertools import accumulate, chain
 from operator import and_, or_
 from struct import pack, unpack
-from typing import Any, BinaryIO, Optional, Union
-
-from py7zr.compressor import SevenZipCompressor, SevenZipDecompressor
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Optional, Union, cast
+
+from py7zr.compressor import (
+    SevenZipCompressor,
+    SevenZipDecompressor,
+    SupportedMethods,
+    scan_lzma2_restart_points,
+    scan_zstd_frames,
+)
 from py7zr.exceptions import Bad7zFile
 from py7zr.helpers import ArchiveTimestamp, calculate_crc32
-from py7zr.properties import DEFAULT_FILTERS, MAGIC_7Z, PROPERTY
+from py7zr.properties import COMPRESSION_METHOD, DEFAULT_FILTERS, MAGIC_7Z, PROPERTY
+
+if TYPE_CHECKING:
+    from py7zr.py7zr import ArchiveFileList
 
 MAX_LENGTH = 65536
 MAX_NUMSTREAMS = 65536
@@ -60,8 +73,7 @@ class WriteWithCrc(io.RawIOBase):
 
 
 def read_crcs(file: BinaryIO, count: int) -> list[int]:
-    data = file.read(4 * count)
-    return [unpack("<L", data[i * 4 : i * 4 + 4])[0] for i in range(count)]
+    return read_uint32s(file, count)
 
 
 def write_crcs(file: BinaryIO | WriteWithCrc, crcs):
@@ -96,6 +108,22 @@ def read_uint32(file: BinaryIO) -> tuple[int, bytes]:
     return a, res
 
 
+def read_uint32s(file: BinaryIO, count: int) -> list[int]:
+    """read an array of count little endian unsigned longs at once."""
+    data = file.read(4 * count)
+    if len(data) < 4 * count:
+        raise Bad7zFile("unexpected end of header")
+    return [v for (v,) in struct.iter_unpack("<L", data)]
+
+
+def read_real_uint64s(file: BinaryIO, count: int) -> list[int]:
+    """read an array of count little endian unsigned long longs at once."""
+    data = file.read(8 * count)
+    if len(data) < 8 * count:
+        raise Bad7zFile("unexpected end of header")
+    return [v for (v,) in struct.iter_unpack("<Q", data)]
+
+
 def write_uint32(file: BinaryIO | WriteWithCrc, value):
     """write uint32 value in 4 bytes."""
     b = pack("<L", value)
@@ -132,6 +160,34 @@ def read_uint64(file: BinaryIO) -> int:
     return value + (highpart << (vlen * 8))
 
 
+def read_uint64s(file: BinaryIO, count: int) -> list[int]:
+    """read count UINT64 values. A header held in BytesIO is decoded from its buffer in one pass."""
+    if not isinstance(file, BytesIO):
+        return [read_uint64(file) for _ in range(count)]
+    result = []
+    pos = file.tell()
+    with file.getbuffer() as buf:
+        end = len(buf)
+        for _ in range(count):
+            if pos >= end:
+                raise Bad7zFile("unexpected end of header")
+            b = buf[pos]
+            if b < 0x80:
+                result.append(b)
+                pos += 1
+                continue
+            vlen = 8 - (b ^ 0xFF).bit_length()  # number of leading 1 bits
+            if pos + 1 + vlen > end:
+                raise Bad7zFile("unexpected end of header")
+            value = int.from_bytes(buf[pos + 1 : pos + 1 + vlen], byteorder="little")
+            if vlen < 8:
+                value += (b & ((0x80 >> vlen) - 1)) << (vlen * 8)
+            result.append(value)
+            pos += 1 + vlen
+    file.seek(pos)
+    return result
+
+
 def write_real_uint64(file: BinaryIO | WriteWithCrc, value: int):
     """write 8 bytes, as an unsigned long long."""
     file.write(pack("<Q", value))
@@ -175,20 +231,20 @@ def write_uint64(file: BinaryIO | WriteWithCrc, value: int):
         file.write(ba)
 
 
+_BIT_TABLE = [tuple(b & (0x80 >> i) != 0 for i in range(8)) for b in range(256)]
+
+
 def read_boolean(file: BinaryIO, count: int, checkall: bool = False) -> list[bool]:
     if checkall:
         all_defined = file.read(1)
         if all_defined != b"\x00":
             return [True] * count
-    result = []
-    b = 0
-    mask = 0
-    for i in range(count):
-        if mask == 0:
-            b = ord(file.read(1))
-            mask = 0x80
-        result.append(b & mask != 0)
-        mask >>= 1
+    nbytes = bits_to_bytes(count)
+    data = file.read(nbytes)
+    if len(data) < nbytes:
+        raise Bad7zFile("unexpected end of header")
+    result = list(chain.from_iterable(map(_BIT_TABLE.__getitem__, data)))
+    del result[count:]
     return result
 
 
@@ -207,18 +263,26 @@ def write_boolean(file: BinaryIO | WriteWithCrc, booleans: list[bool], all_defin
 
 def read_utf16(file: BinaryIO) -> str:
     """read a utf-16 string from file"""
-    nul = False
-    for i in range(MAX_LENGTH):
-        ch = file.read(2)
-        if ch == b"\x00\x00":
-            nul = True
-            break
-    size = (i + 1) * 2
-    file.seek(-size, 1)
-    val = file.read(size)
-    if nul:
-        val = val[:-2]
-    return val.decode("utf-16LE")
+    start = file.tell()
+    data = file.read(MAX_LENGTH * 2)
+    end = data.find(b"\x00\x00")
+    while end >= 0 and end % 2 != 0:
+        end = data.find(b"\x00\x00", end + 1)
+    if end < 0:
+        end = len(data) & ~1
+        file.seek(start + end)
+    else:
+        file.seek(start + end + 2)
+    return data[:end].decode("utf-16LE")
+
+
+def read_utf16s(data: bytes, count: int) -> list[str]:
+    """split count NUL terminated utf-16 strings out of data in one pass."""
+    names = data[: len(data) & ~1].decode("utf-16LE").split("\x00", count)
+    del names[count:]
+    if len(names) < count:
+        names.extend([""] * (count - len(names)))
+    return names
 
 
 def write_utf16(file: BinaryIO | WriteWithCrc, val: str):
@@ -263,14 +327,11 @@ class PackInfo:
             raise Bad7zFile("numstreams value %d exceeds limit %d" % (self.numstreams, MAX_NUMSTREAMS))
         pid = file.read(1)
         if pid == PROPERTY.SIZE:
-            self.packsizes = [read_uint64(file) for _ in range(self.numstreams)]
+            self.packsizes = read_uint64s(file, self.numstreams)
             pid = file.read(1)
             if pid == PROPERTY.CRC:
                 self.digestdefined = read_boolean(file, self.numstreams, True)
-                for crcexist in self.digestdefined:
-                    self.enable_digests = True
-                    if crcexist:
-                        self.crcs.append(read_uint32(file)[0])
+                self.crcs = read_uint32s(file, self.digestdefined.count(True))
                 pid = file.read(1)
         if pid != PROPERTY.END:
             raise Bad7zFile("end id expected but %s found" % repr(pid))  # pragma: no-cover  # noqa
@@ -333,6 +394,7 @@ class Folder:
         "decompressor",
         "files",
         "password",
+        "restart_points",
     ]
 
     def __init__(self) -> None:
@@ -348,9 +410,21 @@ class Folder:
         # compress/decompress objects
         self.decompressor: SevenZipDecompressor | None = None
         self.compressor: SevenZipCompressor | None = None
-        self.files = None
+        self.files: ArchiveFileList | None = None
         # encryption
         self.password: str | None = None
+        # LZMA2 restart points, scanned on demand
+        self.restart_points: list[tuple[int, int]] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Pickled folders, such as in a header cache, never carry a password nor codec objects.
+        state = {name: getattr(self, name) for name in self.__slots__ if hasattr(self, name)}
+        state.update(compressor=None, decompressor=None, password=None)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 
     @classmethod
     def retrieve(cls, file: BinaryIO):
@@ -449,6 +523,38 @@ class Folder:
             self.decompressor = SevenZipDecompressor(self.coders, packsize, self.unpacksizes, self.crc, self.password)
             return self.decompressor
 
+    def get_restart_points(self, fp, packsize: int) -> list[tuple[int, int]]:
+        """Return (uncompressed offset, packed offset) pairs where decoding of the folder can restart.
+        The packed stream is scanned from the current position of *fp* on the first call.
+        Only a folder compressed by LZMA2 or Zstandard alone has restart points."""
+        if self.restart_points is None:
+            if len(self.coders) == 1 and self.coders[0]["method"] == COMPRESSION_METHOD.LZMA2:
+                self.restart_points = scan_lzma2_restart_points(fp, packsize, self._lzma2_max_gap())
+            elif len(self.coders) == 1 and self.coders[0]["method"] == COMPRESSION_METHOD.MISC_ZSTD:
+                self.restart_points = scan_zstd_frames(fp, packsize)
+            else:
+                self.restart_points = []
+        return self.restart_points
+
+    def _lzma2_max_gap(self) -> int | None:
+        # Multi-threaded encoders, such as 7-Zip and xz, reset dictionary at blocks of three or four times
+        # of dictionary size, and 1MiB at least. A stream without a reset in such a block has no more.
+        properties = self.coders[0].get("properties")
+        if properties is None:
+            return None
+        dict_size = lzma._decode_filter_properties(lzma.FILTER_LZMA2, properties)["dict_size"]  # type: ignore
+        return max(4 * dict_size, 1 << 20)
+
+    def get_decompressor_at(
+        self, packsize: int, point: tuple[int, int], blocksize: int | None = None
+    ) -> SevenZipDecompressor:
+        """Return a new decompressor which decodes the folder from a restart point.
+        It does not check CRC of the folder because it does not see whole data."""
+        unpacked, packed = point
+        # only a folder of a single coder restarts elsewhere than at its start
+        unpacksizes = [size - unpacked for size in self.unpacksizes]
+        return SevenZipDecompressor(self.coders, packsize - packed, unpacksizes, None, self.password, blocksize)
+
     def get_compressor(self) -> SevenZipCompressor:
         assert self.compressor
         return self.compressor
@@ -511,10 +617,12 @@ class UnpackInfo:
         pid = file.read(1)
         if pid != PROPERTY.CODERS_UNPACK_SIZE:
             raise Bad7zFile(f"coders unpack size id expected but {repr(pid)} found")  # pragma: no-cover
-        for folder in self.folders:
-            for c in folder.coders:
-                for _ in range(c["numoutstreams"]):
-                    folder.unpacksizes.append(read_uint64(file))
+        counts = [sum(c["numoutstreams"] for c in folder.coders) for folder in self.folders]
+        unpacksizes = read_uint64s(file, sum(counts))
+        start = 0
+        for folder, count in zip(self.folders, counts):
+            folder.unpacksizes.extend(unpacksizes[start : start + count])
+            start += count
         pid = file.read(1)
         if pid == PROPERTY.CRC:
             defined = read_boolean(file, self.numfolders, checkall=True)
@@ -573,19 +681,20 @@ class SubstreamsInfo:
     def _read(self, file: BinaryIO, numfolders: int, folders: list[Folder]):
         pid = file.read(1)
         if pid == PROPERTY.NUM_UNPACK_STREAM:
-            self.num_unpackstreams_folders = [read_uint64(file) for _ in range(numfolders)]
+            self.num_unpackstreams_folders = read_uint64s(file, numfolders)
             pid = file.read(1)
         else:
             self.num_unpackstreams_folders = [1] * numfolders
         if pid == PROPERTY.SIZE:
             self.unpacksizes = []
-            for i in range(len(self.num_unpackstreams_folders)):
-                totalsize = 0  # type: int
-                for j in range(1, self.num_unpackstreams_folders[i]):
-                    size = read_uint64(file)
-                    self.unpacksizes.append(size)
-                    totalsize += size
-                self.unpacksizes.append(folders[i].get_unpack_size() - totalsize)
+            counts = [max(num - 1, 0) for num in self.num_unpackstreams_folders]
+            sizes = read_uint64s(file, sum(counts))
+            start = 0
+            for folder, count in zip(folders, counts):
+                part = sizes[start : start + count]
+                self.unpacksizes.extend(part)
+                self.unpacksizes.append(folder.get_unpack_size() - sum(part))
+                start += count
             pid = file.read(1)
         num_digests = 0
         num_digests_total = 0
@@ -703,13 +812,413 @@ class HeaderStreamsInfo(StreamsInfo):
         write_byte(file, PROPERTY.END)
 
 
+class _Column:
+    """values and states of one property of all files in a FilesTable"""
+
+    __slots__ = ["values", "states"]
+
+    def __init__(self, typecode: str, size: int):
+        self.values = array(typecode, bytes(array(typecode).itemsize * size))
+        self.states = bytearray(size)
+
+
+def _encode_bool(value) -> int | None:
+    return int(value) if type(value) is bool else None
+
+
+def _encode_uint32(value) -> int | None:
+    return value if type(value) is int and 0 <= value <= 0xFFFFFFFF else None
+
+
+def _encode_uint64(value) -> int | None:
+    return value if type(value) is int and 0 <= value <= 0xFFFFFFFFFFFFFFFF else None
+
+
+def _encode_timestamp(value) -> int | None:
+    return int(value) if type(value) is ArchiveTimestamp else None
+
+
+def _encode_packsizes(value) -> int | None:
+    if type(value) is list and len(value) == 1:
+        return _encode_uint64(value[0])
+    return None
+
+
+# typecode, encode and decode of properties stored in columns
+_BOOL_CODEC = ("B", _encode_bool, bool)
+_UINT32_CODEC = ("L", _encode_uint32, int)
+_UINT64_CODEC = ("Q", _encode_uint64, int)
+_TIME_CODEC = ("Q", _encode_timestamp, ArchiveTimestamp)
+_COLUMN_CODECS: dict[str, tuple[str, Callable[[Any], int | None], Callable[[int], Any]]] = {
+    "emptystream": _BOOL_CODEC,
+    "readonly": _BOOL_CODEC,
+    "archivable": _BOOL_CODEC,
+    "is_directory": _BOOL_CODEC,
+    "attributes": _UINT32_CODEC,
+    "posix_mode": _UINT32_CODEC,
+    "digest": _UINT32_CODEC,
+    "creationtime": _TIME_CODEC,
+    "lastaccesstime": _TIME_CODEC,
+    "lastwritetime": _TIME_CODEC,
+    "startpos": _UINT64_CODEC,
+    "maxsize": _UINT64_CODEC,
+    "compressed": _UINT64_CODEC,
+    "uncompressed": _UINT64_CODEC,
+    "packsizes": ("Q", _encode_packsizes, lambda v: [v]),
+    # index of a folder given by FilesTable.set_folders()
+    "folder": ("L", _encode_uint32, int),
+}
+_ABSENT = 0
+_NONE = 1
+_VALUE = 2
+_DELETED = object()
+_DEFINED_STATES = bytes([_NONE, _VALUE]) + bytes(254)
+
+
+class FileRecord(collections.abc.MutableMapping):
+    """Mapping view of properties of one file stored in a :class:`FilesTable`."""
+
+    __slots__ = ["_table", "_row"]
+
+    def __init__(self, table: "FilesTable", row: int):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table._get(self._row, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._table._set(self._row, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._table._delete(self._row, key)
+
+    def __contains__(self, key) -> bool:
+        return self._table._has(self._row, key)
+
+    def __iter__(self):
+        return iter(self._table._keys(self._row))
+
+    def __len__(self) -> int:
+        return len(self._table._keys(self._row))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, FileRecord):
+            return self._table is other._table and self._row == other._row
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class FilesTable(collections.abc.Sequence):
+    """Columnar store of properties of the files in an archive.
+
+    Properties are kept in arrays by column and file names in one string, instead of one dict per file.
+    Items are :class:`FileRecord` views which behave as the property dicts of files. A value which
+    does not fit in its column, and a property without a column, is kept in a dict of the file.
+    Files appended after reading a header are kept as they are.
+
+    A column can be set lazily with a loader, which decodes it when the property is first accessed."""
+
+    def __init__(self, size: int = 0):
+        self._size = size
+        self._columns: dict[str, _Column] = {}
+        self._order: list[str] = []
+        self._names: str | None = None
+        self._name_offsets: array | None = None
+        self._extra: dict[int, dict[str, Any]] = {}
+        self._appended: list[Any] = []
+        self._folders: list[Folder] = []
+        self._folder_index: dict[int, int] = {}
+        self._pending: dict[str, Callable[[], None]] = {}
+        self._lock = threading.RLock()  # held while a loader decodes a column
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._size + len(self._appended)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if 0 <= index < self._size:
+            return FileRecord(self, index)
+        if self._size <= index < len(self):
+            return self._appended[index - self._size]
+        raise IndexError("file index out of range")
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield FileRecord(self, row)
+        yield from self._appended
+
+    def append(self, file_info) -> None:
+        self._appended.append(file_info)
+
+    def set_folders(self, folders: list[Folder]) -> None:
+        """set folders which the "folder" property of files refers to."""
+        self._folders = folders
+        self._folder_index = {id(folder): i for i, folder in enumerate(folders)}
+
+    def set_names(self, names: list[str]) -> None:
+        """set names of all files at once."""
+        self._name_offsets = array("Q", accumulate((len(name) + 1 for name in names), initial=0))
+        self._names = "\x00".join(names)
+        self._add_key("filename")
+        self._pending.pop("filename", None)
+
+    def set_column(self, key: str, values, defined: list[bool] | None = None) -> None:
+        """set a property of all files at once. *values* are given for files marked in *defined*,
+        and the property of other files is None."""
+        typecode = _COLUMN_CODECS[key][0]
+        column = _Column(typecode, 0)
+        if defined is None or all(defined):
+            column.values = array(typecode, values)
+            column.states = bytearray([_VALUE]) * self._size
+        else:
+            it = iter(values)
+            column.values = array(typecode, [next(it) if d else 0 for d in defined])
+            column.states = bytearray(defined).translate(_DEFINED_STATES)
+        if len(column.values) != self._size:
+            raise Bad7zFile(f"{key} defined for {len(column.values)} files of {self._size}")
+        self._columns[key] = column
+        self._add_key(key)
+        self._pending.pop(key, None)
+
+    def set_lazy(self, key: str, loader: Callable[[], None]) -> None:
+        """set a loader which sets the property *key* of all files when it is first accessed."""
+        self._pending[key] = loader
+        self._add_key(key)
+
+    def _resolve(self, key: str) -> None:
+        # A loader runs once under the lock. It sets the column before it is removed from pending,
+        # so a thread checking pending without the lock never finds the column missing.
+        with self._lock:
+            loader = self._pending.get(key)
+            if loader is not None:
+                loader()
+                self._pending.pop(key, None)
+
+    def set_values(self, key: str, values: list[Any], rows=None) -> None:
+        """set a property of files at *rows*, or of all files read from a header, from a list of values."""
+        if rows is None:
+            rows = range(self._size)
+        if key in self._pending:
+            self._resolve(key)
+        codec = _COLUMN_CODECS.get(key)
+        if codec is None:
+            for row, value in zip(rows, values):
+                self._set(row, key, value)
+            return
+        if key == "folder":
+            index = self._folder_index
+            encoded = [None if v is None else index.get(id(v)) for v in values]
+        elif codec[2] is int and set(map(type, values)) <= {int, type(None)}:
+            encoded = values  # range is checked by array
+        else:
+            encode = codec[1]
+            encoded = [None if v is None else encode(v) for v in values]
+        try:
+            packed = array(codec[0], [0 if e is None else e for e in encoded])
+        except OverflowError:
+            for row, value in zip(rows, values):
+                self._set(row, key, value)
+            return
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = _Column(codec[0], self._size)
+            self._add_key(key)
+        if rows == range(self._size) and len(packed) == self._size:
+            column.values = packed
+            column.states = bytearray([_VALUE]) * self._size
+        else:
+            for row, v in zip(rows, packed):
+                column.values[row] = v
+                column.states[row] = _VALUE
+        if self._extra:
+            for row in self._extra.keys() & set(rows):
+                self._discard_extra(row, key)
+        if None in encoded:
+            for row, value, e in zip(rows, values, encoded):
+                if e is None:
+                    if value is None:
+                        column.states[row] = _NONE
+                    else:
+                        self._set(row, key, value)
+
+    def get_values(self, key: str) -> list[Any]:
+        """return a property of all files read from a header, with None for files without it."""
+        if key in self._pending:
+            self._resolve(key)
+        if key == "filename" and self._names is not None:
+            # a name set or deleted after reading is kept in extra, and None for a deleted one
+            names = cast("list[str | None]", self._names.split("\x00"))
+            for row, extra in self._extra.items():
+                if key in extra:
+                    names[row] = None if extra[key] is _DELETED else extra[key]
+            return names
+        column = self._columns.get(key)
+        if column is None or key == "folder" or key == "filename":
+            return [self._get(row, key) if self._has(row, key) else None for row in range(self._size)]
+        decode = _COLUMN_CODECS[key][2]
+        result = [decode(v) if state == _VALUE else None for v, state in zip(column.values, column.states)]
+        for row, extra in self._extra.items():
+            if key in extra:
+                result[row] = None if extra[key] is _DELETED else extra[key]
+        return result
+
+    def rows_without(self, key: str) -> list[int]:
+        """return rows of files read from a header which do not have a property."""
+        if key == "filename" and (self._names is not None or key in self._pending):
+            return [row for row, extra in self._extra.items() if extra.get(key) is _DELETED]
+        return [row for row in range(self._size) if not self._has(row, key)]
+
+    def _add_key(self, key: str) -> None:
+        if key not in self._order:
+            self._order.append(key)
+
+    def _get(self, row: int, key: str) -> Any:
+        extra = self._extra.get(row)
+        if extra is not None and key in extra:
+            value = extra[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        if key in self._pending:
+            self._resolve(key)
+        if key == "filename" and self._names is not None:
+            offsets = self._name_offsets
+            assert offsets is not None
+            return self._names[offsets[row] : offsets[row + 1] - 1]
+        column = self._columns.get(key)
+        if column is not None:
+            state = column.states[row]
+            if state == _VALUE:
+                if key == "folder":
+                    return self._folders[column.values[row]]
+                return _COLUMN_CODECS[key][2](column.values[row])
+            if state == _NONE:
+                return None
+        raise KeyError(key)
+
+    def _has(self, row: int, key: str) -> bool:
+        extra = self._extra.get(row)
+        if extra is not None and key in extra:
+            return extra[key] is not _DELETED
+        if key == "filename":
+            return self._names is not None or key in self._pending
+        if key in self._pending:
+            self._resolve(key)
+        column = self._columns.get(key)
+        return column is not None and column.states[row] != _ABSENT
+
+    def _keys(self, row: int) -> list[str]:
+        extra = self._extra.get(row, {})
+        keys = [key for key in self._order if key not in extra and self._has(row, key)]
+        keys.extend(key for key, value in extra.items() if value is not _DELETED)
+        return keys
+
+    def _set(self, row: int, key: str, value: Any) -> None:
+        if key in self._pending:
+            self._resolve(key)
+        codec = _COLUMN_CODECS.get(key)
+        if codec is not None:
+            if value is None:
+                encoded = None
+            elif key == "folder":
+                encoded = self._folder_index.get(id(value))
+            else:
+                encoded = codec[1](value)
+            if value is None or encoded is not None:
+                column = self._columns.get(key)
+                if column is None:
+                    column = self._columns[key] = _Column(codec[0], self._size)
+                    self._add_key(key)
+                if encoded is None:
+                    column.states[row] = _NONE
+                else:
+                    column.values[row] = encoded
+                    column.states[row] = _VALUE
+                self._discard_extra(row, key)
+                return
+            column = self._columns.get(key)
+            if column is not None:
+                column.states[row] = _ABSENT
+        self._extra.setdefault(row, {})[key] = value
+
+    def _delete(self, row: int, key: str) -> None:
+        if not self._has(row, key):
+            raise KeyError(key)
+        column = self._columns.get(key)
+        if column is not None:
+            column.states[row] = _ABSENT
+        if key == "filename" and (self._names is not None or key in self._pending):
+            self._extra.setdefault(row, {})[key] = _DELETED
+        else:
+            self._discard_extra(row, key)
+
+    def _discard_extra(self, row: int, key: str) -> None:
+        extra = self._extra.get(row)
+        if extra is not None and key in extra:
+            del extra[key]
+            if not extra:
+                del self._extra[row]
+
+
+class FilesTableView(collections.abc.Sequence):
+    """Sequence of files at given rows of a :class:`FilesTable`."""
+
+    __slots__ = ["_files", "_rows"]
+
+    def __init__(self, files: collections.abc.Sequence, rows: collections.abc.Sequence[int]):
+        self._files = files
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FilesTableView(self._files, self._rows[index])
+        return self._files[self._rows[index]]
+
+    def __iter__(self):
+        for row in self._rows:
+            yield self._files[row]
+
+    def get_values(self, key: str) -> list[Any]:
+        """return a property of the files, with None for files without it."""
+        if not isinstance(self._files, FilesTable):
+            return [f.get(key) for f in self]
+        values = self._files.get_values(key)
+        if self._rows == range(len(values)):
+            return values
+        return [values[row] for row in self._rows]
+
+
 class FilesInfo:
     """holds file properties"""
 
     __slots__ = ["files", "emptyfiles", "antifiles"]
 
+    _TIME_PROPERTIES = {
+        PROPERTY.CREATION_TIME: "creationtime",
+        PROPERTY.LAST_ACCESS_TIME: "lastaccesstime",
+        PROPERTY.LAST_WRITE_TIME: "lastwritetime",
+    }
+
     def __init__(self):
-        self.files: list[dict[str, Any]] = []
+        self.files: list[dict[str, Any]] | FilesTable = []
         self.emptyfiles: list[bool] = []
         self.antifiles = None
 
@@ -719,9 +1228,15 @@ class FilesInfo:
         obj._read(file)
         return obj
 
+    def _table(self) -> FilesTable:
+        """return files read from a header, which are kept in a table."""
+        assert isinstance(self.files, FilesTable)
+        return self.files
+
     def _read(self, fp: BinaryIO):
         numfiles = read_uint64(fp)
-        self.files = [{"emptystream": False} for _ in range(numfiles)]
+        self.files = FilesTable(numfiles)
+        self.files.set_column("emptystream", bytes(numfiles))
         numemptystreams = 0
         while True:
             prop = fp.read(1)
@@ -732,69 +1247,75 @@ class FilesInfo:
                 # Added by newer versions of 7z to adjust padding.
                 fp.seek(size, os.SEEK_CUR)
                 continue
-            buffer = io.BytesIO(fp.read(size))
+            data = fp.read(size)
+            buffer = io.BytesIO(data)
             if prop == PROPERTY.EMPTY_STREAM:
                 isempty = read_boolean(buffer, numfiles, checkall=False)
-                list(map(lambda x, y: x.update({"emptystream": y}), self.files, isempty))
+                self.files.set_column("emptystream", isempty)
                 numemptystreams += isempty.count(True)
             elif prop == PROPERTY.EMPTY_FILE:
                 self.emptyfiles = read_boolean(buffer, numemptystreams, checkall=False)
             elif prop == PROPERTY.NAME:
                 external = buffer.read(1)
                 if external == b"\x00":
-                    self._read_name(buffer)
+                    self.files.set_lazy("filename", functools.partial(self._read_name, data[1:], numfiles))
                 else:  # pragma: no-cover
                     dataindex = read_uint64(buffer)
                     current_pos = fp.tell()
                     fp.seek(dataindex, 0)
-                    self._read_name(fp)
+                    self.files.set_names([read_utf16(fp).replace("\\", "/") for _ in range(numfiles)])
                     fp.seek(current_pos, 0)
-            elif prop == PROPERTY.CREATION_TIME:
-                self._read_times(buffer, "creationtime")
-            elif prop == PROPERTY.LAST_ACCESS_TIME:
-                self._read_times(buffer, "lastaccesstime")
-            elif prop == PROPERTY.LAST_WRITE_TIME:
-                self._read_times(buffer, "lastwritetime")
+            elif prop in self._TIME_PROPERTIES:
+                name = self._TIME_PROPERTIES[prop]
+                self.files.set_lazy(name, functools.partial(self._read_times, data, name, numfiles))
             elif prop == PROPERTY.ATTRIBUTES:
-                defined = read_boolean(buffer, numfiles, checkall=True)
-                external = buffer.read(1)
-                if external == b"\x00":
-                    self._read_attributes(buffer, defined)
+                if not self._is_external(data, numfiles):
+                    self.files.set_lazy("attributes", functools.partial(self._read_attributes, data, numfiles))
                 else:  # pragma: no-cover
+                    defined = read_boolean(buffer, numfiles, checkall=True)
+                    buffer.read(1)
                     dataindex = read_uint64(buffer)
                     # try to read external data
                     current_pos = fp.tell()
                     fp.seek(dataindex, 0)
-                    self._read_attributes(fp, defined)
+                    self.files.set_column("attributes", read_uint32s(fp, defined.count(True)), defined)
                     fp.seek(current_pos, 0)
             elif prop == PROPERTY.START_POS:
-                self._read_start_pos(buffer)
+                self.files.set_lazy("startpos", functools.partial(self._read_start_pos, data, numfiles))
             else:
                 raise Bad7zFile(f"invalid type {repr(prop)}")  # pragma: no-cover
 
-    def _read_name(self, buffer: BinaryIO) -> None:
-        for f in self.files:
-            f["filename"] = read_utf16(buffer).replace("\\", "/")
-
-    def _read_attributes(self, buffer: BinaryIO, defined: list[bool]) -> None:
-        for idx, f in enumerate(self.files):
-            f["attributes"] = read_uint32(buffer)[0] if defined[idx] else None
-
-    def _read_times(self, fp: BinaryIO, name: str) -> None:
-        defined = read_boolean(fp, len(self.files), checkall=True)
+    @staticmethod
+    def _is_external(data: bytes, numfiles: int) -> bool:
+        """check the "external" flag which follows the defined vector of a property"""
+        offset = 1 if data[:1] != b"\x00" else 1 + bits_to_bytes(numfiles)
+        return data[offset : offset + 1] != b"\x00"
+
+    def _read_name(self, data: bytes, numfiles: int) -> None:
+        names = read_utf16s(data, numfiles)
+        self._table().set_names("\x00".join(names).replace("\\", "/").split("\x00"))
+
+    def _read_attributes(self, data: bytes, numfiles: int) -> None:
+        buffer = io.BytesIO(data)
+        defined = read_boolean(buffer, numfiles, checkall=True)
+        buffer.read(1)
+        self._table().set_column("attributes", read_uint32s(buffer, defined.count(True)), defined)
+
+    def _read_times(self, data: bytes, name: str, numfiles: int) -> None:
+        fp = io.BytesIO(data)
+        defined = read_boolean(fp, numfiles, checkall=True)
         # NOTE: the "external" flag is currently ignored, should be 0x00
         external = fp.read(1)
         assert external == b"\x00"
-        for i, f in enumerate(self.files):
-            f[name] = ArchiveTimestamp(read_real_uint64(fp)[0]) if defined[i] else None
+        self._table().set_column(name, read_real_uint64s(fp, defined.count(True)), defined)
 
-    def _read_start_pos(self, fp: BinaryIO) -> None:
-        defined = read_boolean(fp, len(self.files), checkall=True)
+    def _read_start_pos(self, data: bytes, numfiles: int) -> None:
+        fp = io.BytesIO(data)
+        defined = read_boolean(fp, numfiles, checkall=True)
         # NOTE: the "external" flag is currently ignored, should be 0x00
         external = fp.read(1)
-        assert external == 0x00
-        for i, f in enumerate(self.files):
-            f["startpos"] = read_real_uint64(fp)[0] if defined[i] else None
+        assert external == b"\x00"
+        self._table().set_column("startpos", read_real_uint64s(fp, defined.count(True)), defined)
 
     def _write_times(self, fp: BinaryIO | WriteWithCrc, propid, name: str) -> None:
         write_byte(fp, propid)
@@ -905,7 +1426,7 @@ class FilesInfo:
 class Header:
     """the archive header"""
 
-    __slot__ = ["solid", "main_streams", "files_info", "size", "_start_pos", "_initialized", "filters"]
+    __slot__ = ["solid", "main_streams", "files_info", "size", "_start_pos", "_initialized", "filters", "encrypted"]
 
     def __init__(self) -> None:
         self.solid: bool = False
@@ -916,6 +1437,8 @@ class Header:
         self.password: str | None = None
         self._initialized: bool = False
         self.filters: list[dict[str, int]] | None = None
+        # whether the header is stored encrypted
+        self.encrypted: bool = False
 
     @classmethod
     def retrieve(cls, fp: BinaryIO, buffer: BytesIO, start_pos: int, password=None):
@@ -923,21 +1446,53 @@ class Header:
         obj._read(fp, buffer, start_pos, password)
         return obj
 
+    @classmethod
+    def retrieve_decoded(cls, fp: BinaryIO, buffer: BytesIO, start_pos: int, password=None) -> tuple["Header", bytes]:
+        """Read a header as retrieve() does, and return it with its decoded data, which from_decoded() reads again."""
+        obj = cls()
+        decoded = obj._decode(fp, buffer, start_pos, password)
+        if decoded is None:
+            return obj, b""
+        data = decoded.getvalue()
+        obj._extract_header_info(decoded)
+        return obj, data
+
+    @classmethod
+    def from_decoded(cls, data: bytes, start_pos: int, size: int, encrypted: bool = False) -> "Header":
+        """Read a header from decoded data returned by retrieve_decoded(), without reading the archive."""
+        obj = cls()
+        obj._start_pos = start_pos
+        obj.size = size
+        obj.encrypted = encrypted
+        if data:
+            buffer = io.BytesIO(data)
+            pid = buffer.read(1)
+            if pid != PROPERTY.HEADER:
+                raise Bad7zFile(f"Unknown field: {repr(pid)}")
+            obj._extract_header_info(buffer)
+        return obj
+
     def _read(self, fp: BinaryIO, buffer: BytesIO, start_pos: int, password) -> None:
         """
         Decode header data or encoded header data from buffer.
         When buffer consist of encoded buffer, it get stream data
         from it and call itself recursively
         """
+        decoded = self._decode(fp, buffer, start_pos, password)
+        if decoded is not None:
+            self._extract_header_info(decoded)
+
+    def _decode(self, fp: BinaryIO, buffer: BytesIO, start_pos: int, password) -> BytesIO | None:
+        """Return plain header data positioned after its property id, decompressing an encoded header.
+        Return None for an empty archive."""
         self._start_pos = start_pos
         fp.seek(self._start_pos)
         pid = buffer.read(1)
         if not pid:
             # empty archive
-            return
+            return None
         if pid == PROPERTY.HEADER:
-            self._extract_header_info(buffer)
-            return
+            return buffer
         if pid != PROPERTY.ENCODED_HEADER:
             raise TypeError(f"Unknown field: {repr(pid)}")  # pragma: no-cover
         # get from encoded header
@@ -951,6 +1506,7 @@ class Header:
             compressed_size = streams.packinfo.packsizes[0]
             uncompressed_size = uncompressed[-1]
             folder.password = password
+            self.encrypted = self.encrypted or SupportedMethods.needs_password(folder.coders)
             src_start += streams.packinfo.packpos
             fp.seek(src_start, 0)
             decompressor = folder.get_decompressor(compressed_size)
@@ -970,7 +1526,7 @@ class Header:
         pid = buffer2.read(1)
         if pid != PROPERTY.HEADER:
             raise TypeError(f"Unknown field: {repr(pid)}")  # pragma: no-cover
-        self._extract_header_info(buffer2)
+        return buffer2
 
     def _encode_header(self, file: BinaryIO, afterheader: int, filters):
         startpos = file.tell()
@@ -1044,47 +1600,52 @@ class Header:
     def initialize(self):
         if not self._initialized:
             self._initialized = True
-            folder = Folder()
-            folder.password = self.password
-            folder.prepare_coderinfo(self.filters)
-            if self.main_streams is not None:
-                # append mode
-                if self.main_streams.unpackinfo is not None:
-                    self.main_streams.unpackinfo.folders.append(folder)
-                    self.main_streams.unpackinfo.numfolders += 1
-                else:
-                    pass  # unexpected
-                if self.main_streams.substreamsinfo is not None:
-                    self.main_streams.substreamsinfo.num_unpackstreams_folders.append(0)
-                else:
-                    pass  # unexpected
-            else:
-                # create new header
-                folders = [folder]
-                self.files_info = FilesInfo()
-                self.main_streams = StreamsInfo()
-                self.main_streams.packinfo = PackInfo()
-                self.main_streams.packinfo.numstreams = 0
-                self.main_streams.packinfo.packpos = 0
-                self.main_streams.unpackinfo = UnpackInfo()
-                self.main_streams.unpackinfo.numfolders = len(folders)
-                self.main_streams.unpackinfo.folders = folders
-                self.main_streams.substreamsinfo = SubstreamsInfo()
-                self.main_streams.substreamsinfo.num_unpackstreams_folders = [len(folders)]
-                self.main_streams.substreamsinfo.unpacksizes = []
-                self.main_streams.packinfo.enable_digests = self.password is not None
-                self.main_streams.packinfo.numstreams = 0
-                self.main_streams.substreamsinfo.digests = []
-                self.main_streams.substreamsinfo.digestsdefined = []
-                self.main_streams.substreamsinfo.num_unpackstreams_folders = [0]
-                self.main_streams.packinfo.packsizes = []
-                self.main_streams.packinfo.crcs = []
-            return folder
+            return self.add_folder()
         else:
             if self.main_streams is not None and self.main_streams.unpackinfo is not None:
                 return self.main_streams.unpackinfo.folders[-1]
         return None  # unexpected
 
+    def initialize_files(self) -> None:
+        if self.files_info is None:
+            self.files_info = FilesInfo()
+
+    def add_folder(self) -> Folder:
+        """Add a folder to write members into, creating streams info of a new header."""
+        folder = Folder()
+        folder.password = self.password
+        folder.prepare_coderinfo(self.filters)
+        if self.main_streams is not None:
+            # append mode
+            if self.main_streams.unpackinfo is not None:
+                self.main_streams.unpackinfo.folders.append(folder)
+                self.main_streams.unpackinfo.numfolders += 1
+            else:
+                pass  # unexpected
+            if self.main_streams.substreamsinfo is not None:
+                self.main_streams.substreamsinfo.num_unpackstreams_folders.append(0)
+            else:
+                pass  # unexpected
+        else:
+            # create new header
+            self.initialize_files()
+            self.main_streams = StreamsInfo()
+            self.main_streams.packinfo = PackInfo()
+            self.main_streams.packinfo.packpos = 0
+            self.main_streams.packinfo.enable_digests = self.password is not None
+            self.main_streams.packinfo.numstreams = 0
+            self.main_streams.packinfo.packsizes = []
+            self.main_streams.packinfo.crcs = []
+            self.main_streams.unpackinfo = UnpackInfo()
+            self.main_streams.unpackinfo.numfolders = 1
+            self.main_streams.unpackinfo.folders = [folder]
+            self.main_streams.substreamsinfo = SubstreamsInfo()
+            self.main_streams.substreamsinfo.unpacksizes = []
+            self.main_streams.substreamsinfo.digests = []
+            self.main_streams.substreamsinfo.digestsdefined = []
+            self.main_streams.substreamsinfo.num_unpackstreams_folders = [0]
+        return folder
+
 
 class SignatureHeader:
     """The SignatureHeader class hold information of a signature header of archive."""
@@ -22,11 +22,18 @@
 # Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
 #
 import bz2
+import collections
+import concurrent.futures
+import functools
 import lzma
+import mmap
+import os
 import struct
 import sys
+import threading
 import zlib
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from enum import Enum
 from typing import Any, Optional, Union
 
@@ -37,7 +44,7 @@ from Cryptodome.Cipher import AES
 from Cryptodome.Random import get_random_bytes
 
 from py7zr.exceptions import PasswordRequired, UnsupportedCompressionMethodError
-from py7zr.helpers import calculate_crc32, calculate_key
+from py7zr.helpers import FolderRecorder, calculate_crc32, derived_key_cache
 from py7zr.io import Buffer
 from py7zr.properties import (
     COMPRESSION_METHOD,
@@ -100,7 +107,7 @@ class ISevenZipCompressor(ABC):
 
 class ISevenZipDecompressor(ABC):
     @abstractmethod
-    def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes:
+    def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes | memoryview:
         """
         Decompress data (interface)
         :param data: input data
@@ -110,6 +117,13 @@ class ISevenZipDecompressor(ABC):
         pass
 
 
+def get_aes_key(password: str, cycles: int, salt: bytes) -> bytes:
+    """Return 7zAES key, deriving it only once for same parameters.
+    Every folder of an archive usually shares the same key, so parallel workers
+    wait here for the first derivation and then reuse its result."""
+    return derived_key_cache.get(password.encode("utf-16LE"), cycles, salt, "sha256")
+
+
 class AESCompressor(ISevenZipCompressor):
     """AES Compression(Encryption) class.
     It accept pre-processing filter which may be a LZMA compression."""
@@ -121,7 +135,7 @@ class AESCompressor(ISevenZipCompressor):
         self.iv = get_random_bytes(16)
         self.salt = b""
         self.method = CompressionMethod.CRYPT_AES256_SHA256
-        key = calculate_key(password.encode("utf-16LE"), self.cycles, self.salt, "sha256")
+        key = get_aes_key(password, self.cycles, self.salt)
         self.iv += bytes(self.AES_CBC_BLOCKSIZE - len(self.iv))  # zero padding if iv < AES_CBC_BLOCKSIZE
         self.cipher = AES.new(key, AES.MODE_CBC, self.iv)
         self.flushed = False
@@ -202,7 +216,7 @@ class AESDecompressor(ISevenZipDecompressor):
             assert numcyclespower <= 24
             if ivsize < 16:
                 iv += bytes("\x00" * (16 - ivsize), "ascii")
-            key = calculate_key(password.encode("utf-16LE"), numcyclespower, salt, "sha256")
+            key = get_aes_key(password, numcyclespower, salt)
             self.cipher = AES.new(key, AES.MODE_CBC, iv)
             if blocksize:
                 self.buf = Buffer(size=blocksize + 16)
@@ -259,14 +273,26 @@ class DeflateDecompressor(ISevenZipDecompressor):
         self.flushed = False
         self._decompressor = zlib.decompressobj(wbits=-15)
 
+    @property
+    def needs_input(self) -> bool:
+        return len(self._decompressor.unconsumed_tail) == 0
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes:
+        tail = self._decompressor.unconsumed_tail
+        if len(tail) > 0:
+            data = b"".join((tail, data))
         if len(data) == 0:
             if self.flushed:
                 return b""
             else:
                 self.flushed = True
                 return self._decompressor.flush()
-        return self._decompressor.decompress(data)
+        # zlib takes 0 as unlimited, and keeps input not consumed in unconsumed_tail.
+        return self._decompressor.decompress(data, max(max_length, 0))
 
 
 class Deflate64Compressor(ISevenZipCompressor):
@@ -293,24 +319,54 @@ class Deflate64Compressor(ISevenZipCompressor):
 
 
 class Deflate64Decompressor(ISevenZipDecompressor):
+    """Inflate deflate64 data.
+    The inflater has no output limit, so input is fed in small steps to bound output of a call;
+    input and output beyond max_length are kept for following calls."""
+
+    STEP = 16384
+
     def __init__(self):
         self.flushed = False
+        self._input = memoryview(b"")
+        self._output = b""
         if hasattr(sys, "pypy_version_info"):
             self._enabled = False
         else:
             self._decompressor = inflate64.Inflater()
             self._enabled = True
 
+    @property
+    def needs_input(self) -> bool:
+        return len(self._input) == 0 and len(self._output) == 0
+
+    @property
+    def eof(self) -> bool:
+        return self._enabled and self._decompressor.eof and self.needs_input
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes:
         if not self._enabled:
             raise UnsupportedCompressionMethodError(None, "deflate64 is disabled on pypy.")
-        if len(data) == 0:
+        if len(data) > 0:
+            self._input = memoryview(b"".join((self._input, data)) if len(self._input) > 0 else data)
+        elif len(self._input) == 0 and len(self._output) == 0:
             if self.flushed:
                 return b""
             else:
                 self.flushed = True
                 return self._decompressor.inflate(b"")
-        return self._decompressor.inflate(data)
+        result = [self._output]
+        size = len(self._output)
+        while len(self._input) > 0 and (max_length < 0 or size < max_length):
+            out = self._decompressor.inflate(self._input[: self.STEP])
+            self._input = self._input[self.STEP :]
+            result.append(out)
+            size += len(out)
+        res = b"".join(result)
+        if 0 <= max_length < len(res):
+            self._output = res[max_length:]
+            return res[:max_length]
+        self._output = b""
+        return res
 
 
 class CopyCompressor(ISevenZipCompressor):
@@ -322,8 +378,21 @@ class CopyCompressor(ISevenZipCompressor):
 
 
 class CopyDecompressor(ISevenZipDecompressor):
+    def __init__(self):
+        self._input = memoryview(b"")
+
+    @property
+    def needs_input(self) -> bool:
+        return len(self._input) == 0
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes:
-        return bytes(data)
+        if len(data) > 0:
+            self._input = memoryview(b"".join((self._input, data)) if len(self._input) > 0 else data)
+        if max_length < 0:
+            max_length = len(self._input)
+        res = bytes(self._input[:max_length])
+        self._input = self._input[max_length:]
+        return res
 
 
 class PpmdDecompressor(ISevenZipDecompressor):
@@ -340,6 +409,14 @@ class PpmdDecompressor(ISevenZipDecompressor):
             raise UnsupportedCompressionMethodError(properties, "Unknown size of properties is passed")
         self.decoder = pyppmd.Ppmd7Decoder(order, mem)
 
+    @property
+    def needs_input(self) -> bool:
+        return self.decoder.needs_input
+
+    @property
+    def eof(self) -> bool:
+        return self.decoder.eof
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length=-1) -> bytes:
         if len(data) == 0 and self.decoder.needs_input:
             return self.decoder.decode(b"\0", max_length)
@@ -514,6 +591,16 @@ class BrotliDecompressor(ISevenZipDecompressor):
         self._prefix_checked = False
         self._decompressor = brotli.Decompressor()
 
+    @property
+    def needs_input(self) -> bool:
+        can_accept_more_data = getattr(self._decompressor, "can_accept_more_data", None)
+        return can_accept_more_data is None or can_accept_more_data()
+
+    @property
+    def eof(self) -> bool:
+        is_finished = getattr(self._decompressor, "is_finished", None)
+        return is_finished is not None and is_finished()
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1):
         if not self._prefix_checked:
             # check first 4bytes
@@ -526,14 +613,46 @@ class BrotliDecompressor(ISevenZipDecompressor):
 
 
 class ZstdCompressor(ISevenZipCompressor):
-    def __init__(self, level: int):
-        self.compressor = zstd.ZstdCompressor(level)
+    """Compress data by Zstandard, on threads of libzstd when threads is more than one.
+    When frame_size is given, input is cut into frames of frame_size bytes, which record their
+    content size and can be decoded independently."""
+
+    def __init__(self, level: int, threads: int = 1, frame_size: int | None = None):
+        if frame_size is not None and frame_size <= 0:
+            raise ValueError(f"frame_size should be positive but {frame_size} is given.")
+        options: dict[int, int] = {zstd.CompressionParameter.compression_level: level}
+        # libzstd built without multi-threading support accepts no worker.
+        threads = min(threads, zstd.CompressionParameter.nb_workers.bounds()[1])
+        if threads > 1:
+            options[zstd.CompressionParameter.nb_workers] = threads
+        self.compressor = zstd.ZstdCompressor(options=options)
+        self._frame_size = frame_size
+        self._buffer = bytearray()
+        self._frames = 0
 
     def compress(self, data: bytes | bytearray | memoryview) -> bytes:
-        return self.compressor.compress(data)
+        if self._frame_size is None:
+            return self.compressor.compress(data)
+        self._buffer += data
+        result = []
+        while len(self._buffer) >= self._frame_size:
+            result.append(self._compress_frame(bytes(self._buffer[: self._frame_size])))
+            del self._buffer[: self._frame_size]
+        return b"".join(result)
 
     def flush(self) -> bytes:
-        return self.compressor.flush()
+        if self._frame_size is None:
+            return self.compressor.flush()
+        if self._buffer or self._frames == 0:
+            data = self._compress_frame(bytes(self._buffer))
+            self._buffer = bytearray()
+            return data
+        return b""
+
+    def _compress_frame(self, data: bytes) -> bytes:
+        # a frame given at once records its content size
+        self._frames += 1
+        return self.compressor.compress(data, mode=zstd.ZstdCompressor.FLUSH_FRAME)
 
 
 class ZstdDecompressor(ISevenZipDecompressor):
@@ -544,8 +663,31 @@ class ZstdDecompressor(ISevenZipDecompressor):
             raise UnsupportedCompressionMethodError(properties, "Zstd version of archive is higher than us.")
         self.decompressor = zstd.ZstdDecompressor()
 
+    @property
+    def needs_input(self) -> bool:
+        return self.decompressor.needs_input and not self._next_frame()
+
+    @property
+    def eof(self) -> bool:
+        return self.decompressor.eof and not self._next_frame()
+
     def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes:
-        return self.decompressor.decompress(data)
+        result = []
+        while True:
+            if self.decompressor.eof:
+                # a stream may be a sequence of frames
+                data = self.decompressor.unused_data + data
+                if len(data) == 0:
+                    break
+                self.decompressor = zstd.ZstdDecompressor()
+            result.append(self.decompressor.decompress(data, max_length))
+            data = b""
+            if max_length >= 0 or not self._next_frame():
+                break
+        return b"".join(result)
+
+    def _next_frame(self) -> bool:
+        return self.decompressor.eof and len(self.decompressor.unused_data) > 0
 
 
 algorithm_class_map: dict[int, tuple[Any, Any]] = {
@@ -576,6 +718,72 @@ class LZMA1Compressor(ISevenZipCompressor):
         return self._compressor.flush()
 
 
+class ParallelLZMA2Compressor(ISevenZipCompressor):
+    """Compress blocks of input into independent LZMA2 streams on a pool of threads, and join them in order
+    into one LZMA2 stream, like xz -T does. Each block starts with a chunk resetting dictionary,
+    so any LZMA2 decoder reads the stream. BCJ filters before LZMA2 keep state across blocks,
+    so they are applied in the calling thread."""
+
+    def __init__(self, filters, threads: int, block_size: int | None = None):
+        self._encoders = [algorithm_class_map[f["id"]][0]() for f in filters[:-1]]
+        self._filters = filters[-1:]
+        if block_size is None:
+            # same default as xz: three times of the dictionary size, and 1MiB at least.
+            props = lzma._decode_filter_properties(  # type: ignore
+                lzma.FILTER_LZMA2, lzma._encode_filter_properties(self._filters[0])  # type: ignore
+            )
+            block_size = max(3 * props["dict_size"], 1 << 20)
+        self._block_size = block_size
+        self._threads = threads
+        self._buffer = bytearray()
+        self._pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def compress(self, data: bytes | bytearray | memoryview) -> bytes:
+        for encoder in self._encoders:
+            data = encoder.compress(data)
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            self._submit(bytes(self._buffer[: self._block_size]))
+            del self._buffer[: self._block_size]
+        return self._collect(self._threads)
+
+    def flush(self) -> bytes:
+        data = b""
+        for encoder in self._encoders:
+            data = encoder.compress(data) + encoder.flush() if data else encoder.flush()
+        self._buffer += data
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        try:
+            return self._collect(0) + b"\x00"  # end marker of LZMA2 stream
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _submit(self, block: bytes) -> None:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self._threads)
+        self._pending.append(self._executor.submit(self._compress_block, self._filters, block))
+
+    def _collect(self, max_pending: int) -> bytes:
+        """Return compressed blocks in order, while more than max_pending blocks are pending,
+        or the first pending block is done."""
+        result = []
+        while self._pending and (len(self._pending) > max_pending or self._pending[0].done()):
+            result.append(self._pending.popleft().result())
+        return b"".join(result)
+
+    @staticmethod
+    def _compress_block(filters, block: bytes) -> bytes:
+        compressor = lzma.LZMACompressor(format=lzma.FORMAT_RAW, filters=filters)
+        data = compressor.compress(block) + compressor.flush()
+        # strip end marker to join with following blocks
+        return data[:-1]
+
+
 class LZMA1Decompressor(ISevenZipDecompressor):
     def __init__(self, filters, unpacksize):
         self._decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
@@ -585,6 +793,201 @@ class LZMA1Decompressor(ISevenZipDecompressor):
         return self._decompressor.decompress(data, max_length)
 
 
+def scan_lzma2_restart_points(fp, size: int, max_gap: int | None = None) -> list[tuple[int, int]]:
+    """Scan chunk headers of a raw LZMA2 stream of *size* bytes from the current position of *fp*.
+    Chunks that reset dictionary, state and properties can be decoded by a new decompressor
+    without any preceding data. So can an uncompressed chunk resetting dictionary, when the next
+    compressed chunk resets state and properties.
+    When *max_gap* is given, the scan stops when no chunk resets dictionary in *max_gap* uncompressed
+    bytes, such as in a stream written by a single thread, which has no other restart point.
+
+    :returns: list of (uncompressed offset, packed offset) of such chunks in the stream.
+    """
+    points: list[tuple[int, int]] = []
+    start = fp.tell()
+    packed = 0
+    unpacked = 0
+    last_reset = 0
+    # uncompressed chunks resetting dictionary since the last compressed chunk
+    candidates: list[tuple[int, int]] = []
+    while packed < size:
+        if max_gap is not None and unpacked - last_reset > max_gap:
+            break
+        fp.seek(start + packed)
+        header = fp.read(1)
+        if len(header) < 1:
+            break
+        control = header[0]
+        if control == 0x00:
+            # end of stream
+            points.extend(candidates)
+            break
+        elif control in (0x01, 0x02):
+            header = fp.read(2)
+            if len(header) < 2:
+                break
+            if control == 0x01:
+                candidates.append((unpacked, packed))
+                last_reset = unpacked
+            chunk_size = int.from_bytes(header, "big") + 1
+            packed += 3 + chunk_size
+            unpacked += chunk_size
+        elif control >= 0x80:
+            header = fp.read(4)
+            if len(header) < 4:
+                break
+            if control >= 0xC0:
+                points.extend(candidates)
+            candidates = []
+            if control >= 0xE0:
+                points.append((unpacked, packed))
+                last_reset = unpacked
+            packed += 5 + (1 if control >= 0xC0 else 0) + int.from_bytes(header[2:4], "big") + 1
+            unpacked += ((control & 0x1F) << 16) + int.from_bytes(header[0:2], "big") + 1
+        else:
+            # broken stream; leave it to decompressor to report error.
+            break
+    else:
+        points.extend(candidates)
+    fp.seek(start)
+    return points
+
+
+def scan_zstd_frames(fp, size: int) -> list[tuple[int, int]]:
+    """Scan frame headers of a Zstandard stream of *size* bytes from the current position of *fp*.
+    Each frame can be decoded by a new decompressor, but its uncompressed offset is known only when
+    all preceding frames record their content size. Scan stops at a frame without it.
+
+    :returns: list of (uncompressed offset, packed offset) of frames in the stream.
+    """
+    points: list[tuple[int, int]] = []
+    start = fp.tell()
+    packed = 0
+    unpacked = 0
+    while packed < size:
+        fp.seek(start + packed)
+        header = fp.read(18)
+        if len(header) < 8:
+            break
+        magic = int.from_bytes(header[0:4], "little")
+        if magic & 0xFFFFFFF0 == 0x184D2A50:
+            # skippable frame
+            packed += 8 + int.from_bytes(header[4:8], "little")
+            continue
+        elif magic != 0xFD2FB528:
+            # broken stream; leave it to decompressor to report error.
+            break
+        descriptor = header[4]
+        single_segment = descriptor & 0x20
+        fcs_size = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        pos = 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 0x03]
+        points.append((unpacked, packed))
+        if fcs_size == 0 or len(header) < pos + fcs_size:
+            # content size is unknown
+            break
+        unpacked += int.from_bytes(header[pos : pos + fcs_size], "little") + (256 if fcs_size == 2 else 0)
+        packed += pos + fcs_size
+        last_block = False
+        while not last_block:
+            fp.seek(start + packed)
+            header = fp.read(3)
+            block_type = (header[0] >> 1) & 0x03 if len(header) == 3 else 3
+            if block_type == 3:
+                # truncated stream or reserved block type
+                break
+            block = int.from_bytes(header, "little")
+            packed += 3 + (1 if block_type == 1 else block >> 3)
+            last_block = bool(block & 1)
+        if not last_block:
+            break
+        if descriptor & 0x04:
+            # content checksum
+            packed += 4
+    fp.seek(start)
+    return points
+
+
+def restart_segments(points: list[tuple[int, int]], packsize: int, unpacksize: int, min_size: int) -> list[tuple[int, int]]:
+    """Split a packed stream of *packsize* packed and *unpacksize* uncompressed bytes at restart *points*
+    into segments of *min_size* uncompressed bytes at least, except the last one.
+
+    :returns: list of (uncompressed size, packed size) of the segments.
+    """
+    segments: list[tuple[int, int]] = []
+    start_unpacked = start_packed = 0
+    for unpacked, packed in points:
+        if packed > start_packed and unpacked - start_unpacked >= min_size:
+            segments.append((unpacked - start_unpacked, packed - start_packed))
+            start_unpacked, start_packed = unpacked, packed
+    segments.append((unpacksize - start_unpacked, packsize - start_packed))
+    return segments
+
+
+_decode_pool: concurrent.futures.ThreadPoolExecutor | None = None
+_decode_pool_lock = threading.Lock()
+
+
+def _get_decode_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Return a thread pool shared by all decompressors decoding segments in parallel."""
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            _decode_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, os.cpu_count() or 1))
+        return _decode_pool
+
+
+class ParallelDecompressor(ISevenZipDecompressor):
+    """Decode independent segments of a packed stream on a shared pool of threads, and return output in order.
+    A segment is decoded when all of its packed data is given, and at most max_pending segments are
+    decoded ahead of output."""
+
+    def __init__(self, sizes: list[int], decode: Callable[[bytes], bytes | memoryview], max_pending: int):
+        self._sizes = collections.deque(sizes)
+        self._decode = decode
+        self._max_pending = max_pending
+        self._packsize = sum(sizes)
+        self._received = 0
+        self._input = bytearray()
+        self._pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        self._output: bytes | memoryview = b""
+        self._pos = 0
+
+    @property
+    def needs_input(self) -> bool:
+        return self._pos >= len(self._output) and len(self._pending) < self._max_pending
+
+    @property
+    def eof(self) -> bool:
+        return not self._sizes and not self._pending and self._pos >= len(self._output)
+
+    def decompress(self, data: bytes | bytearray | memoryview, max_length: int = -1) -> bytes | memoryview:
+        self._input += data
+        self._received += len(data)
+        while self._sizes and len(self._input) >= self._sizes[0]:
+            self._submit(self._sizes.popleft())
+        if not data and self._input and not self._pending and self._received >= self._packsize:
+            # all packed data is given but does not fit the segments; let a decoder report an error.
+            # Empty data is also given to drain output while a segment is partially given.
+            self._sizes.clear()
+            self._submit(len(self._input))
+        if self._pos >= len(self._output):
+            if not self._pending or (data and not self._pending[0].done() and len(self._pending) < self._max_pending):
+                return b""
+            self._output = self._pending.popleft().result()
+            self._pos = 0
+        size = len(self._output) - self._pos
+        if max_length >= 0:
+            size = min(size, max_length)
+        result = memoryview(self._output)[self._pos : self._pos + size]
+        self._pos += size
+        return result
+
+    def _submit(self, size: int) -> None:
+        segment = bytes(self._input[:size])
+        del self._input[:size]
+        self._pending.append(_get_decode_pool().submit(self._decode, segment))
+
+
 class SevenZipDecompressor:
     """Main decompressor object which is properly configured and bind to each 7zip folder.
     because 7zip folder can have a custom compression method"""
@@ -597,6 +1000,8 @@ class SevenZipDecompressor:
         crc: int | None,
         password: str | None = None,
         blocksize: int | None = None,
+        segments: list[int] | None = None,
+        threads: int = 1,
     ) -> None:
         self.input_size = packsize
         self.unpacksizes = unpacksizes
@@ -647,15 +1052,24 @@ class SevenZipDecompressor:
         self._unpacked = [0 for _ in range(len(self._unpacksizes))]
         self.consumed = 0
         self._unused = bytearray()
-        self._buf = bytearray()
+        self._buf: bytes | bytearray = b""
         self._pos = 0
         # ---
         if all(self.methods_map):
-            decompressor = self._get_lzma_decompressor(coders, unpacksizes[-1])
-            self.chain.append(decompressor)
+            if segments is not None and len(segments) > 1:
+                # segments of the packed stream are decoded in parallel by new decompressors.
+                decode = functools.partial(self._decode_segment, coders, unpacksizes[-1])
+                self.chain.append(ParallelDecompressor(segments, decode, threads))
+            else:
+                decompressor = self._get_lzma_decompressor(coders, unpacksizes[-1])
+                self.chain.append(decompressor)
         elif not any(self.methods_map):
-            for i in range(len(coders)):
-                self.chain.append(self._get_alternative_decompressor(coders[i], unpacksizes[i], password))
+            if segments is not None and len(segments) > 1 and len(coders) == 1:
+                decode = functools.partial(self._decode_segment, coders, unpacksizes[-1])
+                self.chain.append(ParallelDecompressor(segments, decode, threads))
+            else:
+                for i in range(len(coders)):
+                    self.chain.append(self._get_alternative_decompressor(coders[i], unpacksizes[i], password))
         elif any(self.methods_map):
             for i in range(len(coders)):
                 if (not any(self.methods_map[:i])) and all(self.methods_map[i:]):
@@ -672,10 +1086,10 @@ class SevenZipDecompressor:
         else:
             raise UnsupportedCompressionMethodError(coders, "Combination order of methods is not supported.")
 
-    def _decompress(self, data, max_length: int):
-        for i, decompressor in enumerate(self.chain):
+    def _decompress(self, data, max_length: int, start: int = 0):
+        for i in range(start, len(self.chain)):
             if self._unpacked[i] < self._unpacksizes[i]:
-                data = decompressor.decompress(data, max_length)
+                data = self.chain[i].decompress(data, max_length)
                 self._unpacked[i] += len(data)
             elif len(data) == 0:
                 data = b""
@@ -683,6 +1097,18 @@ class SevenZipDecompressor:
                 raise EOFError
         return data
 
+    def _pending(self) -> int:
+        """Return index of the last decompressor in chain which holds input not decoded yet, or -1."""
+        for i in range(len(self.chain) - 1, -1, -1):
+            decompressor = self.chain[i]
+            if (
+                self._unpacked[i] < self._unpacksizes[i]
+                and getattr(decompressor, "needs_input", True) is False
+                and not getattr(decompressor, "eof", False)
+            ):
+                return i
+        return -1
+
     def _read_data(self, fp):
         # read data from disk
         # determine read siize
@@ -695,40 +1121,46 @@ class SevenZipDecompressor:
         unused_s = len(self._unused)
         read_size = min(rest_size - unused_s, self.block_size - unused_s)
         if read_size > 0:
-            data = fp.read(read_size)
+            # borrow a view of the packed data when the reader maps the archive in memory.
+            readview = getattr(fp, "readview", None)
+            data = readview(read_size) if readview is not None else fp.read(read_size)
             self.consumed += len(data)
         else:
             data = b""
         return data
 
-    def decompress(self, fp, max_length: int = -1) -> bytes:
-        if max_length < 0:
-            data = self._read_data(fp)
-            res = self._buf[self._pos :] + self._decompress(self._unused + data, max_length)
-            self._buf = bytearray()
-            self._unused = bytearray()
-            self._pos = 0
+    def decompress(self, fp, max_length: int = -1) -> bytes | memoryview:
+        """Decompress data up to max_length bytes, reading packed data from fp when needed.
+        Data is returned as decoded by the codecs, or as a view of it when longer than max_length,
+        so it may be shorter than requested."""
+        if self._pos < len(self._buf):
+            # return output left by a previous call, without joining it with new output.
+            size = len(self._buf) - self._pos
+            if max_length >= 0:
+                size = min(size, max_length)
+            res: bytes | memoryview = memoryview(self._buf)[self._pos : self._pos + size]
+            self._pos += size
         else:
-            current_buf_len = len(self._buf) - self._pos
-            if current_buf_len >= max_length:  # we already have enough data
-                res = self._buf[self._pos : self._pos + max_length]
-                self._pos += max_length
+            pending = self._pending() if max_length >= 0 else -1
+            if pending >= 0:
+                # drain input held by a codec before reading more, so that input does not pile up in it.
+                tmp = self._decompress(b"", max_length, pending)
             else:
                 data = self._read_data(fp)
                 if len(self._unused) > 0:
-                    tmp = self._decompress(self._unused + data, max_length)
+                    data = self._unused + data
                     self._unused = bytearray()
-                else:
-                    tmp = self._decompress(data, max_length)
-                if current_buf_len + len(tmp) <= max_length:
-                    res = self._buf[self._pos :] + tmp
-                    self._buf = bytearray()
-                    self._pos = 0
-                else:
-                    res = self._buf[self._pos :] + tmp[: max_length - current_buf_len]
-                    self._buf = bytearray(tmp[max_length - current_buf_len :])
-                    self._pos = 0
-        self.digest = calculate_crc32(res, self.digest)
+                tmp = self._decompress(data, max_length)
+            if 0 <= max_length < len(tmp):
+                self._buf = tmp
+                self._pos = max_length
+                res = memoryview(tmp)[:max_length]
+            else:
+                self._buf = b""
+                self._pos = 0
+                res = tmp
+        if self.crc is not None:
+            self.digest = calculate_crc32(res, self.digest)
         return res
 
     def check_crc(self):
@@ -759,6 +1191,11 @@ class SevenZipDecompressor:
         else:
             return lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
 
+    def _decode_segment(self, coders: list[dict[str, Any]], unpacksize: int, data: bytes) -> bytes | memoryview:
+        if all(self.methods_map):
+            return self._get_lzma_decompressor(coders, unpacksize).decompress(data)
+        return self._get_alternative_decompressor(coders[0], unpacksize).decompress(data)
+
     def _get_alternative_decompressor(
         self, coder: dict[str, Any], unpacksize=None, password=None
     ) -> Union[bz2.BZ2Decompressor, lzma.LZMADecompressor, ISevenZipDecompressor]:  # noqa
@@ -790,6 +1227,65 @@ class SevenZipDecompressor:
             return algorithm_class_map[filter_id][1]()
 
 
+class CachingDecompressor:
+    """Decompressor of a folder which serves data from cached contents of the folder first,
+    and passes newly decompressed data to a recorder to extend the cache.
+
+    Cached contents may be a prefix of the folder; when more data is requested, a decompressor
+    starts from the beginning of the folder and drops data already in the cache.
+    It does not check CRC of the folder, CRC of each file is still checked by a caller."""
+
+    def __init__(
+        self,
+        coders: list[dict[str, Any]],
+        packsize: int,
+        unpacksizes: list[int],
+        password: str | None = None,
+        cached: bytes | mmap.mmap = b"",
+        recorder: FolderRecorder | None = None,
+        blocksize: int | None = None,
+    ) -> None:
+        self.crc = None
+        self._coders = coders
+        self._packsize = packsize
+        self._unpacksizes = unpacksizes
+        self._password = password
+        self._blocksize = blocksize if blocksize else get_default_blocksize()
+        self._cached = cached
+        self._pos = 0
+        self._recorder = recorder
+        self._decompressor: SevenZipDecompressor | None = None
+        if SupportedMethods.needs_password(coders) and password is None:
+            raise PasswordRequired(coders, "Password is required for extracting given archive.")
+
+    def decompress(self, fp, max_length: int = -1) -> bytes | memoryview:
+        if self._pos < len(self._cached):
+            size = len(self._cached) - self._pos
+            if max_length >= 0:
+                size = min(size, max_length)
+            res: bytes | memoryview = self._cached[self._pos : self._pos + size]
+            self._pos += size
+            return res
+        if self._decompressor is None:
+            self._decompressor = SevenZipDecompressor(
+                self._coders, self._packsize, self._unpacksizes, None, self._password, self._blocksize
+            )
+            skip = len(self._cached)
+            while skip > 0:
+                data = self._decompressor.decompress(fp, min(skip, self._blocksize))
+                if len(data) == 0 and self._decompressor.consumed >= self._decompressor.input_size:
+                    break
+                skip -= len(data)
+        res = self._decompressor.decompress(fp, max_length)
+        self._pos += len(res)
+        if self._recorder is not None:
+            self._recorder.write(res)
+        return res
+
+    def check_crc(self) -> bool:
+        return True
+
+
 class SevenZipCompressor:
     """Main compressor object to configured for each 7zip folder."""
 
@@ -854,7 +1350,15 @@ class SevenZipCompressor:
             raise UnsupportedCompressionMethodError(filters, "Unknown combination of methods.")
 
     def _set_native_compressors_coders(self, filters):
-        self.chain.append(LZMA1Compressor(filters))
+        # "threads" and "block_size" options of LZMA2 are not lzma filter properties.
+        options = {key: filters[-1][key] for key in ("threads", "block_size") if key in filters[-1]}
+        if options:
+            filters = filters[:-1] + [{k: v for k, v in filters[-1].items() if k not in options}]
+        threads = options.get("threads", 1) or os.cpu_count() or 1
+        if threads > 1 and filters[-1]["id"] == FILTER_LZMA2 and all(f["id"] in algorithm_class_map for f in filters[:-1]):
+            self.chain.append(ParallelLZMA2Compressor(filters, threads, options.get("block_size")))
+        else:
+            self.chain.append(LZMA1Compressor(filters))
         self._unpacksizes.append(0)
         for filter in filters:
             self.coders.insert(0, SupportedMethods.get_coder(filter))
@@ -870,7 +1374,10 @@ class SevenZipCompressor:
             if filter_id == FILTER_ZSTD:
                 level = alt_filter.get("level", 3)
                 properties = struct.pack("BBBBB", zstd.zstd_version_info[0], zstd.zstd_version_info[1], level, 0, 0)
-                compressor = algorithm_class_map[filter_id][0](level=level)
+                threads = alt_filter.get("threads", 1) or os.cpu_count() or 1
+                compressor = algorithm_class_map[filter_id][0](
+                    level=level, threads=threads, frame_size=alt_filter.get("frame_size")
+                )
             elif filter_id == FILTER_PPMD:
                 properties = PpmdCompressor.encode_filter_properties(alt_filter)
                 compressor = algorithm_class_map[filter_id][0](properties)
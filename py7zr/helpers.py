@@ -22,18 +22,24 @@
 #
 from __future__ import annotations
 
+import collections
 import ctypes
 import hashlib
+import mmap
 import os
 import pathlib
 import platform
 import posixpath
 import re
+import shutil
+import stat
 import sys
+import tempfile
+import threading
 import time as _time
 import zlib
 from datetime import datetime, timedelta, timezone, tzinfo
-from typing import TYPE_CHECKING
+from typing import IO, TYPE_CHECKING, Any
 
 from py7zr import Bad7zFile
 from py7zr.win32compat import is_windows_native_python, is_windows_unc_path
@@ -45,7 +51,7 @@ if TYPE_CHECKING:
 RELATIVE_PATH_MARKER = "./"
 
 
-def calculate_crc32(data: bytes, value: int = 0, blocksize: int = 1024 * 1024) -> int:
+def calculate_crc32(data: bytes | bytearray | memoryview, value: int = 0, blocksize: int = 1024 * 1024) -> int:
     """Calculate CRC32 of strings with arbitrary lengths."""
     if len(data) <= blocksize:
         value = zlib.crc32(data, value)
@@ -114,13 +120,14 @@ def _calculate_key2(password: bytes, cycles: int, salt: bytes, digest: str):
 
 def _calculate_key3(password: bytes, cycles: int, salt: bytes, digest: str) -> bytes:
     """Calculate 7zip AES encryption key.
-    Concat values in order to reduce number of calls of Hash.update()."""
+    Hash rounds in batches of 256 from one reusable buffer. Only the round counter
+    bytes above the lowest one change between batches, so they are rewritten in place."""
     assert cycles <= 0x3F
     if cycles == 0x3F:
         ba = bytearray(salt + password + bytes(32))
         key: bytes = bytes(ba[:32])
     else:
-        cat_cycle = 6
+        cat_cycle = 8
         if cycles > cat_cycle:
             rounds = 1 << cat_cycle
             stages = 1 << (cycles - cat_cycle)
@@ -129,25 +136,20 @@ def _calculate_key3(password: bytes, cycles: int, salt: bytes, digest: str) -> b
             stages = 1 << 0
         m = _get_hash(digest)
         saltpassword = salt + password
-        s = 0  # type: int  # (0..stages) * rounds
-        if platform.python_implementation() == "PyPy":
-            for _ in range(stages):
-                m.update(
-                    memoryview(
-                        b"".join(
-                            [saltpassword + (s + i).to_bytes(8, byteorder="little", signed=False) for i in range(rounds)]
-                        )
-                    )
-                )
-                s += rounds
-        else:
-            for _ in range(stages):
-                m.update(
-                    b"".join([saltpassword + (s + i).to_bytes(8, byteorder="little", signed=False) for i in range(rounds)])
-                )
-                s += rounds
+        stride = len(saltpassword) + 8
+        buf = bytearray(b"".join([saltpassword + i.to_bytes(8, byteorder="little", signed=False) for i in range(rounds)]))
+        view = memoryview(buf)
+        # round counter is (stage << cat_cycle) + i, the lowest byte is i.
+        previous = bytes(7)
+        for stage in range(stages):
+            current = stage.to_bytes(7, byteorder="little", signed=False)
+            for pos in range(7):
+                if current[pos] != previous[pos]:
+                    buf[len(saltpassword) + 1 + pos :: stride] = bytes((current[pos],)) * rounds
+            previous = current
+            m.update(view)
+        view.release()
         key = m.digest()[:32]
-
     return key
 
 
@@ -157,6 +159,395 @@ else:
     calculate_key = _calculate_key2  # it is faster when CPython 3.6.x
 
 
+class KeyCache:
+    """Bounded and thread-safe LRU cache of derived encryption keys.
+
+    A key is looked up by (password, salt, cycles, digest), and a missing key is
+    derived only once even when several threads ask for it at the same time,
+    while different keys are derived in parallel.
+    Passwords are not kept; entries are looked up by a hash of them, and cached keys
+    are overwritten with zeros when they are evicted or cleared."""
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self.maxsize = maxsize
+        self._keys: collections.OrderedDict[tuple[bytes, bytes, int, str], bytearray] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._deriving: dict[tuple[bytes, bytes, int, str], threading.Lock] = {}
+
+    @staticmethod
+    def _cache_key(password: bytes, cycles: int, salt: bytes, digest: str) -> tuple[bytes, bytes, int, str]:
+        return hashlib.sha256(password).digest(), salt, cycles, digest
+
+    def get(self, password: bytes, cycles: int, salt: bytes, digest: str = "sha256") -> bytes:
+        """Return a derived key, calculating and storing it when not cached."""
+        k = self._cache_key(password, cycles, salt, digest)
+        with self._lock:
+            key = self._keys.get(k)
+            if key is not None:
+                self._keys.move_to_end(k)
+                return bytes(key)
+            deriving = self._deriving.setdefault(k, threading.Lock())
+        # Threads asking for the same key wait for the first one, outside of the lock of the cache.
+        with deriving:
+            with self._lock:
+                key = self._keys.get(k)
+                if key is not None:
+                    return bytes(key)
+            try:
+                derived = calculate_key(password, cycles, salt, digest)
+                with self._lock:
+                    if self.maxsize > 0:
+                        self._keys[k] = bytearray(derived)
+                        while len(self._keys) > self.maxsize:
+                            _, evicted = self._keys.popitem(last=False)
+                            self._wipe(evicted)
+            finally:
+                # waiting threads derive the key again when it failed.
+                with self._lock:
+                    self._deriving.pop(k, None)
+            return derived
+
+    def evict(self, password: bytes, cycles: int, salt: bytes, digest: str = "sha256") -> None:
+        """Remove a key from the cache when exists."""
+        with self._lock:
+            key = self._keys.pop(self._cache_key(password, cycles, salt, digest), None)
+            if key is not None:
+                self._wipe(key)
+
+    def clear(self) -> None:
+        """Remove all keys from the cache."""
+        with self._lock:
+            for key in self._keys.values():
+                self._wipe(key)
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _wipe(key: bytearray) -> None:
+        key[:] = bytes(len(key))
+
+
+derived_key_cache = KeyCache()
+
+
+class FolderCache:
+    """Bounded and thread-safe LRU cache of decompressed folder contents, shared by archives.
+
+    Entries are kept in memory up to *memory_limit* bytes. Least recently used entries, and
+    entries larger than *memory_limit*, go to files in *directory*, or in a temporary directory,
+    up to *disk_limit* bytes, and are dropped when evicted from there. A hit on disk returns
+    a read-only memory map of the file. ``hits`` and ``misses`` count lookups."""
+
+    def __init__(self, memory_limit: int = 64 * 1024 * 1024, disk_limit: int = 0, directory: str | None = None) -> None:
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.hits = 0
+        self.misses = 0
+        self._memory: collections.OrderedDict[Any, bytes] = collections.OrderedDict()
+        self._disk: collections.OrderedDict[Any, tuple[str, int]] = collections.OrderedDict()
+        self._memory_size = 0
+        self._disk_size = 0
+        self._directory = directory
+        self._tempdir: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def memory_size(self) -> int:
+        return self._memory_size
+
+    @property
+    def disk_size(self) -> int:
+        return self._disk_size
+
+    def get(self, key) -> bytes | mmap.mmap | None:
+        """Return cached contents for key, or None when not cached."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+            entry = self._disk.get(key)
+            mapped = self._map(*entry) if entry is not None else None
+            if mapped is None:
+                self._discard(key)
+                self.misses += 1
+                return None
+            self._disk.move_to_end(key)
+            self.hits += 1
+            return mapped
+
+    def put(self, key, data: bytes | bytearray) -> None:
+        """Store contents for key, replacing an older entry."""
+        with self._lock:
+            self._discard(key)
+            self._store(key, bytes(data))
+
+    def recorder(self, key, cached: bytes | mmap.mmap = b"") -> FolderRecorder:
+        """Return a recorder of contents for key, which follow *cached* contents."""
+        return FolderRecorder(self, key, cached)
+
+    def clear(self) -> None:
+        """Remove all entries, and the temporary directory when created."""
+        with self._lock:
+            for key in list(self._disk.keys()):
+                self._discard(key)
+            self._memory.clear()
+            self._memory_size = 0
+            if self._tempdir is not None:
+                shutil.rmtree(self._tempdir, ignore_errors=True)
+                self._tempdir = None
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._disk)
+
+    def __contains__(self, key) -> bool:
+        return key in self._memory or key in self._disk
+
+    def _store(self, key, data: bytes) -> None:
+        if len(data) > self.memory_limit:
+            self._spill(key, data)
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_limit:
+            evicted_key, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._spill(evicted_key, evicted)
+
+    def _spill(self, key, data: bytes) -> None:
+        if len(data) > self.disk_limit:
+            return
+        try:
+            f, path = self._create_file()
+            with f:
+                f.write(data)
+        except OSError:
+            return
+        self._add_file(key, path, len(data))
+
+    def _create_file(self) -> tuple[IO[bytes], str]:
+        if self._directory is None and self._tempdir is None:
+            self._tempdir = tempfile.mkdtemp(prefix="py7zr-")
+        fd, path = tempfile.mkstemp(dir=self._directory or self._tempdir)
+        return os.fdopen(fd, "wb"), path
+
+    def _add_file(self, key, path: str, size: int) -> None:
+        while self._disk and self._disk_size + size > self.disk_limit:
+            self._discard(next(iter(self._disk)))
+        self._disk[key] = (path, size)
+        self._disk_size += size
+
+    @staticmethod
+    def _map(path: str, size: int) -> mmap.mmap | None:
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size != size:
+                    return None
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # such as a removed file, or an empty one which cannot be mapped
+            return None
+
+    def _discard(self, key) -> None:
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self._memory_size -= len(data)
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_size -= entry[1]
+            try:
+                os.unlink(entry[0])
+            except OSError:
+                pass
+
+
+class FolderRecorder:
+    """Recorder of contents of a folder decompressed through a :class:`FolderCache`.
+
+    Contents are kept in memory up to the memory limit of the cache, and are written to a file
+    of the disk tier beyond that. Recording stops when contents exceed the disk limit too.
+    :meth:`commit` stores recorded contents in the cache, and :meth:`close` drops them."""
+
+    def __init__(self, cache: FolderCache, key, cached: bytes | mmap.mmap = b"") -> None:
+        self._cache = cache
+        self._key = key
+        self._cached = cached
+        self._size = 0
+        self._buffer: bytearray | None = None
+        self._file: IO[bytes] | None = None
+        self._path: str | None = None
+        self._stopped = False
+
+    def write(self, data: bytes | memoryview) -> None:
+        if self._stopped:
+            return
+        if self._buffer is None and self._file is None:
+            # cached contents are copied only when the folder is extended
+            self._buffer = bytearray()
+            self._append(self._cached)
+        self._append(data)
+
+    def _append(self, data) -> None:
+        if self._stopped:
+            return
+        size = self._size + len(data)
+        if self._file is None and size <= self._cache.memory_limit:
+            assert self._buffer is not None
+            self._buffer += data
+        elif size <= self._cache.disk_limit:
+            try:
+                if self._file is None:
+                    with self._cache._lock:
+                        self._file, self._path = self._cache._create_file()
+                    self._file.write(self._buffer)  # type: ignore[arg-type]
+                    self._buffer = None
+                self._file.write(data)
+            except OSError:
+                self.close()
+                return
+        else:
+            self.close()
+            return
+        self._size = size
+
+    def commit(self) -> None:
+        """Store recorded contents in the cache, when the folder was extended."""
+        if self._stopped or self._size <= len(self._cached):
+            return
+        if self._file is not None:
+            assert self._path is not None
+            self._file.close()
+            with self._cache._lock:
+                self._cache._discard(self._key)
+                self._cache._add_file(self._key, self._path, self._size)
+            self._file = None
+            self._path = None
+        elif self._buffer is not None:
+            self._cache.put(self._key, self._buffer)
+        self.close()
+
+    def close(self) -> None:
+        """Drop recorded contents which are not committed."""
+        self._stopped = True
+        self._buffer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+            self._path = None
+
+
+class HeaderCache:
+    """Size-bounded cache of decoded archive headers in files of *directory*, shared by processes.
+
+    Entries hold header data as stored in archives, which is parsed again when read. *directory*
+    is created accessible only by the owner; an existing directory owned by another user or
+    writable by others is refused with :exc:`PermissionError`. Entries are written to temporary
+    files and renamed into place, so readers never see a partial entry. A hit refreshes the
+    modification time of an entry, and least recently used entries are removed when the total size
+    exceeds *max_size* bytes. ``hits`` and ``misses`` count lookups of this object."""
+
+    suffix = ".7zh"
+
+    def __init__(self, directory: str | os.PathLike, max_size: int = 256 * 1024 * 1024) -> None:
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._check_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _check_directory(self) -> None:
+        if not hasattr(os, "getuid"):
+            return
+        st = self.directory.stat()
+        if st.st_uid != os.getuid() or st.st_mode & stat.S_IWOTH:
+            raise PermissionError(f"header cache directory {self.directory} is not private to the user")
+
+    def _path(self, key) -> pathlib.Path:
+        return self.directory.joinpath(hashlib.sha256(repr(key).encode("utf-8")).hexdigest() + self.suffix)
+
+    def get(self, key) -> bytes | None:
+        """Return the cached entry for key, or None when not cached."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data: bytes) -> None:
+        """Store an entry for key, replacing an older one, and evict entries beyond the size limit."""
+        if len(data) > self.max_size:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self._evict()
+
+    def remove(self, key) -> None:
+        """Remove the entry for key if any."""
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path in self.directory.glob("*" + self.suffix):
+            path.unlink(missing_ok=True)
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def __contains__(self, key) -> bool:
+        return self._path(key).exists()
+
+    def _entries(self) -> list[tuple[int, int, pathlib.Path]]:
+        entries = []
+        for path in self.directory.glob("*" + self.suffix):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by another process
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+
 def filetime_to_dt(ft):
     """Convert Windows NTFS file time into python datetime object."""
     EPOCH_AS_FILETIME = 116444736000000000
@@ -18,8 +18,13 @@
 #    Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 import hashlib
 import io
+import mmap
+import os
+import queue
+import threading
+import zlib
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 
 class Py7zIO(ABC):
@@ -183,9 +188,12 @@ class MemIO:
         if self._buf is not None:
             self._buf.flush()
 
-    def write(self, s: bytes | bytearray) -> int:
+    def write(self, s: bytes | bytearray | memoryview) -> int:
         if self._buf is None:
             return -1
+        # writers of a WriterFactory are given bytes, as declared by Py7zIO.write(), not views of decoded blocks
+        if isinstance(s, memoryview):
+            s = s.tobytes()
         return self._buf.write(s)
 
     def read(self, length: int | None = None) -> bytes:
@@ -276,6 +284,187 @@ class NullIO(Py7zIO):
         pass
 
 
+class PositionedReader(io.RawIOBase):
+    """Read-only view of a shared archive source which keeps its own position.
+
+    Many readers can share one source from several threads. A plain file is read with
+    :func:`os.pread`, and an :class:`io.BytesIO` or :class:`mmap.mmap` is sliced directly,
+    so neither touches the shared file position. Other sources, such as multi-volume files
+    or streams decoding another file, fall back to seek and read under ``lock``,
+    which should be shared by all readers of the same source. A reader given as a source
+    shares its own source."""
+
+    def __init__(self, source, lock: "threading.Lock | None" = None):
+        super().__init__()
+        if isinstance(source, PositionedReader):
+            lock = lock if lock is not None else source._lock
+            source = source._source
+        self._source: Any = source
+        self._lock: threading.Lock = lock if lock is not None else threading.Lock()
+        self._pos = 0
+        self._fd: int | None = None
+        self._mem: memoryview | None = None
+        if isinstance(source, io.BytesIO):
+            self._mem = source.getbuffer()
+        elif isinstance(source, mmap.mmap):
+            self._mem = memoryview(source)
+        elif hasattr(os, "pread") and isinstance(source, (io.FileIO, io.BufferedReader)):
+            # fileno() of other streams, such as gzip.GzipFile, may be a file of other contents.
+            try:
+                self._fd = source.fileno()
+            except (AttributeError, OSError, RuntimeError, ValueError):
+                self._fd = None
+
+    @property
+    def name(self):
+        """Name of the shared source, such as the path of a file."""
+        return getattr(self._source, "name", None)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        else:
+            with self._lock:
+                self._pos = self._source.seek(0, os.SEEK_END) + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._read_at(self._pos, -1)
+        else:
+            data = self._read_at(self._pos, size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
+
+    def readview(self, size: int) -> bytes | memoryview:
+        """Read up to size bytes as a view of the source without copying, when the source is in memory.
+        The view is valid while the source is open."""
+        if self._mem is None:
+            return self.read(size)
+        data = self._mem[self._pos : self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def _read_at(self, pos: int, size: int) -> bytes:
+        if self._mem is not None:
+            end = len(self._mem) if size < 0 else pos + size
+            return bytes(self._mem[pos:end])
+        if self._fd is not None and size >= 0:
+            return os.pread(self._fd, size, pos)
+        with self._lock:
+            self._source.seek(pos)
+            return self._source.read(size)
+
+    def close(self) -> None:
+        """Release the view but leave the shared source open."""
+        if self._mem is not None:
+            self._mem.release()
+            self._mem = None
+        super().close()
+
+
+class LimitedReader:
+    """Reader of the next *size* bytes of a file, such as one of several members spooled into one file."""
+
+    def __init__(self, fd, size: int):
+        self._fd = fd
+        self._remaining = size
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fd.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+class ChecksumWriter:
+    """Sink of decompressed chunks which calculates CRC32 and writes them in two background threads.
+
+    A decoder puts chunks while the previous ones are checksummed and written; CRC32 and
+    file writes release the GIL, so they overlap with decompression. Stages are connected
+    by queues of *depth* chunks, which bound memory in flight. Chunks should not be modified
+    after put. An error of writing is raised by :meth:`put` or :meth:`close`."""
+
+    def __init__(self, fq, depth: int = 2):
+        self.crc32 = 0
+        self._fq = fq
+        self._error: BaseException | None = None
+        self._checksum_q: queue.Queue = queue.Queue(maxsize=depth)
+        self._write_q: queue.Queue = queue.Queue(maxsize=depth)
+        self._threads = [
+            threading.Thread(target=self._checksum, daemon=True),
+            threading.Thread(target=self._write, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def put(self, chunk: bytes | bytearray | memoryview) -> None:
+        if self._error is not None:
+            raise self._error
+        self._checksum_q.put(chunk)
+
+    def close(self) -> int:
+        """Wait for all chunks to be written, and return CRC32 of them."""
+        if self._threads:
+            self._checksum_q.put(None)
+            for t in self._threads:
+                t.join()
+            self._threads = []
+        if self._error is not None:
+            raise self._error
+        return self.crc32
+
+    def _checksum(self) -> None:
+        while True:
+            chunk = self._checksum_q.get()
+            if chunk is not None:
+                self.crc32 = zlib.crc32(chunk, self.crc32)
+            self._write_q.put(chunk)
+            if chunk is None:
+                break
+
+    def _write(self) -> None:
+        while True:
+            chunk = self._write_q.get()
+            if chunk is None:
+                break
+            if self._error is None:
+                try:
+                    self._fq.write(chunk)
+                except BaseException as e:
+                    # keep draining chunks, so that the decoder never blocks.
+                    self._error = e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                self.close()
+            except BaseException:
+                pass
+
+
 class BufferOverflow(Exception):
     pass
 
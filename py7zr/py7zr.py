@@ -26,31 +26,46 @@
 
 from __future__ import annotations
 
+import array
+import atexit
+import bisect
 import collections.abc
+import concurrent.futures
 import contextlib
 import datetime
 import errno
+import fnmatch
 import functools
 import io
+import mmap
 import os
 import pathlib
+import pickle
 import queue
 import re
+import shutil
 import stat
+import struct
 import sys
+import tempfile
 import time
-from collections.abc import Collection
+from collections.abc import Callable, Collection, Iterable, Sequence
 from dataclasses import dataclass
-from multiprocessing import Process
-from shutil import ReadError
-from threading import Thread
-from typing import IO, TYPE_CHECKING, Any, BinaryIO, Protocol, TypedDict
+from threading import Lock, Thread
+from typing import IO, TYPE_CHECKING, Any, BinaryIO, Protocol, TypedDict, cast
 
 import multivolumefile
 
-from py7zr.archiveinfo import Folder, Header, SignatureHeader
+from py7zr.archiveinfo import Folder, FilesTableView, Header, SignatureHeader
 from py7zr.callbacks import ExtractCallback
-from py7zr.compressor import SupportedMethods, get_methods_names
+from py7zr.compressor import (
+    CachingDecompressor,
+    SevenZipCompressor,
+    SevenZipDecompressor,
+    SupportedMethods,
+    get_methods_names,
+    restart_segments,
+)
 from py7zr.exceptions import (
     AbsolutePathError,
     Bad7zFile,
@@ -62,6 +77,9 @@ from py7zr.exceptions import (
 )
 from py7zr.helpers import (
     ArchiveTimestamp,
+    FolderCache,
+    FolderRecorder,
+    HeaderCache,
     calculate_crc32,
     check_archive_path,
     filetime_to_dt,
@@ -70,9 +88,10 @@ from py7zr.helpers import (
     readlink,
     remove_trailing_slash,
 )
-from py7zr.io import MemIO, NullIO, WriterFactory
+from py7zr.io import ChecksumWriter, LimitedReader, MemIO, NullIO, PositionedReader, WriterFactory
 from py7zr.member import FILE_ATTRIBUTE_UNIX_EXTENSION, MemberType
-from py7zr.properties import DEFAULT_FILTERS, FILTER_DEFLATE64, MAGIC_7Z, get_default_blocksize, get_memory_limit
+from py7zr.properties import DEFAULT_FILTERS, FILTER_DEFLATE64, MAGIC_7Z, get_default_blocksize
+from py7zr.version import __version__
 
 if TYPE_CHECKING:
     from typing_extensions import NotRequired
@@ -108,6 +127,7 @@ class FileInfoDict(TypedDict):
     posix_mode: NotRequired[int | None]
     archivable: NotRequired[bool]
     is_directory: NotRequired[bool]
+    folder: NotRequired[Folder]
 
 
 class ArchiveFile:
@@ -278,12 +298,14 @@ class ArchiveFile:
 class ArchiveFileList(collections.abc.Iterable[ArchiveFile]):
     """Iterable container of ArchiveFile."""
 
-    def __init__(self, offset: int = 0):
-        self.files_list: list[FileInfoDict] = []
+    def __init__(self, offset: int = 0, files_list: Sequence[FileInfoDict] | None = None):
+        self.files_list: Sequence[FileInfoDict] = [] if files_list is None else files_list
         self.index = 0
         self.offset = offset
 
     def append(self, file_info: FileInfoDict) -> None:
+        if not isinstance(self.files_list, list):
+            self.files_list = list(self.files_list)
         self.files_list.append(file_info)
 
     def __len__(self) -> int:
@@ -301,6 +323,57 @@ class ArchiveFileList(collections.abc.Iterable[ArchiveFile]):
         return res
 
 
+class NameIndex:
+    """Lookup of archive members by name, name prefix and glob pattern.
+
+    A map from a name to its first member, and an order of members sorted by name,
+    are built when first used. Results are member indices in archive order."""
+
+    def __init__(self, names: list[str]):
+        self._names = names
+        self._first: dict[str, int] | None = None
+        self._order: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> list[str]:
+        return self._names
+
+    def get(self, name: str) -> int | None:
+        """Return index of the first member named *name*, or None."""
+        if self._first is None:
+            # assign in reverse, so that the first of duplicated names wins
+            self._first = dict(zip(reversed(self._names), range(len(self._names) - 1, -1, -1)))
+        return self._first.get(name)
+
+    def find(self, name: str) -> list[int]:
+        """Return indices of all members named *name*."""
+        return self._scan(name, lambda n: n == name)
+
+    def prefixed(self, prefix: str) -> list[int]:
+        """Return indices of members whose name starts with *prefix*."""
+        return self._scan(prefix, lambda n: n.startswith(prefix))
+
+    def match(self, pattern: str) -> list[int]:
+        """Return indices of members whose name matches a glob *pattern* by :func:`fnmatch.fnmatchcase`."""
+        literal = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        return [i for i in self.prefixed(literal) if fnmatch.fnmatchcase(self._names[i], pattern)]
+
+    def _scan(self, start: str, cond: Callable[[str], bool]) -> list[int]:
+        if self._order is None:
+            self._order = sorted(range(len(self._names)), key=self._names.__getitem__)
+        names, order = self._names, self._order
+        result = []
+        for pos in range(bisect.bisect_left(order, start, key=names.__getitem__), len(order)):
+            if not cond(names[order[pos]]):
+                break
+            result.append(order[pos])
+        result.sort()
+        return result
+
+
 class ArchiveFileListIterator(collections.abc.Iterator[ArchiveFile]):
     def __init__(self, archive_file_list: ArchiveFileList):
         self._archive_file_list = archive_file_list
@@ -314,6 +387,168 @@ class ArchiveFileListIterator(collections.abc.Iterator[ArchiveFile]):
         return res
 
 
+class ArchiveFileReader(io.RawIOBase):
+    """Readable and seekable binary stream of an archive member, returned by :meth:`SevenZipFile.open`.
+
+    Member data is decompressed lazily from its folder on read. Data of preceding members
+    in a solid folder is decompressed and dropped without CRC calculation. CRC of the member
+    is checked when the stream reaches the end of the member."""
+
+    _MAX_EMPTY_READS = 3
+
+    def __init__(
+        self,
+        reader: PositionedReader,
+        member: ArchiveFile,
+        offset: int,
+        src_start: int,
+        packsize: int,
+        blocksize: int,
+    ) -> None:
+        super().__init__()
+        self._reader = reader
+        self._member = member
+        self._folder = member.folder
+        self._offset = offset  # position of the member in folder
+        self._src_start = src_start
+        self._packsize = packsize
+        self._blocksize = blocksize
+        self._size = 0 if member.emptystream or self._folder is None else member.uncompressed
+        self._pos = 0
+        self._decoded = 0
+        self._folder_decoded = 0
+        self._crc = 0
+        self._crc_valid = True
+        self._decompressor: SevenZipDecompressor | None = None
+        if self._size > 0:
+            self._reset((0, 0))
+
+    @property
+    def name(self) -> str:
+        return self._member.filename
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            pos = offset
+        elif whence == os.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == os.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence}, should be 0, 1 or 2)")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = min(pos, self._size)
+        return self._pos
+
+    def read(self, size: int | None = -1) -> bytes:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        if size is None or size < 0:
+            size = self._size - self._pos
+        size = min(size, self._size - self._pos)
+        if size <= 0:
+            return b""
+        self._sync()
+        result = bytearray()
+        while len(result) < size:
+            data = self._decompress(min(size - len(result), self._blocksize))
+            self._update(data)
+            result += data
+        self._pos += len(result)
+        return bytes(result)
+
+    def readinto(self, b) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        with memoryview(b) as view, view.cast("B") as out:
+            size = min(len(out), self._size - self._pos)
+            if size <= 0:
+                return 0
+            self._sync()
+            written = 0
+            while written < size:
+                data = self._decompress(min(size - written, self._blocksize))
+                out[written : written + len(data)] = data
+                self._update(data)
+                written += len(data)
+        self._pos += written
+        return written
+
+    def close(self) -> None:
+        if not self.closed:
+            self._reader.close()
+            self._decompressor = None
+        super().close()
+
+    def _reset(self, point: tuple[int, int]) -> None:
+        """Restart decoding of the folder from a restart point, (uncompressed offset, packed offset)."""
+        assert self._folder is not None
+        self._reader.seek(self._src_start + point[1])
+        self._decompressor = self._folder.get_decompressor_at(self._packsize, point, self._blocksize)
+        self._folder_decoded = point[0]
+        self._decoded = max(0, point[0] - self._offset)
+        self._crc = 0
+        # CRC of the member can be checked only when decoding it from the start.
+        self._crc_valid = point[0] <= self._offset
+
+    def _restart_point(self, target: int) -> tuple[int, int]:
+        """Return the last restart point of the folder at or before *target*."""
+        assert self._folder is not None
+        self._reader.seek(self._src_start)
+        points = self._folder.get_restart_points(self._reader, self._packsize)
+        index = bisect.bisect_right(points, target, key=lambda p: p[0])
+        return points[index - 1] if index > 0 else (0, 0)
+
+    def _sync(self) -> None:
+        """Move decompressor to the current position, jumping to a restart point of the folder when it helps."""
+        target = self._offset + self._pos
+        if self._decoded > self._pos or self._folder_decoded < target:
+            position = self._reader.tell()
+            point = self._restart_point(target)
+            if self._decoded > self._pos or point[0] > self._folder_decoded:
+                self._reset(point)
+            else:
+                self._reader.seek(position)
+        while self._folder_decoded < self._offset:
+            self._decompress(min(self._offset - self._folder_decoded, self._blocksize))
+        while self._decoded < self._pos:
+            self._update(self._decompress(min(self._pos - self._decoded, self._blocksize)))
+
+    def _decompress(self, size: int) -> bytes | memoryview:
+        assert self._decompressor is not None
+        empty_reads = 0
+        while True:
+            data = self._decompressor.decompress(self._reader, size)
+            if len(data) > 0:
+                self._folder_decoded += len(data)
+                return data
+            if self._decompressor.consumed >= self._decompressor.input_size:
+                empty_reads += 1
+                if empty_reads > self._MAX_EMPTY_READS:
+                    raise DecompressionError(f"Unexpected end of data while reading {self._member.filename}")
+
+    def _update(self, data: bytes | memoryview) -> None:
+        self._crc = calculate_crc32(data, self._crc)
+        self._decoded += len(data)
+        if (
+            self._decoded == self._size
+            and self._crc_valid
+            and self._member.crc32 is not None
+            and self._crc != self._member.crc32
+        ):
+            raise CrcError(self._member.crc32, self._crc, self._member.filename)
+
+
 # ------------------
 # Exported Classes
 # ------------------
@@ -356,6 +591,22 @@ class FileInfo:
             )
 
 
+# size of the header, and flags (bit 0: the header is encrypted), before the decoded header data
+_HEADER_DUMP_FORMAT = "<QB"
+_HEADER_DUMP_SIZE = struct.calcsize(_HEADER_DUMP_FORMAT)
+
+
+@dataclass(frozen=True)
+class ArchiveSnapshot:
+    """Parsed header and members of an archive on disk, without open files, codec objects and passwords.
+    It is picklable, and ``SevenZipFile(snapshot.filename, snapshot=snapshot)`` reopens the archive without
+    reading and parsing its header."""
+
+    filename: str
+    key: tuple
+    header: bytes
+
+
 class SevenZipFile(contextlib.AbstractContextManager):
     """The SevenZipFile Class provides an interface to 7z archives."""
 
@@ -369,16 +620,38 @@ class SevenZipFile(contextlib.AbstractContextManager):
         password: str | None = None,
         header_encryption: bool = False,
         blocksize: int | None = None,
+        solid: bool = True,
+        solid_block_size: int | None = None,
+        solid_block_files: int | None = None,
         mp: bool = False,
         max_extract_size: int | None = None,
+        folder_cache: FolderCache | None = None,
+        use_mmap: bool = False,
+        header_cache: HeaderCache | None = None,
+        snapshot: ArchiveSnapshot | None = None,
     ) -> None:
         # check invalid mode.
         if mode not in ("r", "w", "x", "a"):
             raise ValueError("SevenZipFile requires mode 'r', 'w', 'x', or 'a'")
+        if solid_block_size is not None and solid_block_size <= 0:
+            raise ValueError("solid_block_size should be a positive number")
+        if solid_block_files is not None and solid_block_files <= 0:
+            raise ValueError("solid_block_files should be a positive number")
         self.fp: IO[bytes]
+        self._fp_lock = Lock()
+        self._name_index: NameIndex | None = None
         self.mp = mp
+        self.solid = solid
+        self.solid_block_size = solid_block_size
+        self.solid_block_files = solid_block_files if solid else 1
+        # files are compressed into several folders, one per solid block, in parallel.
+        self._multi_block = self.solid_block_size is not None or self.solid_block_files is not None
         self.password_protected = password is not None
         self.max_extract_size = max_extract_size
+        self.folder_cache = folder_cache
+        self.header_cache = header_cache
+        self._cache_token: Any = None
+        self._mmap: mmap.mmap | None = None
         if blocksize:
             self._block_size = blocksize
         else:
@@ -429,7 +702,9 @@ class SevenZipFile(contextlib.AbstractContextManager):
         self.header_encryption = header_encryption
         try:
             if mode == "r":
-                self._real_get_contents(password)
+                if use_mmap:
+                    self._map_file()
+                self._real_get_contents(password, snapshot)
                 self.fp.seek(self.afterheader)  # seek into start of payload and prepare worker to extract
                 self.worker = Worker(self.files, self.afterheader, self.header, self.mp)
             elif mode == "w":
@@ -450,7 +725,6 @@ class SevenZipFile(contextlib.AbstractContextManager):
             self._fpclose()
             raise e
         self.dereference = dereference
-        self.reporterd: Thread | None = None
         self.q: queue.Queue[Any] = queue.Queue()
 
     def __enter__(self):
@@ -460,24 +734,84 @@ class SevenZipFile(contextlib.AbstractContextManager):
         self.close()
 
     def _fpclose(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # a view is still alive; unmapped when it is released.
+            self._mmap = None
         if not self._filePassed:
             self.fp.close()
 
-    def _real_get_contents(self, password) -> None:
+    def _map_file(self) -> None:
+        # Fall back to read the file when it cannot be mapped, such as an empty file or a pipe.
+        try:
+            self._mmap = mmap.mmap(self.fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, RuntimeError, ValueError):
+            self._mmap = None
+
+    @contextlib.contextmanager
+    def _payload_reader(self):
+        """Yield a reader of the memory mapped archive, or the archive file when it is not mapped,
+        positioned at the start of payload. Readers have their own positions, so they never move
+        the position of the archive file. Worker processes reopen the archive by its name,
+        so they are given a reader of the archive file."""
+        source = self.fp if self._mmap is None or self.mp else self._mmap
+        with PositionedReader(source, self._fp_lock) as reader:
+            reader.seek(self.afterheader)
+            yield reader
+
+    def _can_parallel(self) -> bool:
+        # Threads read folders through positioned readers sharing self.fp,
+        # while worker processes need to reopen the archive by its name.
+        return not (self.mp and self._filePassed)
+
+    def _get_cache_token(self) -> Any:
+        # Identify the archive file in the folder cache by its identity, size and modification time,
+        # or only by this object when it is not a file on disk.
+        if self._cache_token is None:
+            try:
+                st = os.fstat(self.fp.fileno())
+                self._cache_token = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            except (AttributeError, OSError, RuntimeError, ValueError):
+                self._cache_token = object()
+        return self._cache_token
+
+    def _real_get_contents(self, password, snapshot: ArchiveSnapshot | None = None) -> None:
         if not self._check_7zfile(self.fp):
             raise Bad7zFile("not a 7z file")
         self.sig_header = SignatureHeader.retrieve(self.fp)  # type: ignore[arg-type]
         self.afterheader: int = self.fp.tell()
-        self.fp.seek(self.sig_header.nextheaderofs, os.SEEK_CUR)
+        header_key = self._get_header_key()
+        if header_key is not None:
+            if snapshot is not None and snapshot.key == header_key:
+                if self._load_snapshot(snapshot.header, password):
+                    return
+            if self.header_cache is not None:
+                data = self.header_cache.get(header_key)
+                if data is not None:
+                    if self._load_header(data, password):
+                        return
+                    self.header_cache.remove(header_key)
+        header, data = self._read_header(password)
+        self._set_header(header, password)
+        if header_key is not None and self.header_cache is not None and not header.encrypted:
+            self.header_cache.put(header_key, self._dump_header(header, data))
+
+    def _read_header(self, password: str | None) -> tuple[Header, bytes]:
+        """Read the header, and return it with its decoded data."""
+        self.fp.seek(self.afterheader + self.sig_header.nextheaderofs)
         buffer = io.BytesIO(self.fp.read(self.sig_header.nextheadersize))
         if self.sig_header.nextheadercrc != calculate_crc32(buffer.getvalue()):
             raise Bad7zFile("invalid header data")
-        header = Header.retrieve(self.fp, buffer, self.afterheader, password)  # type: ignore[arg-type]
-        if header is None:
-            return
+        header, data = Header.retrieve_decoded(self.fp, buffer, self.afterheader, password)  # type: ignore[arg-type]
         header.size += 32 + self.sig_header.nextheadersize
-        self.header = header
         buffer.close()
+        return header, data
+
+    def _set_header(self, header, password: str | None) -> None:
+        """Set up members from the header."""
+        self.header = header
         self.files = ArchiveFileList()
         if getattr(self.header, "files_info", None) is None:
             return
@@ -503,9 +837,20 @@ class SevenZipFile(contextlib.AbstractContextManager):
         pstat = self.ParseStatus()
         pstat.src_pos = self.afterheader
         file_in_solid = 0
-
-        for file_id, file_info in enumerate(self.header.files_info.files):
-            if not file_info["emptystream"] and folders is not None:
+        files = self.header.files_info.files
+        numfiles = len(files)
+        emptystreams = files.get_values("emptystream")
+        file_folders: list[Folder | None] = [None] * numfiles
+        maxsizes: list[int | None] = [0] * numfiles
+        compressed_sizes: list[int | None] = [0] * numfiles
+        uncompressed_sizes: list[int] = [0] * numfiles
+        file_packsizes: list[list[int]] = [[0]] * numfiles
+        digest_rows = array.array("Q")
+        digests: list[int] = []
+        folder_rows: dict[int, array.array] = {}
+
+        for file_id in range(numfiles):
+            if not emptystreams[file_id] and folders is not None:
                 folder = folders[pstat.folder]
                 numinstreams = max([coder.get("numinstreams", 1) for coder in folder.coders])
                 maxsize, compressed, uncompressed, packsize, solid = self._get_fileinfo_sizes(
@@ -513,55 +858,108 @@ class SevenZipFile(contextlib.AbstractContextManager):
                 )
                 pstat.input += 1
                 folder.solid = solid
-                file_info["folder"] = folder
-                file_info["maxsize"] = maxsize
-                file_info["compressed"] = compressed
-                file_info["uncompressed"] = uncompressed
-                file_info["packsizes"] = packsize
+                file_folders[file_id] = folder
+                maxsizes[file_id] = maxsize
+                compressed_sizes[file_id] = compressed
+                uncompressed_sizes[file_id] = uncompressed
+                file_packsizes[file_id] = packsize
                 if subinfo.digestsdefined[pstat.outstreams]:
-                    file_info["digest"] = subinfo.digests[pstat.outstreams]
+                    digest_rows.append(file_id)
+                    digests.append(subinfo.digests[pstat.outstreams])
                 if folder is None:
-                    pstat.src_pos += file_info["compressed"]
+                    pstat.src_pos += compressed
                 else:
                     if folder.solid:
                         file_in_solid += 1
                     pstat.outstreams += 1
-                    if folder.files is None:
-                        folder.files = ArchiveFileList(offset=file_id)
-                    folder.files.append(file_info)
+                    folder_rows.setdefault(pstat.folder, array.array("Q")).append(file_id)
                     if pstat.input >= subinfo.num_unpackstreams_folders[pstat.folder]:
                         file_in_solid = 0
                         pstat.src_pos += sum(packinfo.packsizes[pstat.stream : pstat.stream + numinstreams])
                         pstat.folder += 1
                         pstat.stream += numinstreams
                         pstat.input = 0
+
+        if folders is not None:
+            files.set_folders(folders)
+        files.set_values("folder", file_folders)
+        files.set_values("maxsize", maxsizes)
+        files.set_values("compressed", compressed_sizes)
+        files.set_values("uncompressed", uncompressed_sizes)
+        files.set_values("packsizes", file_packsizes)
+        files.set_values("digest", digests, digest_rows)
+        for file_id in files.rows_without("filename"):
+            # compressed file is stored without a name, generate one
+            try:
+                basefilename = self.filename
+            except AttributeError:
+                # 7z archive file doesn't have a name
+                files[file_id]["filename"] = "contents"
             else:
-                file_info["folder"] = None
-                file_info["maxsize"] = 0
-                file_info["compressed"] = 0
-                file_info["uncompressed"] = 0
-                file_info["packsizes"] = [0]
-
-            if "filename" not in file_info:
-                # compressed file is stored without a name, generate one
-                try:
-                    basefilename = self.filename
-                except AttributeError:
-                    # 7z archive file doesn't have a name
-                    file_info["filename"] = "contents"
+                if basefilename is not None:
+                    fn, ext = os.path.splitext(os.path.basename(basefilename))
+                    files[file_id]["filename"] = fn
                 else:
-                    if basefilename is not None:
-                        fn, ext = os.path.splitext(os.path.basename(basefilename))
-                        file_info["filename"] = fn
-                    else:
-                        file_info["filename"] = "contents"
-            self.files.append(file_info)
+                    files[file_id]["filename"] = "contents"
+        for index, folder_files in folder_rows.items():
+            rows: collections.abc.Sequence[int] = folder_files
+            if rows[-1] - rows[0] + 1 == len(rows):
+                rows = range(rows[0], rows[-1] + 1)
+            folders[index].files = ArchiveFileList(offset=rows[0], files_list=FilesTableView(files, rows))
+        self.files = ArchiveFileList(files_list=FilesTableView(files, range(len(files))))
+        self._check_password_protected()
+
+    def _check_password_protected(self) -> None:
         if not self.password_protected and self.header.main_streams is not None:
             # Check specified coders have a crypt method or not.
             self.password_protected = any(
                 [SupportedMethods.needs_password(folder.coders) for folder in self.header.main_streams.unpackinfo.folders]
             )
 
+    def _get_header_key(self) -> tuple | None:
+        # Identify a header by the archive file, its size and modification time, and the location and CRC
+        # of the header. Only archives on disk opened for reading are cached or restored from a snapshot.
+        if self.mode != "r":
+            return None
+        token = self._get_cache_token()
+        if not isinstance(token, tuple):
+            return None
+        sig_header = self.sig_header
+        return (__version__, token, sig_header.nextheaderofs, sig_header.nextheadersize, sig_header.nextheadercrc)
+
+    def _load_header(self, data: bytes, password: str | None) -> bool:
+        """Set up members from data dumped by _dump_header(). The decoded header is parsed again,
+        as the header of the archive is, so data from a cache never runs code."""
+        try:
+            size, flags = struct.unpack_from(_HEADER_DUMP_FORMAT, data)
+            header = Header.from_decoded(data[_HEADER_DUMP_SIZE:], self.afterheader, size, encrypted=bool(flags & 1))
+            self._set_header(header, password)
+        except Exception:
+            # such as a truncated or corrupted cache entry
+            return False
+        return True
+
+    def _load_snapshot(self, data: bytes, password: str | None) -> bool:
+        """Restore the header and members pickled by snapshot(). Unlike entries of a header cache,
+        a snapshot is handed over by the application itself, so the parsed objects are unpickled."""
+        try:
+            header, files = pickle.loads(data)
+        except Exception:
+            # such as a snapshot taken by an incompatible version
+            return False
+        self.header = header
+        self.files = files
+        if header.main_streams is not None:
+            # passwords are never pickled
+            for folder in header.main_streams.unpackinfo.folders:
+                folder.password = password
+        self._check_password_protected()
+        return True
+
+    @staticmethod
+    def _dump_header(header: Header, data: bytes) -> bytes:
+        return struct.pack(_HEADER_DUMP_FORMAT, header.size, 1 if header.encrypted else 0) + data
+
     def _extract(
         self,
         path: Any | None = None,
@@ -570,13 +968,34 @@ class SevenZipFile(contextlib.AbstractContextManager):
         recursive: bool | None = False,
         writer_factory: WriterFactory | None = None,
     ) -> None:
-        if callback is None:
-            pass
-        elif isinstance(callback, ExtractCallback):
-            self.reporterd = Thread(target=self.reporter, args=(callback,), daemon=True)
-            self.reporterd.start()
-        else:
+        if callback is not None and not isinstance(callback, ExtractCallback):
             raise ValueError("Callback specified is not an instance of subclass of py7zr.callbacks.ExtractCallback class")
+        # Each extraction has its own worker, progress queue and reader of the archive,
+        # so several threads can extract from this archive at once.
+        worker = Worker(self.files, self.afterheader, self.header, self.mp)
+        q: queue.Queue | None = None
+        reporterd: Thread | None = None
+        if callback is not None:
+            q = queue.Queue()
+            reporterd = Thread(target=self.reporter, args=(callback, q), daemon=True)
+            reporterd.start()
+        try:
+            self._extract_members(worker, path, targets, recursive, writer_factory, q)
+        finally:
+            if reporterd is not None:
+                assert q is not None
+                q.put(None)
+                reporterd.join()
+
+    def _extract_members(
+        self,
+        worker: Worker,
+        path: Any | None,
+        targets: Collection[str] | None,
+        recursive: bool | None,
+        writer_factory: WriterFactory | None,
+        q: queue.Queue | None,
+    ) -> None:
         target_files: list[tuple[pathlib.Path, FileInfoDict]] = []
         target_dirs: list[pathlib.Path] = []
         if path is not None:
@@ -592,21 +1011,19 @@ class SevenZipFile(contextlib.AbstractContextManager):
                     pass
                 else:
                     raise e
+        members: Iterable[ArchiveFile] = self.files
         if targets is not None:
-            # faster lookups
-            targets = set(targets)
+            # resolve targets by the name index, and leave other members unregistered
+            index = self._get_name_index()
+            lookup = index.prefixed if recursive else index.find
+            selected: set[int] = set()
+            for target in set(targets):
+                selected.update(lookup(target))
+            members = [self.files[i] for i in sorted(selected)]
         fnames: dict[str, int] = {}  # check duplicated filename in one archive?
-        self.q.put(("pre", None, None))
-        for f in self.files:
-            if targets is not None and recursive is False:
-                if f.filename not in targets:
-                    self.worker.register_filelike(f.id, None)
-                    continue
-            elif targets is not None and recursive is True:
-                if f.filename not in targets and not any([f.filename.startswith(target) for target in targets]):
-                    self.worker.register_filelike(f.id, None)
-                    continue
-
+        if q is not None:
+            q.put(("pre", None, None))
+        for f in members:
             # When archive has a multiple files which have same name
             # To guarantee order of archive, multi-thread decompression becomes off.
             # Currently always overwrite by latter archives.
@@ -627,7 +1044,7 @@ class SevenZipFile(contextlib.AbstractContextManager):
                     pass
                 else:
                     fname = outfilename.as_posix()
-                    self.worker.register_filelike(f.id, MemIO(fname, writer_factory))
+                    worker.register_filelike(f.id, MemIO(fname, writer_factory))
             elif f.is_directory:
                 if not outfilename.exists():
                     target_dirs.append(outfilename)
@@ -637,9 +1054,9 @@ class SevenZipFile(contextlib.AbstractContextManager):
             elif f.is_socket:
                 pass  # TODO: implement me.
             elif f.is_symlink or f.is_junction:
-                self.worker.register_filelike(f.id, outfilename)
+                worker.register_filelike(f.id, outfilename)
             else:
-                self.worker.register_filelike(f.id, outfilename)
+                worker.register_filelike(f.id, outfilename)
                 target_files.append((outfilename, f.file_properties()))
         for target_dir in sorted(target_dirs):
             try:
@@ -652,22 +1069,15 @@ class SevenZipFile(contextlib.AbstractContextManager):
                 else:
                     raise DecompressionError(f"Directory {target_dir} making fails on unknown condition.")
 
-        self.worker.max_extract_size = self.max_extract_size
-        if callback is not None:
-            self.worker.extract(
-                self.fp,
-                path,
-                parallel=(not self.password_protected and not self._filePassed),
-                q=self.q,
-            )
-        else:
-            self.worker.extract(
-                self.fp,
-                path,
-                parallel=(not self.password_protected and not self._filePassed),
-            )
+        worker.max_extract_size = self.max_extract_size
+        if self.folder_cache is not None:
+            worker.folder_cache = self.folder_cache
+            worker.cache_token = self._get_cache_token()
+        with self._payload_reader() as fp:
+            worker.extract(fp, path, parallel=self._can_parallel(), q=q)
 
-        self.q.put(("post", None, None))
+        if q is not None:
+            q.put(("post", None, None))
         # early return when dict specified
         if writer_factory is not None:
             return
@@ -706,6 +1116,7 @@ class SevenZipFile(contextlib.AbstractContextManager):
             pos = self.afterheader
         self.fp.seek(pos)
         self.worker = Worker(self.files, pos, self.header, self.mp)
+        self._set_solid_blocks()
 
     def _prepare_write(self, filters, password):
         if password is not None and filters is None:
@@ -719,10 +1130,17 @@ class SevenZipFile(contextlib.AbstractContextManager):
         self.header = Header.build_header(filters, password)
         self.fp.seek(self.afterheader)
         self.worker = Worker(self.files, self.afterheader, self.header, self.mp)
+        self._set_solid_blocks()
+
+    def _set_solid_blocks(self) -> None:
+        self.worker.solid_block_size = self.solid_block_size
+        self.worker.solid_block_files = self.solid_block_files
 
     def _write_flush(self):
         if self.header is not None:
-            if self.header._initialized:
+            if self._multi_block:
+                self.worker.flush_folders(self.fp)
+            elif self.header._initialized:
                 folder = self.header.main_streams.unpackinfo.folders[-1]
                 self.worker.flush_archive(self.fp, folder)
             self._write_header()
@@ -825,13 +1243,17 @@ class SevenZipFile(contextlib.AbstractContextManager):
             raise UnsupportedCompressionMethodError(self.header.main_streams.unpackinfo.folders, "Unknown method")
 
     def _read_digest(self, pos: int, size: int) -> int:
-        self.fp.seek(pos)
+        if self._mmap is not None:
+            with memoryview(self._mmap) as view, view[pos : pos + size] as data:
+                return calculate_crc32(data, 0, self._block_size)
         remaining_size = size
         digest = 0
-        while remaining_size > 0:
-            block = min(self._block_size, remaining_size)
-            digest = calculate_crc32(self.fp.read(block), digest)
-            remaining_size -= block
+        with PositionedReader(self.fp, self._fp_lock) as reader:
+            reader.seek(pos)
+            while remaining_size > 0:
+                block = min(self._block_size, remaining_size)
+                digest = calculate_crc32(reader.read(block), digest)
+                remaining_size -= block
         return digest
 
     def _is_solid(self):
@@ -932,22 +1354,70 @@ class SevenZipFile(contextlib.AbstractContextManager):
 
     def namelist(self) -> list[str]:
         """Return a list of archive members by name."""
+        if isinstance(self.files.files_list, FilesTableView):
+            return self.files.files_list.get_values("filename")
         return list(x.filename for x in self.files)
 
+    def select(self, pattern: str | None = None, predicate: Callable[[str], bool] | None = None) -> list[str]:
+        """Return names of archive members which match a glob *pattern*, as :func:`fnmatch.fnmatchcase` does
+        and where ``*`` also matches ``/``, and for which *predicate* returns True. Names are in archive order,
+        without duplicates, and can be given to :meth:`extract()` as targets."""
+        index = self._get_name_index()
+        indices = index.match(pattern) if pattern is not None else range(len(index))
+        names = index.names
+        result = [names[i] for i in indices if predicate is None or predicate(names[i])]
+        return list(dict.fromkeys(result))
+
+    def _get_name_index(self) -> NameIndex:
+        # members are only appended, so an index of all of them is still valid
+        if self._name_index is None or len(self._name_index) != len(self.files):
+            self._name_index = NameIndex(self.namelist())
+        return self._name_index
+
     def getinfo(self, name: str) -> FileInfo:
         """Return a :class:`FileInfo` object with information about the archive member *name*.
         Calling :meth:`getinfo()` for a name not currently contained in the archive will raise a :exc:`KeyError`."""
         # For interoperability with ZipFile
         name = remove_trailing_slash(name)
 
-        try:
-            sevenzipinfo = next(member for member in self.list() if member.filename == name)
-        except StopIteration:
+        index = self._get_name_index().get(name)
+        if index is None:
             # ZipFile and TarFile raise KeyError if the named member is not found
             # So for consistency, we'll also raise KeyError here
-            raise KeyError(f"'{name}' not found in archive.") from None
-
-        return sevenzipinfo
+            raise KeyError(f"'{name}' not found in archive.")
+        member = self.files[index]
+        lastmodified = filetime_to_dt(member.lastwritetime) if member.lastwritetime is not None else None
+        return self._make_fileinfo(member, lastmodified)
+
+    def open(self, name: str) -> ArchiveFileReader:
+        """Return a readable and seekable binary stream of the archive member *name*.
+        Member data is decompressed lazily as it is read, and several members can be opened
+        at once. Calling :meth:`open()` for a name not contained in the archive will raise a :exc:`KeyError`."""
+        if self.mode != "r":
+            raise ValueError("open() requires mode 'r'")
+        name = remove_trailing_slash(name)
+        index = self._get_name_index().get(name)
+        if index is None:
+            raise KeyError(f"'{name}' not found in archive.")
+        member = self.files[index]
+        reader = PositionedReader(self.fp if self._mmap is None else self._mmap, self._fp_lock)
+        folder = member.folder
+        if folder is None or member.emptystream:
+            return ArchiveFileReader(reader, member, 0, 0, 0, self._block_size)
+        index = self.header.main_streams.unpackinfo.folders.index(folder)
+        positions = self.header.main_streams.packinfo.packpositions
+        files = folder.files
+        assert files is not None
+        # members of the folder before this one
+        offset = sum(files.files_list[i]["uncompressed"] for i in range(member.id - files.offset))
+        return ArchiveFileReader(
+            reader,
+            member,
+            offset,
+            self.afterheader + positions[index],
+            positions[index + 1] - positions[index],
+            self._block_size,
+        )
 
     def archiveinfo(self) -> ArchiveInfo:
         total_uncompressed = functools.reduce(lambda x, y: x + y, [f.uncompressed for f in self.files])
@@ -971,6 +1441,16 @@ class SevenZipFile(contextlib.AbstractContextManager):
     def needs_password(self) -> bool:
         return self.password_protected
 
+    def snapshot(self) -> ArchiveSnapshot:
+        """Return a picklable snapshot of the parsed header and members, to reopen the archive in other
+        processes without reading and parsing the header again. Only archives on disk opened for reading are supported.
+        A snapshot does not hold the password, but holds names of members even when the header is encrypted."""
+        key = self._get_header_key()
+        if key is None or self.filename is None:
+            raise ValueError("snapshot() requires an archive file on disk opened with mode 'r'")
+        data = pickle.dumps((self.header, self.files), protocol=pickle.HIGHEST_PROTOCOL)
+        return ArchiveSnapshot(os.path.abspath(self.filename), key, data)
+
     def list(self) -> list[FileInfo]:
         """Returns contents information"""
         alist: list[FileInfo] = []
@@ -978,21 +1458,23 @@ class SevenZipFile(contextlib.AbstractContextManager):
         for f in self.files:
             if f.lastwritetime is not None:
                 lastmodified = filetime_to_dt(f.lastwritetime)
-            alist.append(
-                FileInfo(
-                    filename=f.filename,
-                    compressed=f.compressed,
-                    uncompressed=f.uncompressed,
-                    archivable=f.archivable,
-                    is_file=f.is_file,
-                    is_directory=f.is_directory,
-                    is_symlink=f.is_symlink,
-                    creationtime=lastmodified,
-                    crc32=f.crc32,
-                )
-            )
+            alist.append(self._make_fileinfo(f, lastmodified))
         return alist
 
+    @staticmethod
+    def _make_fileinfo(f: ArchiveFile, lastmodified: datetime.datetime | None) -> FileInfo:
+        return FileInfo(
+            filename=f.filename,
+            compressed=f.compressed,
+            uncompressed=f.uncompressed,
+            archivable=f.archivable,
+            is_file=f.is_file,
+            is_directory=f.is_directory,
+            is_symlink=f.is_symlink,
+            creationtime=lastmodified,
+            crc32=f.crc32,
+        )
+
     def extractall(
         self,
         path: Any | None = None,
@@ -1024,10 +1506,12 @@ class SevenZipFile(contextlib.AbstractContextManager):
             targets = [remove_trailing_slash(target) for target in targets]
         self._extract(path, targets, recursive=recursive, callback=callback, writer_factory=factory)
 
-    def reporter(self, callback: ExtractCallback) -> None:
+    def reporter(self, callback: ExtractCallback, q: queue.Queue | None = None) -> None:
+        if q is None:
+            q = self.q
         while True:
             try:
-                item: tuple[str, str, str] | None = self.q.get(timeout=1)
+                item: tuple[str, str, str] | None = q.get(timeout=1)
             except queue.Empty:
                 pass
             else:
@@ -1047,7 +1531,7 @@ class SevenZipFile(contextlib.AbstractContextManager):
                     callback.report_warning(item[1])
                 else:
                     pass
-                self.q.task_done()
+                q.task_done()
 
     def writeall(
         self,
@@ -1080,12 +1564,8 @@ class SevenZipFile(contextlib.AbstractContextManager):
             path = pathlib.Path(file)
         else:
             path = file
-        folder = self.header.initialize()
         file_info = self._make_file_info(path, arcname, self.dereference)
-        self.header.files_info.files.append(file_info)
-        self.header.files_info.emptyfiles.append(file_info["emptystream"])
-        self.files.append(file_info)
-        self.worker.archive(self.fp, self.files, folder, deref=self.dereference)
+        self._archive(file_info, deref=self.dereference)
 
     def writef(self, bio: IO[Any], arcname: str) -> None:
         if not check_archive_path(arcname):
@@ -1114,18 +1594,29 @@ class SevenZipFile(contextlib.AbstractContextManager):
         else:
             raise ValueError("Wrong argument passed for argument bio.")
         if size >= 0:
-            folder = self.header.initialize()
             file_info = self._make_file_info_from_name(bio, size, arcname)
-            self.header.files_info.files.append(file_info)
-            self.header.files_info.emptyfiles.append(file_info["emptystream"])
-            self.files.append(file_info)
-            self.worker.archive(self.fp, self.files, folder, deref=False)
+            self._archive(file_info, deref=False)
         else:
             file_info = self._make_file_info_from_name(bio, size, arcname)
             self.header.files_info.files.append(file_info)
             self.header.files_info.emptyfiles.append(file_info["emptystream"])
             self.files.append(file_info)
 
+    def _archive(self, file_info: FileInfoDict, deref: bool) -> None:
+        """Add a member to the header, and compress it into the solid folder or into a solid block.
+        Data of the member is read before returning."""
+        if self._multi_block:
+            self.header.initialize_files()
+        else:
+            folder = self.header.initialize()
+        self.header.files_info.files.append(file_info)
+        self.header.files_info.emptyfiles.append(file_info["emptystream"])
+        self.files.append(file_info)
+        if self._multi_block:
+            self.worker.archive_folder(self.fp, self.files, deref=deref)
+        else:
+            self.worker.archive(self.fp, self.files, folder, deref=deref)
+
     def writestr(
         self,
         data: str | bytes | bytearray | memoryview,
@@ -1153,14 +1644,7 @@ class SevenZipFile(contextlib.AbstractContextManager):
         """Flush all the data into archive and close it.
         When close py7zr start reading target and writing actual archive file.
         """
-        if "r" in self.mode:
-            if self.reporterd is not None:
-                self.q.put_nowait(None)
-                self.reporterd.join(1)
-                if self.reporterd.is_alive():
-                    raise InternalError("Progress report thread terminate error.")
-                self.reporterd = None
-        else:  # "w" | "x" | "a" in self.mode
+        if "r" not in self.mode:  # "w" | "x" | "a" in self.mode
             self._write_flush()
 
         self._fpclose()
@@ -1168,7 +1652,8 @@ class SevenZipFile(contextlib.AbstractContextManager):
 
     def reset(self) -> None:
         """
-        When read mode, it reset file pointer, decompress worker and decompressor
+        When read mode, it reset file pointer, decompress worker and decompressor.
+        Extraction no longer needs it, as each extraction has its own worker and decompressors.
         """
         if self.mode == "r":
             self.fp.seek(self.afterheader)
@@ -1178,8 +1663,6 @@ class SevenZipFile(contextlib.AbstractContextManager):
                     folder.decompressor = None
 
     def test(self) -> bool | None:
-        self.fp.seek(self.afterheader)
-        self.worker = Worker(self.files, self.afterheader, self.header, self.mp)
         crcs: list[int] | None = self.header.main_streams.packinfo.crcs
         if crcs is None or len(crcs) == 0:
             return None
@@ -1196,14 +1679,12 @@ class SevenZipFile(contextlib.AbstractContextManager):
         return True
 
     def testzip(self) -> str | None:
-        self.fp.seek(self.afterheader)
-        self.worker = Worker(self.files, self.afterheader, self.header, self.mp)
+        worker = Worker(self.files, self.afterheader, self.header, self.mp)
         for f in self.files:
-            self.worker.register_filelike(f.id, None)
+            worker.register_filelike(f.id, None)
         try:
-            self.worker.extract(
-                self.fp, None, parallel=(not self.password_protected), skip_notarget=False
-            )  # TODO: print progress
+            with self._payload_reader() as fp:
+                worker.extract(fp, None, parallel=self._can_parallel(), skip_notarget=False)  # TODO: print progress
         except CrcError as crce:
             return crce.args[2]
         else:
@@ -1242,7 +1723,7 @@ def unpack_7zarchive(archive, path, extra=None):
     Function for registering with shutil.register_unpack_format().
     """
     if not is_7zfile(archive):
-        raise ReadError(f"{archive} is not a 7zip file.")
+        raise shutil.ReadError(f"{archive} is not a 7zip file.")
     with SevenZipFile(archive) as arc:
         arc.extractall(path)
 
@@ -1257,6 +1738,84 @@ def pack_7zarchive(base_name, base_dir, owner=None, group=None, dry_run=None, lo
     return target_name
 
 
+_process_pool: concurrent.futures.ProcessPoolExecutor | None = None
+_process_pool_lock = Lock()
+
+
+def _get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Return a process pool shared by all archives, to reuse worker processes.
+    The pool is shut down at exit of the interpreter."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=max(1, os.cpu_count() or 1))
+            atexit.register(_shutdown_process_pool)
+        return _process_pool
+
+
+def _shutdown_process_pool() -> None:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
+
+def _picklable_file_info(file_info: FileInfoDict) -> FileInfoDict:
+    """Return a copy of member properties without its folder, which a worker process makes again."""
+    return cast(FileInfoDict, {k: v for k, v in file_info.items() if k != "folder"})
+
+
+@dataclass(frozen=True)
+class _FolderTask:
+    """A folder to extract in a worker process of the process pool.
+    It holds the archive name, folder descriptor, members and output paths, but no open file or codec object."""
+
+    filename: str
+    coders: list[dict[str, Any]]
+    unpacksizes: list[int]
+    crc: int | None
+    password: str | None
+    offset: int
+    files_info: list[FileInfoDict]
+    targets: dict[int, MemIO | pathlib.Path | None]
+    path: pathlib.Path | None
+    src_start: int
+    src_end: int
+    max_extract_size: int | None
+    report: bool
+    skip_notarget: bool
+
+
+def _extract_folder(task: _FolderTask) -> tuple[int, list[tuple[str, str | None, str | None]]]:
+    """Extract a single 7zip folder in a worker process of the process pool.
+
+    :returns: extracted size accounted against max_extract_size, and progress events.
+    """
+    folder = Folder()
+    folder.coders = task.coders
+    folder.unpacksizes = task.unpacksizes
+    folder.crc = task.crc
+    folder.password = task.password
+    files = ArchiveFileList(offset=task.offset)
+    for file_info in task.files_info:
+        file_info["folder"] = folder
+        files.append(file_info)
+    folder.files = files
+    worker = Worker(files, task.src_start, None)
+    worker.target_filepath.update(task.targets)
+    worker.max_extract_size = task.max_extract_size
+    events: queue.Queue | None = queue.Queue() if task.report else None
+    with open(task.filename, "rb") as fp:
+        fp.seek(task.src_start)
+        worker._extract_single(fp, files, task.path, task.src_end, events, task.skip_notarget)
+    reported = []
+    if events is not None:
+        while not events.empty():
+            reported.append(events.get_nowait())
+    return worker._total_extracted, reported
+
+
 class Worker:
     """
     Extract worker class to invoke handler.
@@ -1271,10 +1830,29 @@ class Worker:
         self.last_file_index = len(self.files) - 1
         self.max_extract_size: int | None = None
         self._total_extracted: int = 0
-        if mp:
-            self.concurrent: type[Thread] | type[Process] = Process
-        else:
-            self.concurrent = Thread
+        self._total_lock = Lock()  # for threads extracting folders in parallel
+        self.mp = mp
+        self.concurrent: type[Thread] = Thread
+        self.folder_cache: FolderCache | None = None
+        self.cache_token: Any = None
+        self.overlap_size = 4 * get_default_blocksize()
+        # LZMA2 and Zstandard streams are decoded in parallel by segments of segment_size bytes at least,
+        # holding decoded segments up to segment_memory bytes.
+        self.segment_size = 1 << 20
+        self.segment_memory = 256 << 20
+        # decompressors of folders in this extraction, which are not shared with other workers.
+        self.decompressors: dict[Folder, SevenZipDecompressor | CachingDecompressor] = {}
+        # folders compressed in parallel when writing archives of several solid blocks.
+        self.solid_block_size: int | None = None
+        self.solid_block_files: int | None = None
+        # members of the current solid block, by file index and size of their data in block_spool
+        self.block: list[tuple[int, int]] = []
+        self.block_spool: tempfile.SpooledTemporaryFile | None = None
+        self.block_size = 0
+        self.max_workers = max(1, os.cpu_count() or 1)
+        self.spool_size = 4 * get_default_blocksize()
+        self.executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self.pending_folders: collections.deque = collections.deque()
 
     def extract(
         self,
@@ -1318,48 +1896,138 @@ class Worker:
                             skip_notarget=skip_notarget,
                         )
                 else:
-                    if getattr(fp, "name", None) is None:
-                        raise InternalError("Caught unknown variable status error")
-                    filename: str = getattr(fp, "name", "")  # do not become "" but it is for type check.
-                    self.extract_single(open(filename, "rb"), empty_files, path, 0, 0, q)
-                    concurrent_tasks = []
-                    exc_q: queue.Queue = queue.Queue()
-                    max_workers = max(1, os.cpu_count() or 1)
+                    self.extract_single(fp, empty_files, path, 0, 0, q)
+                    tasks = []
                     for i in range(numfolders):
                         if skip_notarget:
                             if not any([self.target_filepath.get(f.id, None) for f in folders[i].files]):
                                 continue
-                        p = self.concurrent(
-                            target=self.extract_single,
-                            args=(
-                                filename,
-                                folders[i].files,
-                                path,
-                                self.src_start + positions[i],
-                                self.src_start + positions[i + 1],
-                                q,
-                                exc_q,
-                                skip_notarget,
-                            ),
-                        )
-                        p.start()
-                        concurrent_tasks.append(p)
-                        if len(concurrent_tasks) >= max_workers:
-                            concurrent_tasks.pop(0).join()
-                    for p in concurrent_tasks:
-                        p.join()
-                    if exc_q.empty():
-                        pass
+                        tasks.append((folders[i], self.src_start + positions[i], self.src_start + positions[i + 1]))
+                    # start the largest folders first, so small ones can fill idle workers while they run.
+                    tasks.sort(key=lambda task: task[0].get_unpack_size(), reverse=True)
+                    if self.mp and not any(isinstance(t, MemIO) for t in self.target_filepath.values()):
+                        self._extract_processes(fp, tasks, path, q, skip_notarget)
                     else:
-                        exc_info = exc_q.get()
-                        raise exc_info[1].with_traceback(exc_info[2])
+                        self._extract_threads(fp, tasks, path, q, skip_notarget)
         else:
             empty_files = [f for f in self.files if f.emptystream]
             self.extract_single(fp, empty_files, path, 0, 0, q)
 
+    def _extract_threads(self, fp: IO[bytes], tasks, path, q: queue.Queue | None, skip_notarget: bool) -> None:
+        """Extract folders concurrently by a pool of threads sharing a file descriptor through positioned readers.
+        Each thread takes the next folder from the queue whenever it finishes one."""
+        # Readers of threads share the lock of the archive source with other extractions of the archive.
+        reader = fp if isinstance(fp, PositionedReader) else PositionedReader(fp)
+        pending: collections.deque = collections.deque(tasks)
+        exc_q: queue.Queue = queue.Queue()
+        max_workers = max(1, os.cpu_count() or 1)
+        concurrent_tasks = [
+            self.concurrent(
+                target=self._extract_folders,
+                args=(reader, pending, path, q, exc_q, skip_notarget),
+            )
+            for _ in range(min(max_workers, len(pending)))
+        ]
+        for t in concurrent_tasks:
+            t.start()
+        for t in concurrent_tasks:
+            t.join()
+        if exc_q.empty():
+            pass
+        else:
+            exc_info = exc_q.get()
+            raise exc_info[1].with_traceback(exc_info[2])
+
+    def _extract_folders(
+        self,
+        fp: PositionedReader,
+        pending: collections.deque,
+        path,
+        q: queue.Queue | None,
+        exc_q: queue.Queue,
+        skip_notarget: bool,
+    ) -> None:
+        """Thread pool worker; extract folders from the shared queue until it is empty or an error occurred."""
+        while exc_q.empty():
+            try:
+                folder, src_start, src_end = pending.popleft()
+            except IndexError:
+                break
+            with PositionedReader(fp) as reader:
+                self.extract_single(reader, folder.files, path, src_start, src_end, q, exc_q, skip_notarget)
+
+    def _extract_processes(self, fp: IO[bytes], tasks, path, q: queue.Queue | None, skip_notarget: bool) -> None:
+        """Extract folders concurrently by a shared process pool.
+        Child processes cannot share our file object, so they reopen archive by name.
+        Only folder descriptors and output paths are sent to them, and they send back
+        extracted size and progress events, or raise an error."""
+        if getattr(fp, "name", None) is None:
+            raise InternalError("Caught unknown variable status error")
+        filename: str = getattr(fp, "name", "")  # do not become "" but it is for type check.
+        pool = _get_process_pool()
+        futures = []
+        planned = 0
+        for folder, src_start, src_end in tasks:
+            limit = None if self.max_extract_size is None else self.max_extract_size - planned
+            planned += self._planned_size(folder.files, skip_notarget)
+            task = _FolderTask(
+                filename=filename,
+                coders=folder.coders,
+                unpacksizes=folder.unpacksizes,
+                crc=folder.crc,
+                password=folder.password,
+                offset=folder.files.offset,
+                files_info=[_picklable_file_info(f) for f in folder.files.files_list],
+                targets={f.id: self.target_filepath.get(f.id, None) for f in folder.files},
+                path=path,
+                src_start=src_start,
+                src_end=src_end,
+                max_extract_size=limit,
+                report=q is not None,
+                skip_notarget=skip_notarget,
+            )
+            futures.append(pool.submit(_extract_folder, task))
+        error: BaseException | None = None
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    extracted, events = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = e
+                        for f in futures:
+                            f.cancel()
+                    continue
+                self._total_extracted += extracted
+                if q is not None:
+                    for event in events:
+                        q.put(event)
+        finally:
+            # Folders already running are waited for, so that no child writes files after an error is raised.
+            for f in futures:
+                f.cancel()
+            concurrent.futures.wait(futures)
+        if isinstance(error, DecompressionBombError):
+            # a child reports the rest of the limit which is left for its folder.
+            raise DecompressionBombError(
+                f"Extraction aborted: decompressed size exceeds limit of {self.max_extract_size} bytes"
+            ) from error
+        if error is not None:
+            raise error
+
+    def _planned_size(self, files, skip_notarget: bool) -> int:
+        """Return size to decompress from a folder, up to its last target file."""
+        total = 0
+        planned = 0
+        for f in files:
+            total += f.uncompressed
+            if not skip_notarget or self.target_filepath.get(f.id, None) is not None:
+                planned = total
+        return planned
+
     def extract_single(
         self,
-        fp: IO[bytes] | str,
+        fp: IO[bytes] | PositionedReader | str,
         files,
         path,
         src_start: int,
@@ -1377,7 +2045,16 @@ class Worker:
             if isinstance(fp, str):
                 fp = open(fp, "rb")
             fp.seek(src_start)
-            self._extract_single(fp, files, path, src_end, q, skip_notarget)
+            cached = self._cache_folder(files, src_end - src_start)
+            try:
+                self._extract_single(fp, files, path, src_end, q, skip_notarget)
+                if cached is not None:
+                    cached[1].commit()
+            finally:
+                if cached is not None:
+                    folder, recorder = cached
+                    recorder.close()
+                    self.decompressors.pop(folder, None)
         except Exception as e:
             if exc_q is None:
                 raise e
@@ -1385,9 +2062,26 @@ class Worker:
                 exc_tuple = sys.exc_info()
                 exc_q.put(exc_tuple)
 
+    def _cache_folder(self, files, packsize: int) -> tuple[Folder, FolderRecorder] | None:
+        """Let the folder of files decompress through the folder cache, when it is enabled."""
+        if self.folder_cache is None or self.header is None:
+            return None
+        folder = next((f.folder for f in files if f.folder is not None), None)
+        if folder is None or folder in self.decompressors:
+            return None
+        key = (self.cache_token, self.header.main_streams.unpackinfo.folders.index(folder))
+        cached = self.folder_cache.get(key)
+        if cached is None:
+            cached = b""
+        recorder = self.folder_cache.recorder(key, cached)
+        self.decompressors[folder] = CachingDecompressor(
+            folder.coders, packsize, folder.unpacksizes, folder.password, cached, recorder
+        )
+        return folder, recorder
+
     def _extract_single(
         self,
-        fp: IO[bytes],
+        fp: IO[bytes] | PositionedReader,
         files,
         path,
         src_end: int,
@@ -1399,6 +2093,8 @@ class Worker:
         this may raise exception.
         """
         just_check: list[ArchiveFile] = []
+        src_start = fp.tell()
+        position = 0  # position of the file in folder
         for f in files:
             if q is not None:
                 q.put(
@@ -1413,6 +2109,8 @@ class Worker:
                 if not f.emptystream:
                     just_check.append(f)
             else:
+                if skip_notarget and len(just_check) > 0:
+                    just_check = self._skip(fp, just_check, position, src_start, src_end)
                 # delayed execution of crc check.
                 self._check(fp, just_check, src_end)
                 just_check = []
@@ -1462,10 +2160,45 @@ class Worker:
                             pass
             if q is not None:
                 q.put(("e", str(f.filename), str(f.uncompressed)))
+            if not f.emptystream:
+                position += f.uncompressed
         if not skip_notarget:
             # delayed execution of crc check.
             self._check(fp, just_check, src_end)
 
+    def _skip(self, fp, skipped: list[ArchiveFile], position: int, src_start: int, src_end: int) -> list[ArchiveFile]:
+        """
+        Jump over files not to extract to the last restart point of the folder before *position*.
+        Returns files still to be decompressed to reach *position*.
+        """
+        folder = skipped[0].folder
+        if folder is None or isinstance(self.decompressors.get(folder), CachingDecompressor):
+            return skipped
+        if any(f.folder is not folder for f in skipped):
+            return skipped
+        start = position - sum(f.uncompressed for f in skipped)
+        current = fp.tell()
+        fp.seek(src_start)
+        points = folder.get_restart_points(fp, src_end - src_start)
+        candidates = [p for p in points if start < p[0] <= position]
+        if len(candidates) == 0:
+            fp.seek(current)
+            return skipped
+        restart_at = candidates[-1][0]
+        fp.seek(src_start + candidates[-1][1])
+        self.decompressors[folder] = folder.get_decompressor_at(src_end - src_start, candidates[-1])
+        remaining = []
+        end = start
+        for f in skipped:
+            begin, end = end, end + f.uncompressed
+            if begin >= restart_at:
+                remaining.append(f)
+            elif end > restart_at:
+                # drop rest of the file across the restart point without checking CRC.
+                with NullIO() as ofp:
+                    self.decompress(fp, folder, ofp, end - restart_at, None, src_end)
+        return remaining
+
     def _check(self, fp, check_target, src_end):
         """
         delayed execution of crc check.
@@ -1478,7 +2211,7 @@ class Worker:
 
     def decompress(
         self,
-        fp: IO[bytes],
+        fp: IO[bytes] | PositionedReader,
         folder,
         fq: IO[Any],
         size: int,
@@ -1502,38 +2235,80 @@ class Worker:
         """
         assert folder is not None
         out_remaining = size
-        max_block_size = get_memory_limit()
+        max_block_size = get_default_blocksize()
         crc32 = 0
-        decompressor = folder.get_decompressor(compressed_size)
+        decompressor = self.decompressors.get(folder)
+        if decompressor is None:
+            # the first member of a folder has the compressed size; others use the decompressor of the folder
+            assert compressed_size is not None
+            segments, threads = self._get_segments(fp, folder, compressed_size, src_end)
+            decompressor = self.decompressors[folder] = SevenZipDecompressor(
+                folder.coders,
+                compressed_size,
+                folder.unpacksizes,
+                folder.crc,
+                folder.password,
+                segments=segments,
+                threads=threads,
+            )
         previous_update_at = time.time()
         decompressed_bytes = 0
-        while out_remaining > 0:
-            tmp = decompressor.decompress(fp, min(out_remaining, max_block_size))
-            if len(tmp) > 0:
-                if self.max_extract_size is not None:
-                    self._total_extracted += len(tmp)
-                    if self._total_extracted > self.max_extract_size:
-                        raise DecompressionBombError(
-                            f"Extraction aborted: decompressed size {self._total_extracted} "
-                            f"exceeds limit of {self.max_extract_size} bytes"
-                        )
-                out_remaining -= len(tmp)
-                fq.write(tmp)
-                crc32 = calculate_crc32(tmp, crc32)
-            if q is not None:
-                time_delta = time.time() - previous_update_at
-                decompressed_bytes += len(tmp)
-                if out_remaining <= 0 or time_delta >= 1:
-                    q.put(("u", None, str(decompressed_bytes)))
-                    previous_update_at += time_delta
-                    decompressed_bytes = 0
-            if out_remaining <= 0:
-                break
+        # Checksum and write a large file in background threads while decoding next blocks.
+        # Writers provided by a WriterFactory are always called from this thread.
+        overlap = size >= self.overlap_size and not isinstance(fq, MemIO)
+        with ChecksumWriter(fq) if overlap else contextlib.nullcontext() as sink:
+            while out_remaining > 0:
+                tmp = decompressor.decompress(fp, min(out_remaining, max_block_size))
+                if len(tmp) > 0:
+                    if self.max_extract_size is not None:
+                        with self._total_lock:
+                            self._total_extracted += len(tmp)
+                            total_extracted = self._total_extracted
+                        if total_extracted > self.max_extract_size:
+                            raise DecompressionBombError(
+                                f"Extraction aborted: decompressed size {total_extracted} "
+                                f"exceeds limit of {self.max_extract_size} bytes"
+                            )
+                    out_remaining -= len(tmp)
+                    if sink is not None:
+                        sink.put(tmp)
+                    else:
+                        fq.write(tmp)
+                        crc32 = calculate_crc32(tmp, crc32)
+                if q is not None:
+                    time_delta = time.time() - previous_update_at
+                    decompressed_bytes += len(tmp)
+                    if out_remaining <= 0 or time_delta >= 1:
+                        q.put(("u", None, str(decompressed_bytes)))
+                        previous_update_at += time_delta
+                        decompressed_bytes = 0
+                if out_remaining <= 0:
+                    break
+        if sink is not None:
+            crc32 = sink.crc32
         if fp.tell() >= src_end:
             if decompressor.crc is not None and not decompressor.check_crc():
                 raise CrcError(decompressor.crc, decompressor.digest, None)
         return crc32
 
+    def _get_segments(
+        self, fp: IO[bytes] | PositionedReader, folder: Folder, packsize: int | None, src_end: int
+    ) -> tuple[list[int] | None, int]:
+        """Return packed sizes of segments of a folder to decode in parallel, split at restart points of LZMA2
+        stream such as ones written by multi-threaded 7-Zip, or at frames of Zstandard stream,
+        and number of segments to decode at once.
+        Segments are None when the folder is decoded by a single thread. It is called at the start of the folder."""
+        if self.max_workers < 2 or packsize is None or packsize != src_end - fp.tell() or packsize < self.segment_size:
+            return None, 1
+        segments = restart_segments(
+            folder.get_restart_points(fp, packsize), packsize, folder.get_unpack_size(), self.segment_size
+        )
+        # decode as many segments at once as threads within the memory limit.
+        max_pending = min(self.max_workers, self.segment_memory // max(u for u, _ in segments))
+        if len(segments) < 2 or max_pending < 2:
+            return None, 1
+        return [p for _, p in segments], max_pending
+
     def _find_link_target(self, target):
         """
         Find the target member of a symlink or hardlink member in the archive.
@@ -1547,7 +2322,8 @@ class Worker:
         linkname = pathlib.Path(linkname).as_posix()
         member = None
         for j in range(len(self.files)):
-            if linkname == self.files[j].origin.as_posix():
+            origin = self.files[j].origin
+            if origin is not None and linkname == origin.as_posix():
                 # FIXME: when API user specify arcname, it will break
                 member = os.path.relpath(linkname, os.path.dirname(targetname))
                 break
@@ -1555,7 +2331,7 @@ class Worker:
             member = linkname
         return member
 
-    def _after_write(self, insize, foutsize, crc):
+    def _after_write(self, insize, foutsize, crc, folder_index: int = -1):
         self.header.main_streams.substreamsinfo.digestsdefined.append(True)
         self.header.main_streams.substreamsinfo.digests.append(crc)
         if self.header.main_streams.substreamsinfo.unpacksizes is None:
@@ -1565,35 +2341,48 @@ class Worker:
         if self.header.main_streams.substreamsinfo.num_unpackstreams_folders is None:
             self.header.main_streams.substreamsinfo.num_unpackstreams_folders = [1]
         else:
-            self.header.main_streams.substreamsinfo.num_unpackstreams_folders[-1] += 1
+            self.header.main_streams.substreamsinfo.num_unpackstreams_folders[folder_index] += 1
         return foutsize, crc
 
-    def write(self, fp: IO[bytes], f, assym, folder):
-        compressor = folder.get_compressor()
-        if assym:
+    def _source(self, f, deref: bool) -> IO[Any] | pathlib.Path:
+        """Return data given by writestr(), a target of symlink or a path of file to compress."""
+        if f.has_strdata():
+            return f.data()
+        elif f.is_symlink and not deref:
             link_target: str = self._find_link_target(f.origin)
-            tgt: bytes = link_target.encode("utf-8")
-            fd = io.BytesIO(tgt)
-            insize, foutsize, crc = compressor.compress(fd, fp)
-            fd.close()
+            return io.BytesIO(link_target.encode("utf-8"))
         else:
-            with f.origin.open(mode="rb") as fd:
-                insize, foutsize, crc = compressor.compress(fd, fp)
+            return f.origin
+
+    @staticmethod
+    def _compress(fp: IO[bytes], source: IO[Any] | pathlib.Path, compressor: SevenZipCompressor) -> tuple[int, int, int]:
+        if isinstance(source, pathlib.Path):
+            with source.open(mode="rb") as fd:
+                return compressor.compress(fd, fp)
+        return compressor.compress(source, fp)
+
+    def write(self, fp: IO[bytes], f, assym, folder):
+        insize, foutsize, crc = self._compress(fp, self._source(f, not assym), folder.get_compressor())
         return self._after_write(insize, foutsize, crc)
 
     def writestr(self, fp: IO[bytes], f, folder):
-        compressor = folder.get_compressor()
-        insize, foutsize, crc = compressor.compress(f.data(), fp)
+        insize, foutsize, crc = self._compress(fp, f.data(), folder.get_compressor())
         return self._after_write(insize, foutsize, crc)
 
     def flush_archive(self, fp, folder):
         compressor = folder.get_compressor()
         foutsize = compressor.flush(fp)
         if len(self.files) > 0:
-            if "maxsize" in self.header.files_info.files[self.last_file_index]:
-                self.header.files_info.files[self.last_file_index]["maxsize"] += foutsize
+            self._after_flush(folder, compressor, self.last_file_index, foutsize)
+        else:
+            self._after_flush(folder, compressor, None, foutsize)
+
+    def _after_flush(self, folder, compressor, last_file_index: int | None, foutsize: int) -> None:
+        if last_file_index is not None:
+            if "maxsize" in self.header.files_info.files[last_file_index]:
+                self.header.files_info.files[last_file_index]["maxsize"] += foutsize
             else:
-                self.header.files_info.files[self.last_file_index]["maxsize"] = foutsize
+                self.header.files_info.files[last_file_index]["maxsize"] = foutsize
         # Update size data in header
         self.header.main_streams.packinfo.numstreams += 1
         if self.header.main_streams.packinfo.enable_digests:
@@ -1617,11 +2406,115 @@ class Worker:
             self.last_file_index = self.current_file_index
         self.current_file_index += 1
 
+    def archive_folder(self, fp: IO[bytes], files, deref=False):
+        """Add a file to the current solid block, and compress the block into a folder on a pool of threads
+        when it reaches limits of solid_block_size or solid_block_files.
+        Packed streams of finished folders are written into the archive in order."""
+        f = files[self.current_file_index]
+        if f.has_strdata() or (f.is_symlink and not deref) or not f.emptystream:
+            size = f.uncompressed or 0
+            if self.block and self.solid_block_size is not None and self.block_size + size > self.solid_block_size:
+                self._submit_folder()
+            # Data is copied into a spool of the block before returning, as files may be changed after write(),
+            # and symlink targets depend on members written before. The spool is kept on disk beyond spool_size.
+            if self.block_spool is None:
+                self.block_spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+            self.block.append((self.current_file_index, self._spool(self._source(f, deref), self.block_spool)))
+            # data given by writestr() is not held until the block is compressed
+            files.files_list[self.current_file_index].pop("data", None)
+            self.block_size += size
+            if (self.solid_block_files is not None and len(self.block) >= self.solid_block_files) or (
+                self.solid_block_size is not None and self.block_size >= self.solid_block_size
+            ):
+                self._submit_folder()
+            self._write_folders(fp, 2 * self.max_workers)
+        self.current_file_index += 1
+
+    def _spool(self, source: IO[Any] | pathlib.Path, spool: IO[bytes]) -> int:
+        start = spool.tell()
+        if isinstance(source, pathlib.Path):
+            with source.open(mode="rb") as fd:
+                shutil.copyfileobj(fd, spool, self.spool_size)
+        else:
+            shutil.copyfileobj(source, spool, self.spool_size)
+        return spool.tell() - start
+
+    def _submit_folder(self) -> concurrent.futures.Future:
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        folder = self.header.add_folder()
+        folder_index = len(self.header.main_streams.unpackinfo.folders) - 1
+        indices = [i for i, _ in self.block]
+        assert self.block_spool is not None
+        spool = self.block_spool
+        spool.seek(0)
+        future = self.executor.submit(self._compress_folder, spool, [size for _, size in self.block], folder)
+        self.pending_folders.append((folder, folder_index, indices, future))
+        self.block = []
+        self.block_spool = None
+        self.block_size = 0
+        return future
+
+    def _compress_folder(self, spool: IO[bytes], sizes: list[int], folder: Folder):
+        # Folders are compressed into spooled buffers, and copied into the archive in order of folders.
+        compressor = folder.get_compressor()
+        buf = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            with spool:
+                results = [compressor.compress(LimitedReader(spool, size), buf) for size in sizes]
+            foutsize = compressor.flush(buf)
+        except BaseException:
+            buf.close()
+            raise
+        buf.seek(0)
+        return buf, results, foutsize
+
+    def _write_folders(self, fp: IO[bytes], max_pending: int = 0) -> None:
+        """Write packed streams of compressed folders in order, while more than max_pending folders
+        are pending, or the first pending folder is done."""
+        while self.pending_folders and (len(self.pending_folders) > max_pending or self.pending_folders[0][3].done()):
+            folder, folder_index, indices, future = self.pending_folders.popleft()
+            buf, results, foutsize = future.result()
+            with buf:
+                shutil.copyfileobj(buf, fp, self.spool_size)
+            for i, (insize, outsize, crc) in zip(indices, results):
+                self._after_write(insize, outsize, crc, folder_index)
+                self.header.files_info.files[i]["maxsize"] = outsize
+                self.header.files_info.files[i]["digest"] = crc
+            self.last_file_index = indices[-1]
+            self._after_flush(folder, folder.get_compressor(), indices[-1], foutsize)
+
+    def flush_folders(self, fp: IO[bytes]) -> None:
+        """Compress the last solid block, wait for all pending folders, and write them into the archive."""
+        try:
+            if self.block:
+                self._submit_folder()
+            self._write_folders(fp)
+        finally:
+            self._shutdown_executor()
+
+    def _shutdown_executor(self) -> None:
+        if self.executor is not None:
+            for *_, future in self.pending_folders:
+                future.cancel()
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            for *_, future in self.pending_folders:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    future.result()[0].close()
+            self.pending_folders.clear()
+        if self.block_spool is not None:
+            self.block_spool.close()
+            self.block_spool = None
+        self.block = []
+        self.block_size = 0
+
     def register_filelike(self, id: int, fileish: MemIO | pathlib.Path | None) -> None:
         """register file-ish to worker."""
         self.target_filepath[id] = fileish
 
     def close(self):
+        self._shutdown_executor()
         del self.header
         del self.files
         del self.concurrent
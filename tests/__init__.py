@@ -1,5 +1,6 @@
 import asyncio
 import binascii
+import concurrent.futures
 import functools
 import hashlib
 import os
@@ -54,6 +55,31 @@ def decode_all(archive, expected, tmpdir):
     check_output(expected, tmpdir)
 
 
+class SyncExecutor:
+    """Executor which runs a task when it is submitted, so that parallel decoding is deterministic."""
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def decode_segments_with_drains(decompressor, stream, first):
+    """Decode stream by a ParallelDecompressor, which is given empty input to drain its output
+    while the segment after the first one of first bytes is partially given."""
+    out = bytearray(decompressor.decompress(stream[: first + 10], 1000))
+    for _ in range(3):
+        out += decompressor.decompress(b"", 1000)
+    for pos in range(first + 10, len(stream), 5000):
+        out += decompressor.decompress(stream[pos : pos + 5000], 1000)
+    while not decompressor.eof:
+        out += decompressor.decompress(b"", 1000)
+    return bytes(out)
+
+
 async def aio7zr(archive, path):
     loop = asyncio.get_event_loop()
     sevenzip = py7zr.SevenZipFile(archive)
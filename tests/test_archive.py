@@ -9,6 +9,7 @@ import pathlib
 import shutil
 import stat
 import sys
+import threading
 from datetime import datetime, timezone
 
 import pytest
@@ -17,6 +18,7 @@ import py7zr.archiveinfo
 import py7zr.compressor
 import py7zr.helpers
 import py7zr.properties
+import py7zr.py7zr
 from py7zr import SevenZipFile, pack_7zarchive
 from py7zr.py7zr import FILE_ATTRIBUTE_UNIX_EXTENSION
 
@@ -1204,3 +1206,151 @@ def test_empty_stream(tmp_path):
     assert archive.header.files_info.files[0]["uncompressed"] == 0
     archive.close()
     p7zip_test(tmp_path / "test.7z")
+
+
+@pytest.mark.files
+@pytest.mark.parametrize("password", [None, "secret"])
+def test_compress_non_solid(tmp_path, password):
+    tmp_path.joinpath("src").mkdir()
+    py7zr.unpack_7zarchive(os.path.join(testdata_path, "test_2.7z"), path=tmp_path.joinpath("src"))
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", solid=False, password=password) as archive:
+        archive.writeall(tmp_path.joinpath("src"), "src")
+        with open(os.path.join(testdata_path, "test1.txt"), "rb") as f:
+            archive.writef(f, "test1.txt")
+        archive.writestr("hello", "hello.txt")
+    with py7zr.SevenZipFile(target, "r", password=password) as archive:
+        members = [f for f in archive.files if not f.emptystream]
+        assert archive.archiveinfo().blocks == len(members)
+        assert not archive.archiveinfo().solid
+        assert archive.testzip() is None
+        archive.extractall(path=tmp_path.joinpath("tgt"))
+    dc = filecmp.dircmp(tmp_path.joinpath("src"), tmp_path.joinpath("tgt", "src"))
+    assert dc.diff_files == []
+    assert tmp_path.joinpath("tgt", "hello.txt").read_text() == "hello"
+    assert filecmp.cmp(os.path.join(testdata_path, "test1.txt"), tmp_path.joinpath("tgt", "test1.txt"), shallow=False)
+    #
+    p7zip_test(tmp_path / "target.7z")
+    if password is None:
+        libarchive_extract(tmp_path / "target.7z", tmp_path.joinpath("tgt2"))
+
+
+@pytest.mark.files
+def test_compress_non_solid_reads_before_return(tmp_path, monkeypatch):
+    # folders are compressed only after the source file is overwritten
+    started = threading.Event()
+    original = py7zr.py7zr.Worker._compress_folder
+
+    def compress_folder(self, *args):
+        started.wait()
+        return original(self, *args)
+
+    monkeypatch.setattr(py7zr.py7zr.Worker, "_compress_folder", compress_folder)
+    src = tmp_path.joinpath("src.txt")
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", solid=False) as archive:
+        archive.worker.spool_size = 4
+        archive.worker.max_workers = 4
+        for i in range(2):
+            src.write_bytes(b"version %d" % i)
+            archive.write(src, f"v{i}.txt")
+        src.write_bytes(b"overwritten")
+        archive.writestr(b"data" * 4, "data.txt")
+        # data given by writestr() is spooled, and not held by the member
+        assert all("data" not in file_info for file_info in archive.files.files_list)
+        started.set()
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.testzip() is None
+        assert {name: archive.open(name).read() for name in ("v0.txt", "v1.txt", "data.txt")} == {
+            "v0.txt": b"version 0",
+            "v1.txt": b"version 1",
+            "data.txt": b"data" * 4,
+        }
+
+
+@pytest.mark.files
+def test_compress_append_non_solid(tmp_path):
+    target = tmp_path.joinpath("target.7z")
+    shutil.copy(os.path.join(testdata_path, "test_1.7z"), target)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        numfolders = archive.archiveinfo().blocks
+    with py7zr.SevenZipFile(target, "a", solid=False) as archive:
+        archive.write(os.path.join(testdata_path, "test1.txt"), "test1.txt")
+        archive.writestr("hello", "hello.txt")
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.archiveinfo().blocks == numfolders + 2
+        assert archive.testzip() is None
+        assert archive.open("hello.txt").read() == b"hello"
+    #
+    p7zip_test(tmp_path / "target.7z")
+    libarchive_extract(tmp_path / "target.7z", tmp_path.joinpath("tgt2"))
+
+
+@pytest.mark.files
+@pytest.mark.parametrize(
+    "solid_block_size, solid_block_files, expected",
+    [(None, 2, [2, 2, 1]), (3, None, [2, 1, 1, 1]), (4, 2, [2, 1, 1, 1]), (1, None, [1, 1, 1, 1, 1])],
+)
+def test_compress_solid_blocks(tmp_path, solid_block_size, solid_block_files, expected):
+    contents = {"a": b"1", "b": b"22", "c": b"333", "d": b"4444", "e": b"5"}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", solid_block_size=solid_block_size, solid_block_files=solid_block_files) as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.header.main_streams.substreamsinfo.num_unpackstreams_folders == expected
+        assert archive.testzip() is None
+        assert {name: archive.open(name).read() for name in contents} == contents
+    #
+    p7zip_test(tmp_path / "target.7z")
+    libarchive_extract(tmp_path / "target.7z", tmp_path.joinpath("tgt2"))
+
+
+@pytest.mark.files
+@pytest.mark.parametrize("solid_block_size, solid_block_files", [(None, 2), (18, None)])
+def test_compress_solid_blocks_reads_before_return(tmp_path, solid_block_size, solid_block_files):
+    src = tmp_path.joinpath("src.txt")
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", solid_block_size=solid_block_size, solid_block_files=solid_block_files) as archive:
+        archive.worker.spool_size = 4
+        for i in range(3):
+            src.write_bytes(b"version %d" % i)
+            archive.write(src, f"v{i}.txt")
+            # the block is not compressed yet; the file is read already
+            src.write_bytes(b"overwritten")
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.header.main_streams.substreamsinfo.num_unpackstreams_folders == [2, 1]
+        assert archive.testzip() is None
+        assert [archive.open(f"v{i}.txt").read() for i in range(3)] == [b"version %d" % i for i in range(3)]
+
+
+@pytest.mark.basic
+def test_compress_solid_blocks_invalid(tmp_path):
+    with pytest.raises(ValueError):
+        py7zr.SevenZipFile(tmp_path.joinpath("target.7z"), "w", solid_block_size=0)
+    with pytest.raises(ValueError):
+        py7zr.SevenZipFile(tmp_path.joinpath("target.7z"), "w", solid_block_files=-1)
+
+
+@pytest.mark.files
+def test_compress_lzma2_threads(tmp_path):
+    filters = [
+        {"id": py7zr.properties.FILTER_X86},
+        {"id": lzma.FILTER_LZMA2, "preset": 6, "threads": 4, "block_size": 1 << 20},
+    ]
+    data = b"".join(b"%d:%d\n" % (i, i * i) for i in range(300000))
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", filters=filters) as archive:
+        archive.writestr(data, "data.txt")
+        archive.write(os.path.join(testdata_path, "test1.txt"), "test1.txt")
+    with py7zr.SevenZipFile(target, "r") as archive:
+        coders = archive.header.main_streams.unpackinfo.folders[0].coders
+        assert [py7zr.compressor.SupportedMethods.get_filter_id(c) for c in coders] == [
+            lzma.FILTER_LZMA2,
+            py7zr.properties.FILTER_X86,
+        ]
+        assert archive.testzip() is None
+        assert archive.open("data.txt").read() == data
+    #
+    p7zip_test(tmp_path / "target.7z")
+    libarchive_extract(tmp_path / "target.7z", tmp_path.joinpath("tgt2"))
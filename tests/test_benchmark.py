@@ -1,3 +1,4 @@
+import concurrent.futures
 import os
 import platform
 import shutil
@@ -131,6 +132,22 @@ def test_benchmark_text_decompress(tmp_path, benchmark, name, filters):
     benchmark.pedantic(decompressor, setup=setup, args=[], iterations=1, rounds=3)
 
 
+@pytest.mark.benchmark(group="concurrent")
+@pytest.mark.parametrize("threads", [1, 4])
+def test_benchmark_concurrent_read(benchmark, threads):
+    """Threads read members from one archive at once; they scale with threads on free-threaded Python."""
+
+    def reader(szf, names):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in executor.map(lambda name: szf.open(name).read(), names * 4):
+                pass
+
+    with py7zr.SevenZipFile(os.path.join(testdata_path, "mblock_1.7z"), "r") as szf:
+        names = [f.filename for f in szf.files if not f.is_directory]
+        benchmark.extra_info["data_size"] = 4 * szf.archiveinfo().uncompressed
+        benchmark.pedantic(reader, args=[szf, names], iterations=1, rounds=3)
+
+
 @pytest.mark.benchmark(group="calculate_key")
 @pytest.mark.skip(reason="Don't test in ordinary development")
 def test_benchmark_calculate_key1(benchmark):
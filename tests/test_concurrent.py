@@ -1,13 +1,19 @@
 import concurrent.futures
+import io
 import logging
 import os
 import ssl
 import sys
+import threading
+import time
 from urllib.request import urlopen
 
 import pytest
 
 import py7zr
+import py7zr.archiveinfo
+import py7zr.helpers
+from py7zr.exceptions import DecompressionBombError
 
 # hack only for the test, it is highly discouraged for production.
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -121,3 +127,147 @@ def test_concurrent_extraction(tmp_path, caplog):
         done, not_done = concurrent.futures.wait(tasks, return_when=concurrent.futures.ALL_COMPLETED)
         if len(not_done) > 0:
             raise Exception("Extraction error.")
+
+
+def run_threads(func, count: int) -> list:
+    """Run func(i) in count threads starting at once, and return results."""
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        barrier.wait()
+        return func(i)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(run, range(count)))
+
+
+@pytest.mark.unit
+def test_key_cache_concurrently(monkeypatch):
+    cache = py7zr.helpers.KeyCache()
+    calls = []
+    # different keys are derived at once, or this barrier is broken by timeout
+    overlap = threading.Barrier(2, timeout=10)
+    original = py7zr.helpers.calculate_key
+
+    def calculate_key(password, cycles, salt, digest):
+        calls.append(salt)
+        if salt != b"same":
+            overlap.wait()
+        return original(password, cycles, salt, digest)
+
+    monkeypatch.setattr(py7zr.helpers, "calculate_key", calculate_key)
+    password = "secret".encode("utf-16LE")
+    run_threads(lambda i: cache.get(password, 10, b"other%d" % i), 2)
+    keys = run_threads(lambda i: cache.get(password, 10, b"same"), 8)
+    assert calls.count(b"same") == 1
+    assert keys == [py7zr.helpers._calculate_key1(password, 10, b"same", "sha256")] * 8
+
+
+@pytest.mark.unit
+def test_lazy_properties_concurrently(tmp_path, monkeypatch):
+    target = tmp_path.joinpath("target.7z")
+    names = [f"dir{i % 10}/file{i}.txt" for i in range(1000)]
+    with py7zr.SevenZipFile(target, "w") as archive:
+        for name in names:
+            archive.writestr(name.encode(), name)
+    decoded = []
+    original = py7zr.archiveinfo.FilesInfo._read_name
+
+    def read_name(self, *args):
+        decoded.append(args)
+        return original(self, *args)
+
+    monkeypatch.setattr(py7zr.archiveinfo.FilesInfo, "_read_name", read_name)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        results = run_threads(lambda i: (archive.getnames(), archive.getinfo(names[i * 100]).filename), 8)
+        times = run_threads(lambda i: [f.lastwritetime for f in archive.files], 8)
+    assert results == [(names, names[i * 100]) for i in range(8)]
+    assert all(t == times[0] for t in times)
+    assert len(decoded) == 1
+
+
+@pytest.mark.files
+def test_extract_max_extract_size_concurrently(tmp_path):
+    with py7zr.SevenZipFile(os.path.join(testdata_path, "mblock_1.7z"), "r") as archive:
+        total = sum(f.uncompressed for f in archive.files)
+    for i in range(4):
+        # folders are extracted by threads, which count extracted size at once.
+        with py7zr.SevenZipFile(os.path.join(testdata_path, "mblock_1.7z"), "r", max_extract_size=total) as archive:
+            archive.extractall(path=tmp_path.joinpath(f"ok{i}"))
+        with py7zr.SevenZipFile(os.path.join(testdata_path, "mblock_1.7z"), "r", max_extract_size=total - 1) as archive:
+            with pytest.raises(DecompressionBombError):
+                archive.extractall(path=tmp_path.joinpath(f"ng{i}"))
+
+
+@pytest.mark.files
+def test_extract_encrypted_concurrently(tmp_path):
+    contents = {f"dir{i % 3}/file{i}.bin": os.urandom(1000) * (i + 1) for i in range(12)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", password="secret") as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    names = sorted(contents)
+    cache = py7zr.FolderCache()
+
+    def run(i):
+        archive.extract(path=tmp_path.joinpath(f"out{i}"), targets=[names[i % len(names)]])
+        with archive.open(names[(i + 5) % len(names)]) as member:
+            data = member.read()
+        return (
+            tmp_path.joinpath(f"out{i}", names[i % len(names)]).read_bytes() == contents[names[i % len(names)]]
+            and data == contents[names[(i + 5) % len(names)]]
+        )
+
+    py7zr.helpers.derived_key_cache.clear()
+    with py7zr.SevenZipFile(target, "r", password="secret", folder_cache=cache) as archive:
+        assert all(run_threads(run, 16))
+
+
+class _RawSource(io.RawIOBase):
+    """Seekable source without a file descriptor, whose reads yield to other threads between seek and copy."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        else:
+            self._pos = len(self._data) + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, b):
+        pos = self._pos
+        time.sleep(0)
+        data = self._data[pos : pos + len(b)]
+        b[: len(data)] = data
+        self._pos = pos + len(data)
+        return len(data)
+
+
+@pytest.mark.files
+def test_extract_raw_source_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    contents = {f"file{i}.bin": os.urandom(20000) * (i + 1) for i in range(8)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", solid=False) as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    with py7zr.SevenZipFile(io.BufferedReader(_RawSource(target.read_bytes())), "r") as archive:
+        # extractions share the archive source, and each one reads folders by several threads.
+        run_threads(lambda i: archive.extractall(path=tmp_path.joinpath(f"out{i}")), 4)
+    for i in range(4):
+        for name, data in contents.items():
+            assert tmp_path.joinpath(f"out{i}", name).read_bytes() == data
@@ -77,6 +77,24 @@ def test_extract_encrypted_2(tmp_path):
         archive.close()
 
 
+@pytest.mark.files
+@pytest.mark.timeout(45)
+def test_extract_encrypted_2_key_once(tmp_path, monkeypatch):
+    """Folders extracted in parallel derive the shared AES key only once."""
+    calls = []
+
+    def counting_calculate_key(*args):
+        calls.append(args)
+        return py7zr.helpers._calculate_key3(*args)
+
+    py7zr.helpers.derived_key_cache.clear()
+    monkeypatch.setattr(py7zr.helpers, "calculate_key", counting_calculate_key)
+    with py7zr.SevenZipFile(testdata_path.joinpath("encrypted_2.7z"), password="secret") as archive:
+        archive.extractall(factory=py7zr.io.HashIOFactory())
+    assert len(calls) == 1
+    py7zr.helpers.derived_key_cache.clear()
+
+
 @pytest.mark.files
 def test_extract_encrypted_5(tmp_path):
     archive = py7zr.SevenZipFile(testdata_path.joinpath("encrypted_5.7z").open(mode="rb"), password="secret")
@@ -13,7 +13,7 @@ import py7zr
 import py7zr.compressor
 from py7zr import UnsupportedCompressionMethodError
 from py7zr.properties import FILTER_DEFLATE64
-from tests import p7zip_test
+from tests import SyncExecutor, decode_segments_with_drains, p7zip_test
 
 testdata_path = pathlib.Path(os.path.dirname(__file__)).joinpath("data")
 srcdata = testdata_path.joinpath("src.zip")
@@ -116,6 +116,98 @@ def test_zstd_decompressor_2():
     assert outdata == plain_data
 
 
+@pytest.mark.unit
+def test_zstd_decompressor_frames():
+    plain_data = b"".join(b"%d\n" % i for i in range(100000))
+    compressor = py7zr.compressor.ZstdCompressor(3, frame_size=100000)
+    compressed = compressor.compress(plain_data) + compressor.flush()
+    property = b"\x01\x04\x04\x00\x00"
+    decompressor = py7zr.compressor.ZstdDecompressor(property, None)
+    assert decompressor.decompress(compressed) == plain_data
+    assert decompressor.eof
+    decompressor = py7zr.compressor.ZstdDecompressor(property, None)
+    outdata = decompressor.decompress(compressed, 65536)
+    while not decompressor.eof:
+        assert not decompressor.needs_input
+        outdata += decompressor.decompress(b"", 65536)
+    assert outdata == plain_data
+
+
+@pytest.mark.unit
+def test_scan_zstd_frames():
+    plain_data = b"".join(b"%d\n" % i for i in range(100000))
+    compressor = py7zr.compressor.ZstdCompressor(3, threads=2, frame_size=200000)
+    frames = [compressor.compress(plain_data[i : i + 200000]) for i in range(0, len(plain_data), 200000)]
+    frames.append(compressor.flush())
+    # a skippable frame, and a frame without content size at last
+    frames.insert(1, b"\x50\x2a\x4d\x18\x04\x00\x00\x00abcd")
+    streaming = py7zr.compressor.ZstdCompressor(3)
+    frames.append(streaming.compress(b"tail") + streaming.flush())
+    stream = b"".join(frames)
+    data = plain_data + b"tail"
+    fp = io.BytesIO(stream)
+    points = py7zr.compressor.scan_zstd_frames(fp, len(stream))
+    assert fp.tell() == 0
+    assert [p[0] for p in points] == list(range(0, len(plain_data), 200000)) + [len(plain_data)]
+    property = b"\x01\x04\x04\x00\x00"
+    for unpacked, packed in points:
+        decompressor = py7zr.compressor.ZstdDecompressor(property, None)
+        assert decompressor.decompress(stream[packed:]) == data[unpacked:]
+
+
+@pytest.mark.unit
+def test_zstd_parallel_decompressor_drain_partial_segment(monkeypatch):
+    monkeypatch.setattr(py7zr.compressor, "_get_decode_pool", SyncExecutor)
+    data = b"".join(b"%d\n" % i for i in range(100000))
+    compressor = py7zr.compressor.ZstdCompressor(3, frame_size=200000)
+    stream = compressor.compress(data) + compressor.flush()
+    points = py7zr.compressor.scan_zstd_frames(io.BytesIO(stream), len(stream))
+    segments = [p for _, p in py7zr.compressor.restart_segments(points, len(stream), len(data), 200000)]
+    assert len(segments) > 2
+    coders = [
+        {
+            "method": py7zr.properties.COMPRESSION_METHOD.MISC_ZSTD,
+            "properties": b"\x01\x04\x04\x00\x00",
+            "numinstreams": 1,
+            "numoutstreams": 1,
+        }
+    ]
+    decompressor = py7zr.compressor.SevenZipDecompressor(
+        coders, len(stream), [len(data)], None, segments=segments, threads=2
+    )
+    assert decode_segments_with_drains(decompressor.chain[0], stream, segments[0]) == data
+
+
+@pytest.mark.files
+def test_compress_zstd_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    filters = [{"id": py7zr.FILTER_ZSTD, "level": 3, "threads": 0, "frame_size": 1 << 20}]
+    data = b"".join(b"%d:%d\n" % (i, i * i) for i in range(400000))
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", filters=filters) as archive:
+        archive.writestr(data, "data.bin")
+        archive.writestr("tail", "tail.txt")
+    segments = []
+    original = py7zr.compressor.ParallelDecompressor.__init__
+
+    def init(self, sizes, decode, max_pending):
+        segments.append(sizes)
+        original(self, sizes, decode, max_pending)
+
+    monkeypatch.setattr(py7zr.compressor.ParallelDecompressor, "__init__", init)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        archive.extractall(path=tmp_path.joinpath("tgt"))
+    assert len(segments) == 1 and len(segments[0]) > 2
+    assert tmp_path.joinpath("tgt", "data.bin").read_bytes() == data
+    assert tmp_path.joinpath("tgt", "tail.txt").read_text() == "tail"
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.testzip() is None
+    with py7zr.SevenZipFile(target, "r") as archive:
+        with archive.open("data.bin") as member:
+            member.seek(len(data) - 100)
+            assert member.read() == data[-100:]
+
+
 @pytest.mark.unit
 def test_sevenzipcompressor_aes_lzma2():
     plain_data = b"\x00*\x1a\t'd\x19\xb08s\xca\x8b\x13 \xaf:\x1b\x8d\x97\xf8|#M\xe9\xe1W\xd4\xe4\x97BB\xd2"
@@ -293,3 +385,37 @@ def test_decompress_deflate64(tmp_path):
         m1 = hashlib.sha256()
         m1.update(tmp_path.joinpath("src").joinpath(target).open("rb").read())
         assert m0.digest() == m1.digest(), "Fails digest for %s" % target
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filters",
+    [
+        [{"id": py7zr.FILTER_ZSTD}],
+        [{"id": py7zr.FILTER_ZSTD, "frame_size": 100000}],
+        [{"id": py7zr.FILTER_DEFLATE}],
+        [{"id": FILTER_DEFLATE64}],
+        [{"id": py7zr.FILTER_COPY}],
+        [{"id": py7zr.FILTER_BROTLI}],
+        [{"id": py7zr.FILTER_PPMD}],
+        [{"id": py7zr.FILTER_BZIP2}],
+    ],
+)
+def test_sevenzipdecompressor_max_length(filters):
+    if filters[0]["id"] == FILTER_DEFLATE64 and hasattr(sys, "pypy_version_info"):
+        pytest.skip("deflate64 is disabled on pypy")
+    plain_data = b"".join(b"%d\n" % (i % 100) for i in range(1000000))
+    compressor = py7zr.compressor.SevenZipCompressor(filters=filters)
+    outdata = io.BytesIO()
+    _, outsize, _ = compressor.compress(io.BytesIO(plain_data), outdata)
+    outsize += compressor.flush(outdata)
+    outdata.seek(0, 0)
+    decompressor = py7zr.compressor.SevenZipDecompressor(
+        compressor.coders, outsize, compressor.unpacksizes, None, blocksize=1 << 20
+    )
+    result = bytearray()
+    while len(result) < len(plain_data):
+        data = decompressor.decompress(outdata, min(65536, len(plain_data) - len(result)))
+        assert len(data) <= 65536
+        result += data
+    assert result == plain_data
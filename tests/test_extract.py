@@ -1,9 +1,13 @@
 import asyncio
 import binascii
+import concurrent.futures
 import ctypes
 import hashlib
+import io
+import lzma
 import os
 import pathlib
+import pickle
 import shutil
 import subprocess
 import sys
@@ -13,6 +17,8 @@ from datetime import datetime
 import pytest
 
 import py7zr
+import py7zr.archiveinfo
+import py7zr.compressor
 from py7zr.exceptions import CrcError, UnsupportedCompressionMethodError
 from py7zr.helpers import UTC
 
@@ -445,6 +451,77 @@ def test_multiblock_mem():
     archive.close()
 
 
+@pytest.mark.files
+def test_multiblock_bytesio(tmp_path):
+    """Folders of an archive given as BytesIO are extracted in parallel."""
+    with testdata_path.joinpath("mblock_1.7z").open(mode="rb") as f:
+        data = io.BytesIO(f.read())
+    archive = py7zr.SevenZipFile(data)
+    archive.extractall(path=tmp_path)
+    m = hashlib.sha256()
+    m.update(tmp_path.joinpath("bin/7zdec.exe").open("rb").read())
+    assert m.digest() == binascii.unhexlify("e14d8201c5c0d1049e717a63898a3b1c7ce4054a24871daebaa717da64dcaff5")
+    archive.close()
+    assert not data.closed
+
+
+@pytest.mark.files
+def test_multiblock_mp(tmp_path):
+    class Recorder(py7zr.callbacks.ExtractCallback):
+        def __init__(self):
+            self.ended = []
+
+        def report_start_preparation(self):
+            pass
+
+        def report_start(self, processing_file_path, processing_bytes):
+            pass
+
+        def report_update(self, decompressed_bytes):
+            pass
+
+        def report_end(self, processing_file_path, wrote_bytes):
+            self.ended.append(processing_file_path)
+
+        def report_postprocess(self):
+            pass
+
+        def report_warning(self, message):
+            pass
+
+    recorder = Recorder()
+    with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z"), mp=True) as archive:
+        names = archive.getnames()
+        archive.extractall(path=tmp_path, callback=recorder)
+    m = hashlib.sha256()
+    m.update(tmp_path.joinpath("bin/7zdec.exe").open("rb").read())
+    assert m.digest() == binascii.unhexlify("e14d8201c5c0d1049e717a63898a3b1c7ce4054a24871daebaa717da64dcaff5")
+    assert sorted(recorder.ended) == sorted(names)
+
+
+@pytest.mark.files
+def test_multiblock_mp_max_extract_size(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z"), mp=True, max_extract_size=4096) as archive:
+        with pytest.raises(py7zr.DecompressionBombError, match="limit of 4096 bytes"):
+            archive.extractall(path=tmp_path)
+    # the largest folder fits in the limit, and the next one exceeds the rest of it in a child process.
+    with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z"), mp=True, max_extract_size=2000000) as archive:
+        with pytest.raises(py7zr.DecompressionBombError, match="limit of 2000000 bytes"):
+            archive.extractall(path=tmp_path.joinpath("out"))
+
+
+@pytest.mark.files
+def test_multiblock_mp_pool_shutdown(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z"), mp=True) as archive:
+        archive.extractall(path=tmp_path)
+    pool = py7zr.py7zr._process_pool
+    assert pool is not None
+    py7zr.py7zr._shutdown_process_pool()
+    assert py7zr.py7zr._process_pool is None
+    # a new pool is made on the next use
+    assert py7zr.py7zr._get_process_pool() is not pool
+
+
 @pytest.mark.files
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="Cannot unlink opened file on Windows")
 def test_multiblock_unlink(tmp_path):
@@ -721,3 +798,396 @@ def test_extract_target_parent_folder(tmp_path):
     f = "solid.7z"
     archive = py7zr.SevenZipFile(testdata_path.joinpath(f).open(mode="rb"))
     check_archive(archive, target_path, False)
+
+
+@pytest.mark.files
+def test_open_member(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("test_1.7z"), "r") as archive:
+        archive.extractall(path=tmp_path)
+    with py7zr.SevenZipFile(testdata_path.joinpath("test_1.7z"), "r") as archive:
+        with archive.open("setup.py") as setup_py, archive.open("scripts/py7zr") as script:
+            expected = tmp_path.joinpath("setup.py").read_bytes()
+            assert setup_py.read(10) == expected[:10]
+            assert script.read() == tmp_path.joinpath("scripts/py7zr").read_bytes()
+            setup_py.seek(-20, io.SEEK_END)
+            assert setup_py.read() == expected[-20:]
+            setup_py.seek(5)
+            buf = bytearray(16)
+            assert setup_py.readinto(buf) == 16
+            assert bytes(buf) == expected[5:21]
+            assert setup_py.tell() == 21
+        with io.BufferedReader(archive.open("setup.cfg")) as setup_cfg:
+            assert setup_cfg.read() == tmp_path.joinpath("setup.cfg").read_bytes()
+        with pytest.raises(KeyError):
+            archive.open("not_exist")
+    with py7zr.SevenZipFile(testdata_path.joinpath("test_1.7z"), "r") as archive:
+        # other properties of members are not decoded to find the member in its folder
+        with archive.open("setup.py") as setup_py:
+            assert setup_py.read() == tmp_path.joinpath("setup.py").read_bytes()
+        assert {"lastwritetime", "attributes"} <= archive.header.files_info.files._pending.keys()
+
+
+class ResettingLZMA2Compressor(py7zr.compressor.LZMA1Compressor):
+    """LZMA2 compressor which resets dictionary every 100000 bytes, as multithreaded 7-Zip does per block."""
+
+    BLOCK = 100000
+
+    def __init__(self, filters):
+        self.filters = filters
+        self.buf = bytearray()
+
+    def compress(self, data):
+        self.buf += data
+        out = bytearray()
+        while len(self.buf) >= self.BLOCK:
+            out += lzma.compress(bytes(self.buf[: self.BLOCK]), format=lzma.FORMAT_RAW, filters=self.filters)[:-1]
+            del self.buf[: self.BLOCK]
+        return bytes(out)
+
+    def flush(self):
+        if len(self.buf) == 0:
+            return b"\x00"
+        return lzma.compress(bytes(self.buf), format=lzma.FORMAT_RAW, filters=self.filters)
+
+
+@pytest.mark.files
+def test_extract_from_restart_point(tmp_path, monkeypatch):
+    monkeypatch.setattr(py7zr.compressor, "LZMA1Compressor", ResettingLZMA2Compressor)
+    contents = {f"file{i}.txt": b"".join(b"%d:%d\n" % (i, j) for j in range(9000)) for i in range(8)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", filters=[{"id": py7zr.FILTER_LZMA2, "preset": 1}]) as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    restarts = []
+    original = py7zr.archiveinfo.Folder.get_decompressor_at
+
+    def get_decompressor_at(self, packsize, point, blocksize=None):
+        restarts.append(point[0])
+        return original(self, packsize, point, blocksize)
+
+    monkeypatch.setattr(py7zr.archiveinfo.Folder, "get_decompressor_at", get_decompressor_at)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        archive.extract(path=tmp_path.joinpath("out"), targets=["file3.txt", "file7.txt"])
+    assert restarts == [100000, 400000]
+    for name in ["file3.txt", "file7.txt"]:
+        assert tmp_path.joinpath("out", name).read_bytes() == contents[name]
+    assert not tmp_path.joinpath("out", "file5.txt").exists()
+    restarts.clear()
+    with py7zr.SevenZipFile(target, "r") as archive:
+        with archive.open("file6.txt") as member:
+            member.seek(1000)
+            assert member.read(10) == contents["file6.txt"][1000:1010]
+            member.seek(0)
+            assert member.read() == contents["file6.txt"]
+    assert restarts == [0, 300000, 300000]
+
+
+@pytest.mark.files
+def test_extract_with_folder_cache(tmp_path, monkeypatch):
+    contents = {f"file{i}.txt": b"".join(b"%d:%d\n" % (i, j) for j in range(5000)) for i in range(4)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w") as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    created = []
+    original = py7zr.compressor.SevenZipDecompressor
+
+    def decompressor(*args, **kwargs):
+        created.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(py7zr.compressor, "SevenZipDecompressor", decompressor)
+    cache = py7zr.FolderCache()
+    for i, (name, decoded) in enumerate([("file1.txt", 1), ("file1.txt", 0), ("file3.txt", 1), ("file3.txt", 0)]):
+        created.clear()
+        with py7zr.SevenZipFile(target, "r", folder_cache=cache) as archive:
+            archive.extract(path=tmp_path.joinpath(f"out{i}"), targets=[name])
+        assert tmp_path.joinpath(f"out{i}", name).read_bytes() == contents[name]
+        assert len(created) == decoded
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert cache.memory_size == sum(len(data) for data in contents.values())
+
+
+@pytest.mark.files
+def test_extract_with_folder_cache_on_disk(tmp_path, monkeypatch):
+    contents = {f"file{i}.txt": b"".join(b"%d:%d\n" % (i, j) for j in range(5000)) for i in range(4)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w") as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    created = []
+    original = py7zr.compressor.SevenZipDecompressor
+
+    def decompressor(*args, **kwargs):
+        created.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(py7zr.compressor, "SevenZipDecompressor", decompressor)
+    # the folder is larger than the memory tier, so it is recorded to a file
+    cache = py7zr.FolderCache(memory_limit=1000, disk_limit=1024 * 1024, directory=str(tmp_path.joinpath("cache")))
+    tmp_path.joinpath("cache").mkdir()
+    for i in range(2):
+        with py7zr.SevenZipFile(target, "r", folder_cache=cache) as archive:
+            archive.extractall(path=tmp_path.joinpath(f"out{i}"))
+        for name, data in contents.items():
+            assert tmp_path.joinpath(f"out{i}", name).read_bytes() == data
+    assert len(created) == 1
+    assert cache.memory_size == 0 and cache.disk_size == sum(len(data) for data in contents.values())
+    cache.clear()
+
+
+@pytest.mark.files
+def test_extract_with_header_cache(tmp_path, monkeypatch):
+    contents = {f"dir/file{i}.txt": b"%d\n" % i * 1000 for i in range(10)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", password="secret") as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    parsed = []
+    original = py7zr.archiveinfo.Header.retrieve_decoded.__func__
+
+    def retrieve(cls, *args, **kwargs):
+        parsed.append(args)
+        return original(cls, *args, **kwargs)
+
+    monkeypatch.setattr(py7zr.archiveinfo.Header, "retrieve_decoded", classmethod(retrieve))
+    cache = py7zr.HeaderCache(tmp_path.joinpath("cache"))
+    for i in range(2):
+        with py7zr.SevenZipFile(target, "r", password="secret", header_cache=cache) as archive:
+            assert archive.getnames() == list(contents.keys())
+            assert archive.password_protected
+            archive.extract(path=tmp_path.joinpath(f"out{i}"), targets=["dir/file3.txt"])
+        assert tmp_path.joinpath(f"out{i}", "dir/file3.txt").read_bytes() == contents["dir/file3.txt"]
+    assert len(parsed) == 1 and (cache.hits, cache.misses) == (1, 1)
+    assert b"secret" not in b"".join(path.read_bytes() for path in cache.directory.iterdir())
+    # a modified archive is parsed again
+    with py7zr.SevenZipFile(target, "a", password="secret") as archive:
+        archive.writestr(b"added", "added.txt")
+    with py7zr.SevenZipFile(target, "r", password="secret", header_cache=cache) as archive:
+        assert archive.getnames()[-1] == "added.txt"
+    assert len(parsed) == 3 and (cache.hits, cache.misses) == (1, 2)
+    # an encrypted header is never cached
+    cache.clear()
+    encrypted = tmp_path.joinpath("encrypted.7z")
+    with py7zr.SevenZipFile(encrypted, "w", password="secret", header_encryption=True) as archive:
+        archive.writestr(b"data", "data.txt")
+    for _ in range(2):
+        with py7zr.SevenZipFile(encrypted, "r", password="secret", header_cache=cache) as archive:
+            assert archive.getnames() == ["data.txt"]
+    assert len(cache) == 0
+
+
+class _Exploit:
+    def __reduce__(self):
+        return (os.system, ("exit 1",))
+
+
+@pytest.mark.files
+def test_extract_with_header_cache_untrusted_entry(tmp_path, monkeypatch):
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w") as archive:
+        archive.writestr(b"data", "data.txt")
+    cache = py7zr.HeaderCache(tmp_path.joinpath("cache"))
+    with py7zr.SevenZipFile(target, "r", header_cache=cache) as archive:
+        key = archive._get_header_key()
+    entries = [pickle.dumps(_Exploit()), b"\x00" * 3]
+    called = []
+    monkeypatch.setattr(os, "system", lambda command: called.append(command))
+    # entries are never unpickled; an unreadable entry is dropped and the header is read again
+    for entry in entries:
+        cache._path(key).write_bytes(entry)
+        with py7zr.SevenZipFile(target, "r", header_cache=cache) as archive:
+            with archive.open("data.txt") as member:
+                assert member.read() == b"data"
+    assert not called
+
+
+@pytest.mark.files
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_header_cache_shared_directory(tmp_path):
+    directory = tmp_path.joinpath("cache")
+    py7zr.HeaderCache(directory)
+    assert directory.stat().st_mode & 0o777 == 0o700
+    directory.chmod(0o777)
+    with pytest.raises(PermissionError):
+        py7zr.HeaderCache(directory)
+
+
+def _read_from_snapshot(snapshot, name):
+    with py7zr.SevenZipFile(snapshot.filename, "r", password="secret", snapshot=snapshot) as archive:
+        with archive.open(name) as member:
+            return member.read()
+
+
+@pytest.mark.files
+def test_extract_with_snapshot(tmp_path, monkeypatch):
+    contents = {f"file{i}.txt": b"%d\n" % i * 1000 for i in range(4)}
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", password="secret") as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    parsed = []
+    original = py7zr.archiveinfo.Header.retrieve_decoded.__func__
+    original_decoded = py7zr.archiveinfo.Header.from_decoded.__func__
+
+    def retrieve(cls, *args, **kwargs):
+        parsed.append(args)
+        return original(cls, *args, **kwargs)
+
+    def from_decoded(cls, *args, **kwargs):
+        parsed.append(args)
+        return original_decoded(cls, *args, **kwargs)
+
+    with py7zr.SevenZipFile(target, "r", password="secret") as archive:
+        monkeypatch.setattr(py7zr.archiveinfo.Header, "retrieve_decoded", classmethod(retrieve))
+        monkeypatch.setattr(py7zr.archiveinfo.Header, "from_decoded", classmethod(from_decoded))
+        # the header parsed on opening is snapshotted as it is
+        snapshot = pickle.loads(pickle.dumps(archive.snapshot()))
+    assert not parsed
+    assert b"secret" not in snapshot.header
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(_read_from_snapshot, [snapshot] * 4, contents.keys())) == list(contents.values())
+    with py7zr.SevenZipFile(snapshot.filename, "r", password="secret", snapshot=snapshot) as archive:
+        assert archive.needs_password()
+        archive.extractall(path=tmp_path.joinpath("out"))
+    assert not parsed
+    for name, data in contents.items():
+        assert tmp_path.joinpath("out", name).read_bytes() == data
+    # a snapshot of another state of the archive is not used
+    with py7zr.SevenZipFile(target, "a", password="secret") as archive:
+        archive.writestr(b"added", "added.txt")
+    with py7zr.SevenZipFile(target, "r", password="secret", snapshot=snapshot) as archive:
+        assert archive.getnames()[-1] == "added.txt"
+    assert len(parsed) == 2  # by append mode and by the stale snapshot
+    with pytest.raises(ValueError):
+        py7zr.SevenZipFile(io.BytesIO(target.read_bytes())).snapshot()
+
+
+@pytest.mark.files
+@pytest.mark.parametrize("name", ["mblock_1.7z", "solid.7z"])
+def test_extract_concurrently(tmp_path, name):
+    with py7zr.SevenZipFile(testdata_path.joinpath(name), "r") as archive:
+        archive.extractall(path=tmp_path.joinpath("expected"))
+    expected = {
+        f.relative_to(tmp_path.joinpath("expected")).as_posix(): f.read_bytes()
+        for f in tmp_path.joinpath("expected").rglob("*")
+        if f.is_file()
+    }
+
+    def run(archive, i):
+        # extract a member, and read another one, without reset() between
+        names = sorted(expected)
+        target, other = names[i % len(names)], names[(i + 1) % len(names)]
+        archive.extract(path=tmp_path.joinpath(f"out{i}"), targets=[target])
+        with archive.open(other) as member:
+            data = member.read()
+        return tmp_path.joinpath(f"out{i}", target).read_bytes() == expected[target] and data == expected[other]
+
+    with py7zr.SevenZipFile(testdata_path.joinpath(name), "r") as archive:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            assert all(executor.map(run, [archive] * 32, range(32)))
+        archive.extractall(path=tmp_path.joinpath("all"))
+        assert archive.testzip() is None
+    for name, data in expected.items():
+        assert tmp_path.joinpath("all", name).read_bytes() == data
+
+
+@pytest.mark.files
+@pytest.mark.parametrize("name", ["mblock_1.7z", "solid.7z"])
+def test_extract_mmap(tmp_path, name):
+    with py7zr.SevenZipFile(testdata_path.joinpath(name), "r") as archive:
+        archive.extractall(path=tmp_path.joinpath("read"))
+    with py7zr.SevenZipFile(testdata_path.joinpath(name), "r", use_mmap=True) as archive:
+        archive.extractall(path=tmp_path.joinpath("mmap"))
+        archive.reset()
+        assert archive.testzip() is None
+        with archive.open(archive.getnames()[-1]) as member:
+            assert member.read() == tmp_path.joinpath("read", archive.getnames()[-1]).read_bytes()
+    for f in tmp_path.joinpath("read").rglob("*"):
+        if f.is_file():
+            assert tmp_path.joinpath("mmap", f.relative_to(tmp_path.joinpath("read"))).read_bytes() == f.read_bytes()
+
+
+@pytest.mark.files
+def test_test_mmap(tmp_path):
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w") as archive:
+        archive.writeall(testdata_path.joinpath("src"), "src")
+        archive.header.main_streams.packinfo.enable_digests = True
+    with py7zr.SevenZipFile(target, "r", use_mmap=True) as archive:
+        assert archive.test()
+    data = bytearray(target.read_bytes())
+    data[40] ^= 0xFF  # in packed stream
+    target.write_bytes(data)
+    with py7zr.SevenZipFile(target, "r", use_mmap=True) as archive:
+        assert archive.test() is False
+
+
+@pytest.mark.files
+def test_extract_overlapped_write(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z"), "r") as archive:
+        archive.worker.overlap_size = 1
+        archive.extractall(path=tmp_path)
+    m = hashlib.sha256()
+    m.update(tmp_path.joinpath("bin/7zdec.exe").open("rb").read())
+    assert m.digest() == binascii.unhexlify("e14d8201c5c0d1049e717a63898a3b1c7ce4054a24871daebaa717da64dcaff5")
+
+
+@pytest.mark.files
+def test_extract_recursive(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("symlink.7z"), "r") as archive:
+        archive.extract(path=tmp_path.joinpath("lib"), targets=["lib/libabc.so.1"], recursive=True)
+        archive.reset()
+        archive.extract(path=tmp_path.joinpath("exact"), targets=["lib/libabc.so.1"])
+    assert sorted(p.name for p in tmp_path.joinpath("lib", "lib").iterdir()) == [
+        "libabc.so.1",
+        "libabc.so.1.2",
+        "libabc.so.1.2.3",
+    ]
+    assert [p.name for p in tmp_path.joinpath("exact", "lib").iterdir()] == ["libabc.so.1"]
+
+
+@pytest.mark.files
+def test_select(tmp_path):
+    with py7zr.SevenZipFile(testdata_path.joinpath("symlink.7z"), "r") as archive:
+        assert archive.select("lib/*.so.1*") == ["lib/libabc.so.1", "lib/libabc.so.1.2", "lib/libabc.so.1.2.3"]
+        assert archive.select("lib?*") == [
+            "lib/libabc.so",
+            "lib/libabc.so.1",
+            "lib/libabc.so.1.2",
+            "lib/libabc.so.1.2.3",
+            "lib64",
+        ]
+        assert archive.select(predicate=lambda name: name.endswith(".3")) == ["lib/libabc.so.1.2.3"]
+        assert archive.select("lib*", lambda name: "/" not in name) == ["lib", "lib64"]
+        assert archive.select("missing*") == []
+        targets = archive.select("lib/libabc.so.1.2*")
+        archive.extract(path=tmp_path, targets=targets)
+    assert tmp_path.joinpath("lib", "libabc.so.1.2.3").exists()
+    assert not tmp_path.joinpath("lib", "libabc.so.1").exists()
+
+
+@pytest.mark.files
+def test_extract_lzma2_segments_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1, "threads": 2, "block_size": 1 << 20}]
+    data = b"".join(b"%d:%d\n" % (i, i * i) for i in range(400000)) + os.urandom(1 << 20)
+    target = tmp_path.joinpath("target.7z")
+    with py7zr.SevenZipFile(target, "w", filters=filters) as archive:
+        archive.writestr(data, "data.bin")
+        archive.writestr("tail", "tail.txt")
+    segments = []
+    original = py7zr.compressor.ParallelDecompressor.__init__
+
+    def init(self, sizes, decode, max_pending):
+        segments.append(sizes)
+        original(self, sizes, decode, max_pending)
+
+    monkeypatch.setattr(py7zr.compressor.ParallelDecompressor, "__init__", init)
+    with py7zr.SevenZipFile(target, "r") as archive:
+        archive.extractall(path=tmp_path.joinpath("tgt"))
+    assert len(segments) == 1 and len(segments[0]) > 2
+    assert tmp_path.joinpath("tgt", "data.bin").read_bytes() == data
+    assert tmp_path.joinpath("tgt", "tail.txt").read_text() == "tail"
+    with py7zr.SevenZipFile(target, "r") as archive:
+        assert archive.testzip() is None
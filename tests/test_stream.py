@@ -55,3 +55,31 @@ def test_read_write_new(tmp_path):
         with py7zr.SevenZipFile(testdata_path.joinpath("mblock_1.7z").open(mode="rb")) as source:
             source.extractall(factory=TestWriterFactory(target))
     p7zip_test(tmp_path / "target.7z")
+
+
+@pytest.mark.files
+def test_writer_factory_receives_bytes(tmp_path):
+    # the brotli codec decodes more than requested, which extraction passes on in slices
+    contents = {f"file{i}.bin": os.urandom(50) * 20 for i in range(50)}
+    contents["data.bin"] = os.urandom(1024) * 2048
+    with py7zr.SevenZipFile(tmp_path.joinpath("target.7z"), "w", filters=[{"id": py7zr.FILTER_BROTLI}]) as archive:
+        for name, data in contents.items():
+            archive.writestr(data, name)
+    chunk_types = set()
+
+    class RecordingIO(py7zr.io.Py7zBytesIO):
+        def write(self, s):
+            chunk_types.add(type(s))
+            return super().write(s)
+
+    class RecordingFactory(py7zr.io.BytesIOFactory):
+        def create(self, filename):
+            product = self.products[filename] = RecordingIO(filename, self.limit)
+            return product
+
+    factory = RecordingFactory(len(contents["data.bin"]))
+    with py7zr.SevenZipFile(tmp_path.joinpath("target.7z"), "r") as archive:
+        archive.extractall(factory=factory)
+    for name, data in contents.items():
+        assert factory.get(name).read() == data
+    assert chunk_types == {bytes}
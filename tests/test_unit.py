@@ -1,14 +1,18 @@
 import binascii
 import ctypes
 import datetime
+import gzip
 import hashlib
 import io
 import lzma
+import mmap
 import os
 import pathlib
+import random
 import stat
 import struct
 import sys
+import threading
 from types import SimpleNamespace
 
 import pytest
@@ -20,6 +24,8 @@ import py7zr.io
 import py7zr.properties
 from py7zr.py7zr import FILE_ATTRIBUTE_UNIX_EXTENSION, Worker
 
+from . import SyncExecutor, decode_segments_with_drains
+
 testdata_path = os.path.join(os.path.dirname(__file__), "data")
 
 
@@ -146,7 +152,7 @@ def test_worker_limits_parallel_extract_tasks(monkeypatch, tmp_path):
             type(self).active -= 1
 
     files = [SimpleNamespace(id=i, emptystream=False) for i in range(5)]
-    folders = [SimpleNamespace(files=[file]) for file in files]
+    folders = [SimpleNamespace(files=[file], get_unpack_size=lambda: 0) for file in files]
     header = SimpleNamespace(
         main_streams=SimpleNamespace(
             packinfo=SimpleNamespace(packpositions=list(range(len(files) + 1))),
@@ -167,6 +173,43 @@ def test_worker_limits_parallel_extract_tasks(monkeypatch, tmp_path):
     assert FakeTask.max_active == 2
 
 
+@pytest.mark.unit
+def test_worker_extracts_largest_folder_first(monkeypatch, tmp_path):
+    class InlineTask:
+        def __init__(self, target, args):
+            self.target = target
+            self.args = args
+
+        def start(self):
+            self.target(*self.args)
+
+        def join(self):
+            pass
+
+    sizes = [10, 500, 30, 2000, 1]
+    files = [SimpleNamespace(id=i, emptystream=False) for i in range(len(sizes))]
+    folders = [SimpleNamespace(files=[file], get_unpack_size=lambda size=size: size) for file, size in zip(files, sizes)]
+    header = SimpleNamespace(
+        main_streams=SimpleNamespace(
+            packinfo=SimpleNamespace(packpositions=list(range(len(files) + 1))),
+            unpackinfo=SimpleNamespace(numfolders=len(folders), folders=folders),
+        )
+    )
+    source = tmp_path / "archive.7z"
+    source.write_bytes(b"")
+
+    worker = Worker(files, 0, header)
+    worker.concurrent = InlineTask
+    worker.target_filepath.update((file.id, tmp_path / str(file.id)) for file in files)
+    extracted = []
+    monkeypatch.setattr(worker, "extract_single", lambda fp, files, *args: extracted.extend(f.id for f in files))
+
+    with source.open("rb") as fp:
+        worker.extract(fp, tmp_path, parallel=True)
+
+    assert extracted == [3, 1, 2, 0, 4]
+
+
 @pytest.mark.unit
 def test_py7zr_substreamsinfo():
     header_data = io.BytesIO(b"\x08\x0d\x03\x09\x6f\x3a\n\x01\xdb\xaej\xb3\x07\x8d\xbf\xdc\xber\xfc\x80\x00")
@@ -280,6 +323,107 @@ def test_py7zr_files_info_2():
     assert files_info.files[3].get("attributes") == 0x2020
 
 
+@pytest.mark.unit
+def test_files_table():
+    table = py7zr.archiveinfo.FilesTable(3)
+    table.set_column("emptystream", [False, True, False])
+    table.set_names(["a.txt", "dir", "b.txt"])
+    table.set_column("lastwritetime", [132000000000000000, 132000000000000001], [True, False, True])
+    assert len(table) == 3
+    f = table[0]
+    assert f["filename"] == "a.txt"
+    assert f["emptystream"] is False
+    assert isinstance(f["lastwritetime"], py7zr.helpers.ArchiveTimestamp)
+    assert table[1]["lastwritetime"] is None
+    assert table[2]["lastwritetime"] == 132000000000000001
+    assert "attributes" not in f
+    assert f.get("attributes") is None
+    # values out of range of a column and unknown properties are kept by file
+    f["attributes"] = 1 << 40
+    f["origin"] = pathlib.Path("a.txt")
+    assert f["attributes"] == 1 << 40
+    f["attributes"] = 0x20
+    assert f["attributes"] == 0x20
+    f["packsizes"] = [10, 20]
+    assert f["packsizes"] == [10, 20]
+    f["packsizes"] = [10]
+    assert table[0]["packsizes"] == [10]
+    assert table[1].get("packsizes") is None
+    f["filename"] = "c.txt"
+    assert table[0]["filename"] == "c.txt"
+    del table[2]["filename"]
+    assert "filename" not in table[2]
+    assert table.rows_without("filename") == [2]
+    assert dict(table[1]) == {"emptystream": True, "filename": "dir", "lastwritetime": None}
+    assert set(table[0]) == {"emptystream", "filename", "lastwritetime", "attributes", "packsizes", "origin"}
+    assert table[0] == table[0] and table[0] != table[1]
+    folder = py7zr.archiveinfo.Folder()
+    table.set_folders([folder])
+    table.set_values("folder", [folder, None, folder])
+    table.set_values("maxsize", [None, 5], [0, 2])
+    assert table[2]["folder"] is folder
+    assert table[1]["folder"] is None
+    assert table[0]["maxsize"] is None and table[2]["maxsize"] == 5
+    assert "maxsize" not in table[1]
+    assert table.get_values("emptystream") == [False, True, False]
+    appended = {"filename": "d.txt", "emptystream": True}
+    table.append(appended)
+    assert len(table) == 4
+    assert table[-1] is appended
+    assert [f["emptystream"] for f in table] == [False, True, False, True]
+
+
+@pytest.mark.unit
+def test_files_table_lazy():
+    loaded = []
+
+    def loader():
+        loaded.append("attributes")
+        table.set_column("attributes", [0x20], [False, True])
+
+    table = py7zr.archiveinfo.FilesTable(2)
+    table.set_names(["a", "b"])
+    table.set_lazy("attributes", loader)
+    assert table[0]["filename"] == "a"
+    assert table.rows_without("filename") == []
+    table[1]["filename"] = "c"
+    assert table.get_values("filename") == ["a", "c"]
+    assert py7zr.archiveinfo.FilesTableView(table, [1]).get_values("filename") == ["c"]
+    assert loaded == []
+    assert table[0]["attributes"] is None
+    assert table[1]["attributes"] == 0x20
+    assert loaded == ["attributes"]
+
+
+@pytest.mark.files
+def test_files_info_lazy_decoding():
+    with py7zr.SevenZipFile(os.path.join(testdata_path, "test_1.7z"), "r") as archive:
+        files = archive.header.files_info.files
+        assert {"filename", "lastwritetime", "attributes"} <= files._pending.keys()
+        assert archive.getnames() == ["scripts", "scripts/py7zr", "setup.cfg", "setup.py"]
+        assert "lastwritetime" in files._pending and "attributes" in files._pending
+        assert archive.getinfo("setup.py").uncompressed == 559
+        assert not files._pending
+
+
+@pytest.mark.unit
+def test_name_index():
+    names = ["b/1", "a", "b/2", "a", "b", "c[1]"]
+    index = py7zr.py7zr.NameIndex(names)
+    assert len(index) == 6
+    assert index.get("a") == 1
+    assert index.get("b/2") == 2
+    assert index.get("d") is None
+    assert index.find("a") == [1, 3]
+    assert index.find("b/") == []
+    assert index.prefixed("b") == [0, 2, 4]
+    assert index.prefixed("b/") == [0, 2]
+    assert index.prefixed("") == list(range(6))
+    assert index.match("b/*") == [0, 2]
+    assert index.match("?") == [1, 3, 4]
+    assert index.match("c[[]1]") == [5]
+
+
 @pytest.mark.unit
 def test_lzma_lzma2_compressor():
     filters = [{"id": 33, "dict_size": 16777216}]
@@ -445,6 +589,43 @@ def test_read_utf16(testinput, expected):
     assert actual == expected
 
 
+@pytest.mark.unit
+def test_read_uint64s():
+    values = [0, 0x7F, 0x80, 0x3FFF, 0x4000, 0x1FFFFF, 0x7F1234567F, 0x1234567890ABCD, 0xCF1234567890ABCD]
+    buf = io.BytesIO()
+    for v in values:
+        py7zr.archiveinfo.write_uint64(buf, v)
+    buf.write(b"\x01")
+    buf.seek(0)
+    assert py7zr.archiveinfo.read_uint64s(buf, len(values)) == values
+    assert buf.read() == b"\x01"
+    with pytest.raises(py7zr.exceptions.Bad7zFile):
+        py7zr.archiveinfo.read_uint64s(io.BytesIO(b"\x05\xff\x01"), 2)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 17])
+def test_read_boolean_bulk(count):
+    booleans = [i % 3 == 0 for i in range(count)]
+    buf = io.BytesIO()
+    py7zr.archiveinfo.write_boolean(buf, booleans)
+    buf.seek(0)
+    assert py7zr.archiveinfo.read_boolean(buf, count) == booleans
+
+
+@pytest.mark.unit
+def test_read_utf16s():
+    names = ["test", "", "\u3042\u3044", "dir\\file"]
+    data = b"".join(n.encode("utf-16LE") + b"\x00\x00" for n in names)
+    assert py7zr.archiveinfo.read_utf16s(data, len(names)) == names
+    assert py7zr.archiveinfo.read_utf16s(data, 2) == names[:2]
+    assert py7zr.archiveinfo.read_utf16s(data, 5) == names + [""]
+    # a NUL code unit is aligned to two bytes
+    buf = io.BytesIO("\u0100\u0001".encode("utf-16LE") + b"\x00\x00x\x00")
+    assert py7zr.archiveinfo.read_utf16(buf) == "\u0100\u0001"
+    assert buf.read() == b"x\x00"
+
+
 @pytest.mark.unit
 @pytest.mark.parametrize("testinput, expected", [("test", b"t\x00e\x00s\x00t\x00\x00\x00")])
 def test_write_utf16(testinput, expected):
@@ -703,6 +884,39 @@ def test_calculate_key3(password: str, cycle: int, salt: bytes, expected: bytes)
     assert key == expected
 
 
+@pytest.mark.unit
+@pytest.mark.parametrize("cycle", [0, 5, 8, 9, 16])
+@pytest.mark.parametrize("salt", [b"", b"i@#ri#Ildajfdk"])
+def test_calculate_key3_batches(cycle: int, salt: bytes):
+    password = "secret^&".encode("utf-16LE")
+    expected = py7zr.helpers._calculate_key1(password, cycle, salt, "sha256")
+    assert py7zr.helpers._calculate_key3(password, cycle, salt, "sha256") == expected
+
+
+@pytest.mark.unit
+def test_key_cache():
+    cache = py7zr.helpers.KeyCache(maxsize=2)
+    password = "secret".encode("utf-16LE")
+    expected = py7zr.helpers._calculate_key1(password, 5, b"", "sha256")
+    assert cache.get(password, 5, b"") == expected
+    assert cache.get(password, 5, b"") == expected
+    assert len(cache) == 1
+    cache.get(password, 6, b"")
+    cache.get(password, 7, b"")
+    assert len(cache) == 2
+    stored = list(cache._keys.values())
+    cache.evict(password, 6, b"")
+    assert len(cache) == 1
+    assert stored[0] == bytes(32)
+    cache.clear()
+    assert len(cache) == 0
+    assert stored[1] == bytes(32)
+    # a failed derivation leaves no entry behind
+    with pytest.raises(ValueError):
+        cache.get(password, 5, b"", "sha123")
+    assert not cache._deriving
+
+
 def test_calculate_key1_nohash():
     with pytest.raises(ValueError):
         py7zr.helpers._calculate_key1("secret".encode("utf-16LE"), 16, b"", "sha123")
@@ -904,3 +1118,309 @@ def test_check_archive_path_comprehensive():
     assert py7zr.helpers.check_archive_path("../file.txt") is False
     assert py7zr.helpers.check_archive_path("dir/../../file.txt") is False
     assert py7zr.helpers.check_archive_path("../../../etc/passwd") is False
+
+
+@pytest.mark.unit
+def test_positioned_reader(tmp_path):
+    target = tmp_path.joinpath("target.bin")
+    target.write_bytes(bytes(range(256)))
+    lock = threading.Lock()
+    for source in [io.BytesIO(bytes(range(256))), target.open("rb")]:
+        first = py7zr.io.PositionedReader(source, lock)
+        second = py7zr.io.PositionedReader(source, lock)
+        first.seek(16)
+        second.seek(128)
+        assert first.read(4) == bytes([16, 17, 18, 19])
+        assert second.read(2) == bytes([128, 129])
+        assert first.tell() == 20
+        assert second.tell() == 130
+        assert first.seek(-6, os.SEEK_END) == 250
+        assert first.read() == bytes(range(250, 256))
+        first.close()
+        second.close()
+        assert not source.closed
+        source.close()
+
+
+@pytest.mark.unit
+def test_positioned_reader_gzip(tmp_path):
+    target = tmp_path.joinpath("target.gz")
+    with gzip.open(target, "wb") as f:
+        f.write(bytes(range(256)))
+    with gzip.open(target, "rb") as source:
+        # fileno() of the wrapper is the compressed file
+        reader = py7zr.io.PositionedReader(source)
+        reader.seek(16)
+        assert reader.read(4) == bytes([16, 17, 18, 19])
+        assert reader.seek(-6, os.SEEK_END) == 250
+        assert reader.read() == bytes(range(250, 256))
+        reader.close()
+
+
+@pytest.mark.unit
+def test_positioned_reader_mmap(tmp_path):
+    target = tmp_path.joinpath("target.bin")
+    target.write_bytes(bytes(range(256)))
+    with target.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = py7zr.io.PositionedReader(mapped)
+        reader.seek(16)
+        view = reader.readview(4)
+        assert isinstance(view, memoryview)
+        assert view == bytes([16, 17, 18, 19])
+        assert reader.tell() == 20
+        view.release()
+        shared = py7zr.io.PositionedReader(reader)
+        shared.seek(250)
+        assert shared.read() == bytes(range(250, 256))
+        shared.close()
+        reader.close()
+
+
+@pytest.mark.unit
+def test_scan_lzma2_restart_points():
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1}]
+    pieces = [b"".join(b"%d:%d\n" % (i, j) for j in range(20000)) for i in range(3)]
+    stream = b"".join(lzma.compress(p, format=lzma.FORMAT_RAW, filters=filters)[:-1] for p in pieces) + b"\x00"
+    fp = io.BytesIO(b"garbage" + stream)
+    fp.seek(7)
+    points = py7zr.compressor.scan_lzma2_restart_points(fp, len(stream))
+    assert fp.tell() == 7
+    assert [p[0] for p in points] == [0, len(pieces[0]), len(pieces[0]) + len(pieces[1])]
+    data = b"".join(pieces)
+    for unpacked, packed in points:
+        decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+        assert decompressor.decompress(stream[packed:]) == data[unpacked:]
+
+
+@pytest.mark.unit
+def test_scan_lzma2_restart_points_max_gap():
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1}]
+    data = b"".join(b"%d:%d\n" % (i, i * i) for i in range(400000))
+    # a stream written by a single thread resets dictionary only at its start
+    stream = lzma.compress(data, format=lzma.FORMAT_RAW, filters=filters)
+    read_at = []
+
+    class Reader(io.BytesIO):
+        def read(self, size=-1):
+            read_at.append(self.tell())
+            return super().read(size)
+
+    points = py7zr.compressor.scan_lzma2_restart_points(Reader(stream), len(stream), max_gap=1 << 20)
+    assert points == [(0, 0)]
+    assert max(read_at) < len(stream) // 2
+    assert py7zr.compressor.scan_lzma2_restart_points(io.BytesIO(stream), len(stream)) == [(0, 0)]
+
+
+@pytest.mark.unit
+def test_scan_lzma2_restart_points_uncompressed():
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1}]
+    pieces = [random.Random(i).randbytes(100000) for i in range(2)] + [b"abc" * 50000]
+    stream = b"".join(lzma.compress(p, format=lzma.FORMAT_RAW, filters=filters)[:-1] for p in pieces) + b"\x00"
+    # incompressible pieces start by uncompressed chunks resetting dictionary
+    assert stream[0] == 0x01
+    points = py7zr.compressor.scan_lzma2_restart_points(io.BytesIO(stream), len(stream))
+    assert [p[0] for p in points] == [0, 100000, 200000]
+    data = b"".join(pieces)
+    for unpacked, packed in points:
+        decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+        assert decompressor.decompress(stream[packed:]) == data[unpacked:]
+
+
+@pytest.mark.unit
+def test_restart_segments():
+    points = [(0, 0), (100, 10), (150, 15), (300, 30), (310, 31)]
+    assert py7zr.compressor.restart_segments(points, 40, 400, 100) == [(100, 10), (200, 20), (100, 10)]
+    assert py7zr.compressor.restart_segments(points, 40, 400, 1000) == [(400, 40)]
+    assert py7zr.compressor.restart_segments([], 40, 400, 100) == [(400, 40)]
+
+
+@pytest.mark.unit
+def test_sevenzipdecompressor_segments():
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1}]
+    pieces = [b"".join(b"%d:%d\n" % (i, j) for j in range(20000)) for i in range(5)]
+    stream = b"".join(lzma.compress(p, format=lzma.FORMAT_RAW, filters=filters)[:-1] for p in pieces) + b"\x00"
+    points = py7zr.compressor.scan_lzma2_restart_points(io.BytesIO(stream), len(stream))
+    data = b"".join(pieces)
+    segments = py7zr.compressor.restart_segments(points, len(stream), len(data), len(pieces[0]))
+    assert len(segments) == 5
+    coders = [
+        {"method": py7zr.properties.COMPRESSION_METHOD.LZMA2, "properties": b"\x18", "numinstreams": 1, "numoutstreams": 1}
+    ]
+    decompressor = py7zr.compressor.SevenZipDecompressor(
+        coders, len(stream), [len(data)], None, blocksize=10000, segments=[p for _, p in segments], threads=2
+    )
+    assert isinstance(decompressor.chain[0], py7zr.compressor.ParallelDecompressor)
+    fp = io.BytesIO(stream)
+    out = bytearray()
+    while len(out) < len(data):
+        chunk = decompressor.decompress(fp, 7000)
+        assert len(chunk) <= 7000
+        out += chunk
+    assert out == data
+    assert decompressor.chain[0].eof
+
+
+@pytest.mark.unit
+def test_parallel_decompressor_drain_partial_segment(monkeypatch):
+    monkeypatch.setattr(py7zr.compressor, "_get_decode_pool", SyncExecutor)
+    filters = [{"id": lzma.FILTER_LZMA2, "preset": 1}]
+    pieces = [b"".join(b"%d:%d\n" % (i, j) for j in range(20000)) for i in range(3)]
+    stream = b"".join(lzma.compress(p, format=lzma.FORMAT_RAW, filters=filters)[:-1] for p in pieces) + b"\x00"
+    points = py7zr.compressor.scan_lzma2_restart_points(io.BytesIO(stream), len(stream))
+    data = b"".join(pieces)
+    segments = [p for _, p in py7zr.compressor.restart_segments(points, len(stream), len(data), len(pieces[0]))]
+    assert len(segments) == 3
+    coders = [
+        {"method": py7zr.properties.COMPRESSION_METHOD.LZMA2, "properties": b"\x18", "numinstreams": 1, "numoutstreams": 1}
+    ]
+    decompressor = py7zr.compressor.SevenZipDecompressor(
+        coders, len(stream), [len(data)], None, segments=segments, threads=2
+    )
+    assert decode_segments_with_drains(decompressor.chain[0], stream, segments[0]) == data
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filters",
+    [
+        [{"id": lzma.FILTER_LZMA2, "preset": 1}],
+        [{"id": lzma.FILTER_X86}, {"id": lzma.FILTER_LZMA2, "preset": 1}],
+    ],
+)
+def test_parallel_lzma2_compressor(filters):
+    data = b"".join(b"%d:%d\n" % (i, i * i) for i in range(100000))
+    compressor = py7zr.compressor.ParallelLZMA2Compressor(filters, threads=3, block_size=200000)
+    stream = b"".join(compressor.compress(data[i : i + 65536]) for i in range(0, len(data), 65536))
+    stream += compressor.flush()
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=filters)
+    assert decompressor.decompress(stream) == data
+    assert decompressor.eof
+    points = py7zr.compressor.scan_lzma2_restart_points(io.BytesIO(stream), len(stream))
+    assert [p[0] for p in points if p[0] % 200000 == 0] == list(range(0, len(data), 200000))
+    # empty input makes an empty stream
+    compressor = py7zr.compressor.ParallelLZMA2Compressor(filters, threads=3)
+    assert compressor.flush() == lzma.compress(b"", format=lzma.FORMAT_RAW, filters=filters[-1:])
+
+
+@pytest.mark.unit
+def test_folder_cache(tmp_path):
+    cache = py7zr.helpers.FolderCache(memory_limit=10, disk_limit=12, directory=str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", b"aaaaaa")
+    cache.put("b", b"bbbbbb")
+    # "a" spilled to disk
+    assert cache.memory_size == 6 and cache.disk_size == 6
+    assert len(list(tmp_path.iterdir())) == 1
+    # a hit on disk is served from the file
+    with cache.get("a") as mapped:
+        assert isinstance(mapped, mmap.mmap) and mapped[:] == b"aaaaaa"
+    assert cache.memory_size == 6 and cache.disk_size == 6
+    cache.put("c", b"cccccccccccc")  # too large for memory
+    assert "c" in cache and "a" not in cache
+    cache.put("d", b"d" * 20)  # too large for both
+    assert "d" not in cache
+    with cache.get("c") as mapped:
+        assert mapped[:] == b"c" * 12
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.memory_size == 0 and cache.disk_size == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_folder_recorder(tmp_path):
+    cache = py7zr.helpers.FolderCache(memory_limit=10, disk_limit=20, directory=str(tmp_path))
+    recorder = cache.recorder("a")
+    recorder.write(b"aaaaaa")
+    recorder.write(memoryview(b"aaaa"))
+    recorder.commit()
+    assert cache.memory_size == 10 and cache.get("a") == b"a" * 10
+    # contents beyond the memory limit are streamed to a file, and cached ones are extended
+    recorder = cache.recorder("a", cache.get("a"))
+    recorder.write(b"AAAAAA")
+    assert len(list(tmp_path.iterdir())) == 1
+    recorder.commit()
+    assert cache.memory_size == 0 and cache.disk_size == 16
+    with cache.get("a") as mapped:
+        assert mapped[:] == b"a" * 10 + b"AAAAAA"
+    # contents beyond the disk limit are dropped
+    recorder = cache.recorder("b")
+    recorder.write(b"b" * 15)
+    recorder.write(b"b" * 10)
+    recorder.commit()
+    assert "b" not in cache and "a" in cache
+    assert len(list(tmp_path.iterdir())) == 1
+    # contents not committed are dropped
+    recorder = cache.recorder("c")
+    recorder.write(b"c" * 15)
+    recorder.close()
+    assert "c" not in cache
+    assert len(list(tmp_path.iterdir())) == 1
+    cache.clear()
+
+
+@pytest.mark.unit
+def test_header_cache(tmp_path):
+    cache = py7zr.helpers.HeaderCache(tmp_path.joinpath("cache"), max_size=20)
+    assert cache.get("a") is None
+    cache.put("a", b"aaaaaaaa")
+    cache.put("b", b"bbbbbbbb")
+    assert cache.get("a") == b"aaaaaaaa"
+    # "b" is the least recently used entry
+    os.utime(cache._path("b"), ns=(0, 0))
+    cache.put("c", b"cccccccc")
+    assert "a" in cache and "b" not in cache and "c" in cache
+    assert cache.size == 16
+    cache.put("d", b"d" * 21)  # larger than the cache
+    assert "d" not in cache
+    cache.put("a", b"AAAA")
+    assert cache.get("a") == b"AAAA" and len(cache) == 2
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert len(cache) == 0
+    assert list(tmp_path.joinpath("cache").iterdir()) == []
+
+
+@pytest.mark.unit
+def test_sevenzipdecompressor_bounded_output():
+    plain_data = bytes(random.Random(0).choices(b"ab", k=4 * 1024 * 1024))
+    compressor = py7zr.compressor.SevenZipCompressor(filters=[{"id": lzma.FILTER_LZMA2, "preset": 1}])
+    outdata = io.BytesIO()
+    _, packsize, _ = compressor.compress(io.BytesIO(plain_data), outdata)
+    packsize += compressor.flush(outdata)
+    outdata.seek(0)
+    decompressor = py7zr.compressor.SevenZipDecompressor(
+        compressor.coders, packsize, compressor.unpacksizes, None, blocksize=16384
+    )
+    result = bytearray()
+    while len(result) < 409600:
+        data = decompressor.decompress(outdata, 4096)
+        assert len(data) <= 4096
+        result += data
+    assert result == plain_data[: len(result)]
+    # packed data is read only as far as decoded, instead of piling up in the codec.
+    assert decompressor.consumed < 128 * 1024 < packsize
+    while len(result) < len(plain_data):
+        result += decompressor.decompress(outdata, 1 << 20)
+    assert result == plain_data
+
+
+@pytest.mark.unit
+def test_checksum_writer():
+    chunks = [os.urandom(1000) for _ in range(20)]
+    out = io.BytesIO()
+    with py7zr.io.ChecksumWriter(out) as sink:
+        for chunk in chunks:
+            sink.put(memoryview(chunk))
+    assert out.getvalue() == b"".join(chunks)
+    assert sink.crc32 == py7zr.helpers.calculate_crc32(b"".join(chunks))
+
+    class BrokenWriter:
+        def write(self, data):
+            raise OSError("disk full")
+
+    sink = py7zr.io.ChecksumWriter(BrokenWriter(), depth=1)
+    with pytest.raises(OSError):
+        for chunk in chunks:
+            sink.put(chunk)
+        sink.close()